@@ -0,0 +1,10 @@
+"""
+Benchmark suite: startup import time, URL resolution, and per-view latency
+and query counts for every route in main/urls.py and blog/urls.py.
+
+Run it with ``python manage.py benchmark``. The suite builds a throwaway
+test database, seeds it with a realistic amount of content (main.seeding),
+and compares the results with benchmarks/baseline.json, exiting non-zero
+when a view issues more queries or gets slower than the threshold allows.
+Refresh the baseline with ``--save-baseline`` after an intended change.
+"""
@@ -0,0 +1,299 @@
+"""
+HTTP load generator for the site's hot routes.
+
+Concurrent asyncio clients speak plain HTTP/1.1 over their own sockets (one
+connection per request, as the sync gunicorn workers close after every
+response) against one of three targets: a threaded WSGI server started in
+this process, a local gunicorn running grtts_project.wsgi, or any URL.
+Each client picks the next scenario from a weighted mix until the run
+ends; the report gives latency percentiles, throughput and error rates
+per route.
+
+Certificate verification is rate limited per IP. The in-process target
+gives each client its own REMOTE_ADDR, as separate visitors would have;
+against gunicorn or a URL every client shares one address. Either way 429
+responses are counted per route as rate limited, and left out of the
+latency percentiles and the errors.
+"""
+import asyncio
+from collections import Counter
+from http.cookies import SimpleCookie
+import logging
+import random
+import socket
+from socketserver import ThreadingMixIn
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+import uuid
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
+
+from blog.models import Post
+from main.models import Certificate
+
+DEFAULT_MIX = {
+    'home': 30,
+    'courses': 15,
+    'post_list': 15,
+    'post_detail': 20,
+    'verify_certificate': 8,
+    'newsletter_signup': 2,
+    # track_newsletter_open is left out: its URL takes a UUID but tracking
+    # rows have integer ids, so every request would measure the 404 path
+}
+
+RATE_LIMITED = 429
+
+# Header the in-process target turns into a per-client REMOTE_ADDR
+CLIENT_HEADER = 'X-Loadtest-Client'
+
+
+class Scenarios:
+    """Builds ``(method, path, form)`` for each route in the mix from real rows"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.slugs = list(Post.objects.filter(status='published').values_list('slug', flat=True)[:500])
+        self.certificates = list(Certificate.objects.values_list('certificate_number', flat=True)[:500])
+        if not self.slugs or not self.certificates:
+            raise ValueError("Load testing needs content; run `manage.py seed` first")
+
+    def home(self):
+        return 'GET', reverse('main:home'), None
+
+    def courses(self):
+        return 'GET', reverse('main:courses'), None
+
+    def post_list(self):
+        return 'GET', reverse('blog:post_list'), None
+
+    def post_detail(self):
+        return 'GET', reverse('blog:post_detail', args=[self.rng.choice(self.slugs)]), None
+
+    def verify_certificate(self):
+        # One in ten is a mistyped number
+        number = self.rng.choice(self.certificates) if self.rng.random() < 0.9 else f"GRTTS-0000-{self.rng.randint(1, 9999)}"
+        return 'POST', reverse('main:verify_certificate'), {'certificate_number': number}
+
+    def newsletter_signup(self):
+        return 'POST', reverse('main:newsletter_signup'), {'email': f"load-{uuid.uuid4().hex[:12]}@example.com"}
+
+
+# =============================================================================
+# TARGETS
+# =============================================================================
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def per_client_addresses(app):
+    """Set REMOTE_ADDR from CLIENT_HEADER, so per-IP limits apply to each client separately"""
+    header = 'HTTP_' + CLIENT_HEADER.upper().replace('-', '_')
+
+    def application(environ, start_response):
+        number = environ.get(header, '')
+        if number.isdecimal():
+            number = int(number)
+            environ['REMOTE_ADDR'] = f"10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}"
+        return app(environ, start_response)
+    return application
+
+
+class InProcessServer:
+    """grtts_project's WSGI app on a threaded wsgiref server in this process"""
+
+    def __enter__(self):
+        # Failures are counted in the report; don't interleave tracebacks with it
+        logging.getLogger('django.request').disabled = True
+        self.server = ThreadingWSGIServer(('127.0.0.1', 0), QuietHandler)
+        self.server.set_app(per_client_addresses(get_wsgi_application()))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        logging.getLogger('django.request').disabled = False
+
+
+class GunicornServer:
+    """A local gunicorn serving grtts_project.wsgi"""
+
+    def __init__(self, workers=2, threads=1):
+        self.workers = workers
+        self.threads = threads
+
+    def __enter__(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'grtts_project.wsgi', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(self.workers), '--threads', str(self.threads), '--log-level', 'warning'],
+            cwd=settings.BASE_DIR,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("gunicorn exited during startup")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+                return f"http://127.0.0.1:{port}"
+            except OSError:
+                time.sleep(0.1)
+        self.process.terminate()
+        raise RuntimeError("gunicorn did not start listening within 30s")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(10)
+
+
+class ExternalServer:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def __enter__(self):
+        return self.url
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+
+async def fetch(url, method, path, form=None, cookies=None, timeout=30, number=0):
+    """
+    Send one request to ``url`` (an urlsplit result) as client ``number``;
+    return ``(status, set-cookie headers)``
+    """
+    body = urlencode(form).encode() if form else b''
+    headers = [f'{method} {url.path.rstrip("/")}{path} HTTP/1.1', f'Host: {url.netloc}', 'Connection: close',
+               'User-Agent: grtts-loadtest', f'{CLIENT_HEADER}: {number}']
+    if cookies:
+        headers.append('Cookie: ' + '; '.join(f'{name}={value}' for name, value in cookies.items()))
+        if 'csrftoken' in cookies:
+            headers.append(f"X-CSRFToken: {cookies['csrftoken']}")
+    if method == 'POST':
+        headers += ['Content-Type: application/x-www-form-urlencoded', f'Content-Length: {len(body)}']
+    request = ('\r\n'.join(headers) + '\r\n\r\n').encode() + body
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        try:
+            writer.write(request)
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+
+    response = await asyncio.wait_for(exchange(), timeout)
+    head = response.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+    status = int(head[0].split()[1])
+    set_cookies = [line.split(':', 1)[1].strip() for line in head[1:] if line.lower().startswith('set-cookie:')]
+    return status, set_cookies
+
+
+async def client(number, base_url, scenarios, mix, deadline, rng, results):
+    url = urlsplit(base_url)
+
+    # A CSRF cookie for the form posts, the way a browser would have one
+    cookies = {}
+    _, set_cookies = await fetch(url, 'GET', reverse('main:contact'), number=number)
+    for header in set_cookies:
+        cookies.update({name: morsel.value for name, morsel in SimpleCookie(header).items()})
+
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, form = getattr(scenarios, name)()
+        started = time.perf_counter()
+        try:
+            status, _ = await fetch(url, method, path, form, cookies, number=number)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            status = type(e).__name__
+        results[name].append(((time.perf_counter() - started) * 1000, status))
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples, elapsed):
+    # A 429 is answered before the route does its work; timing it would flatter the route
+    latencies = sorted(ms for ms, status in samples if status != RATE_LIMITED)
+    statuses = Counter(str(status) for _, status in samples)
+    rate_limited = statuses[str(RATE_LIMITED)]
+    errors = sum(1 for _, status in samples if status not in (200, RATE_LIMITED))
+    return {
+        'requests': len(samples),
+        'rate_limited': rate_limited,
+        'rps': len(samples) / elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else 0.0,
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'statuses': dict(statuses),
+    }
+
+
+def run(target, mix=None, concurrency=20, duration=10.0, seed=0):
+    """Drive ``target`` (a server context manager) and return the results dict"""
+    mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+    rng = random.Random(seed)
+    scenarios = Scenarios(rng)
+    results = {name: [] for name in mix}
+
+    with target as base_url:
+        async def main():
+            deadline = time.monotonic() + duration
+            await asyncio.gather(*(
+                client(number, base_url, scenarios, mix, deadline, random.Random(rng.random()), results)
+                for number in range(concurrency)
+            ))
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        elapsed = time.perf_counter() - started
+
+    routes = {name: summarize(samples, elapsed) for name, samples in results.items()}
+    latencies = sorted(ms for samples in results.values() for ms, status in samples if status != RATE_LIMITED)
+    errors = sum(route['errors'] for route in routes.values())
+    rate_limited = sum(route['rate_limited'] for route in routes.values())
+    requests = sum(route['requests'] for route in routes.values())
+    return {
+        'target': type(target).__name__,
+        'concurrency': concurrency,
+        'duration_s': elapsed,
+        'mix': mix,
+        'routes': routes,
+        'total': {
+            'requests': requests,
+            'rate_limited': rate_limited,
+            'rps': requests / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.0,
+        },
+    }
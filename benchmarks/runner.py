@@ -0,0 +1,178 @@
+"""
+Measurements and baseline comparison for the benchmark suite.
+
+Views are driven through a plain WSGIHandler rather than the test client,
+which instruments template rendering and would inflate every timing.
+"""
+import io
+import logging
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test import Client
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from main.management.commands.coldstart import run_once
+from .routes import routes
+
+
+def environ(path, cookie=''):
+    path, _, query = path.partition('?')
+    return {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie, 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(), 'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+
+
+def staff_cookie(user):
+    client = Client()
+    client.force_login(user)
+    return '; '.join(f'{name}={morsel.value}' for name, morsel in client.cookies.items())
+
+
+CALIBRATION_TEMPLATE = Template(
+    '{% for row in rows %}<li>{{ row.name|title }} {{ row.value|floatformat:2 }}</li>{% endfor %}'
+)
+CALIBRATION_CONTEXT = Context({'rows': [{'name': f'row {n}', 'value': n / 7} for n in range(50)]})
+
+
+def calibration_ms():
+    """
+    Time one fixed template render in ms. View timings are taken alongside
+    it and compared as a ratio, so a slower machine or a throttled CI runner
+    doesn't read as a regression.
+    """
+    started = time.perf_counter()
+    CALIBRATION_TEMPLATE.render(CALIBRATION_CONTEXT)
+    return (time.perf_counter() - started) * 1000
+
+
+def measure_startup(runs=5):
+    """Best boot time of a fresh interpreter (import of the WSGI module) in ms"""
+    timings, calibration = [], []
+    for _ in range(runs):
+        timings.append(run_once('/ping/')['boot_ms'])
+        calibration.extend(calibration_ms() for _ in range(10))
+    return {'boot_ms': min(timings), 'units': min(timings) / min(calibration)}
+
+
+def measure_resolution(rounds=5, iterations=400):
+    """Microseconds per resolve() for each route's path, best of ``rounds``"""
+    results = {}
+    for name, path, _ in routes():
+        path = path.partition('?')[0]
+        resolve(path)
+        timings, calibration = [], []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                resolve(path)
+            timings.append((time.perf_counter() - started) / iterations * 1e6)
+            calibration.append(calibration_ms())
+        results[name] = {'us': min(timings), 'units': min(timings) / min(calibration)}
+    return results
+
+
+def request(handler, path, cookie):
+    statuses = []
+    response = handler(environ(path, cookie), lambda status, headers, exc_info=None: statuses.append(status))
+    for _ in response:
+        pass
+    response.close()
+    return int(statuses[0].split()[0])
+
+
+def measure_views(staff, repeat=20):
+    """
+    Latency and query counts per route. ``cold_queries`` is the first request
+    after the cache is cleared; the rest are warm requests. ``units`` is the
+    best of ``repeat`` runs over the best interleaved calibration render,
+    which is what the baseline gates on: minimums are far steadier than
+    medians on a shared machine, and the ratio cancels out machine speed.
+    """
+    handler = WSGIHandler()
+    cookie = staff_cookie(staff)
+    cache.clear()
+    # Broken routes show up as a 500 in the report, not as a traceback per request
+    request_logger = logging.getLogger('django.request')
+    request_logger.disabled = True
+    try:
+        return _measure_views(handler, cookie, repeat)
+    finally:
+        request_logger.disabled = False
+
+
+def _measure_views(handler, cookie, repeat):
+    results = {}
+    for name, path, staff_only in routes():
+        cookie_for_route = cookie if staff_only else ''
+        with CaptureQueriesContext(connection) as cold:
+            status = request(handler, path, cookie_for_route)
+        timings, calibration = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as warm:
+                started = time.perf_counter()
+                request(handler, path, cookie_for_route)
+                timings.append((time.perf_counter() - started) * 1000)
+            calibration.append(calibration_ms())
+        results[name] = {
+            'path': path,
+            'status': status,
+            'ms': min(timings),
+            'median_ms': statistics.median(timings),
+            'units': min(timings) / min(calibration),
+            'queries': len(warm),
+            'cold_queries': len(cold),
+        }
+    return results
+
+
+def compare(results, baseline, threshold, min_ms, startup_threshold=50):
+    """
+    Return ``(regressions, notes)``. A view regresses when it issues more
+    queries than the baseline, or when its calibrated cost grew by more than
+    ``threshold`` percent and the slowdown is worth more than ``min_ms``
+    milliseconds. Resolution is held to ``threshold`` and startup, which
+    swings with the file system cache, to ``startup_threshold``.
+    """
+    regressions, notes = [], []
+    limit = 1 + threshold / 100
+
+    if 'startup' in results and 'startup' in baseline:
+        now, then = results['startup']['units'], baseline['startup']['units']
+        if now > then * (1 + startup_threshold / 100):
+            regressions.append(f"startup: boot {(now / then - 1) * 100:.0f}% slower ({results['startup']['boot_ms']:.0f}ms)")
+
+    shared = results['resolve'].keys() & baseline.get('resolve', {}).keys()
+    now = sum(results['resolve'][name]['units'] for name in shared)
+    then = sum(baseline['resolve'][name]['units'] for name in shared)
+    if shared and now > then * limit:
+        regressions.append(f"URL resolution: {(now / then - 1) * 100:.0f}% slower across all routes")
+
+    for name, view in results['views'].items():
+        old = baseline.get('views', {}).get(name)
+        if old is None:
+            notes.append(f"{name}: new route, no baseline")
+            continue
+        for key in ('queries', 'cold_queries'):
+            if view[key] > old[key]:
+                regressions.append(f"{name}: {view[key]} {key.replace('_', ' ')} vs {old[key]}")
+        # What the baseline cost would be at this run's machine speed. Error
+        # pages aren't held to a latency budget.
+        expected = old['units'] * view['ms'] / view['units']
+        if old['status'] < 500 and view['units'] > old['units'] * limit and view['ms'] - expected > min_ms:
+            regressions.append(f"{name}: {view['ms']:.2f}ms vs {expected:.2f}ms expected ({old['ms']:.2f}ms in the baseline)")
+        if view['status'] >= 500:
+            regressions.append(f"{name}: status {view['status']} (baseline {old['status']})")
+        elif view['status'] != old['status']:
+            notes.append(f"{name}: status {view['status']} (baseline {old['status']})")
+    for name in baseline.get('views', {}).keys() - results['views'].keys():
+        notes.append(f"{name}: in the baseline but no longer benchmarked")
+    return regressions, notes
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Category, Tag, Post, PostImage, PostFile, PostVideo, Comment
+from . import moderation
 
 class PostImageInline(admin.TabularInline):
     model = PostImage
@@ -58,7 +59,7 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'category', 'author', 'status', 'views', 'published_date', 'thumbnail_preview']
+    list_display = ['title', 'category', 'author', 'status', 'views', 'approved_comment_count', 'published_date', 'thumbnail_preview']
     list_filter = ['status', 'category', 'tags', 'created_at']
     search_fields = ['title', 'content', 'excerpt']
     prepopulated_fields = {'slug': ('title',)}
@@ -144,8 +145,26 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'post', 'approved', 'created_at']
     list_filter = ['approved', 'created_at']
     search_fields = ['name', 'email', 'content']
-    actions = ['approve_comments']
+    actions = ['approve_comments', 'unapprove_comments']
     
     def approve_comments(self, request, queryset):
-        queryset.update(approved=True)
+        approved = moderation.set_approved(queryset, approved=True)
+        self.message_user(request, f"{approved} comment(s) approved.")
     approve_comments.short_description = "Approve selected comments"
+    
+    def unapprove_comments(self, request, queryset):
+        withdrawn = moderation.set_approved(queryset, approved=False)
+        self.message_user(request, f"{withdrawn} comment(s) moved back to the moderation queue.")
+    unapprove_comments.short_description = "Unapprove selected comments"
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if obj.approved or 'approved' in form.changed_data:
+            previous_post_id = form.initial.get('post') if 'post' in form.changed_data else None
+            moderation.comment_changed(obj, previous_post_id=previous_post_id)
+    
+    def delete_model(self, request, obj):
+        moderation.delete_comments(Comment.objects.filter(pk=obj.pk))
+    
+    def delete_queryset(self, request, queryset):
+        moderation.delete_comments(queryset)
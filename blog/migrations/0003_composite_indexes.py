@@ -0,0 +1,112 @@
+# Generated by Django 4.2 on 2026-10-19 14:18
+
+import blog.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_remove_postimage_post_remove_postvideo_post_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to=blog.models.post_file_upload_path)),
+                ('file_type', models.CharField(choices=[('pdf', 'PDF Document'), ('doc', 'Word Document'), ('xls', 'Excel Spreadsheet'), ('ppt', 'PowerPoint Presentation'), ('other', 'Other')], default='other', max_length=20)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-uploaded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to=blog.models.post_image_upload_path)),
+                ('caption', models.CharField(blank=True, max_length=200)),
+                ('order', models.IntegerField(default=0)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['order', 'uploaded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostVideo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video', models.FileField(upload_to=blog.models.post_video_upload_path)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('order', models.IntegerField(default=0)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['order', 'uploaded_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='website',
+            field=models.URLField(blank=True, help_text='Optional website URL'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='featured_video',
+            field=models.URLField(blank=True, help_text='YouTube or Vimeo URL'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='meta_description',
+            field=models.TextField(blank=True, help_text='SEO description'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='meta_title',
+            field=models.CharField(blank=True, help_text='SEO title', max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='featured_image',
+            field=models.ImageField(blank=True, help_text='Main featured image for the post', null=True, upload_to='blog/featured/%Y/%m/'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'approved', '-created_at'], name='comment_post_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['approved', '-created_at'], name='comment_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-published_date'], name='post_status_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', 'status', '-published_date'], name='post_category_status_idx'),
+        ),
+        migrations.AddField(
+            model_name='postvideo',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='videos', to='blog.post'),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='blog.post'),
+        ),
+        migrations.AddField(
+            model_name='postfile',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='blog.post'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-19 14:20
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_counts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.annotate(n=Count('comments', filter=Q(comments__approved=True))).filter(n__gt=0)
+    for post in posts:
+        Post.objects.filter(pk=post.pk).update(approved_comment_count=post.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='approved_comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
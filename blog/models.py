@@ -79,6 +79,7 @@ class Post(models.Model):
     # Status and tracking
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     views = models.IntegerField(default=0)
+    approved_comment_count = models.PositiveIntegerField(default=0, editable=False)
     
     # Dates
     published_date = models.DateTimeField(default=timezone.now)
@@ -87,6 +88,10 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            models.Index(fields=['status', '-published_date'], name='post_status_published_idx'),
+            models.Index(fields=['category', 'status', '-published_date'], name='post_category_status_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -195,6 +200,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['post', 'approved', '-created_at'], name='comment_post_approved_idx'),
+            models.Index(fields=['approved', '-created_at'], name='comment_approved_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.name} on {self.post.title}"
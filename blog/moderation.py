@@ -0,0 +1,124 @@
+"""
+Comment moderation.
+
+New comments are stored unapproved and never touch the cache. Approving,
+unapproving or deleting comments goes through the functions here, which
+adjust Post.approved_comment_count with one UPDATE per distinct delta and
+drop the cached comment thread of the affected posts once the transaction
+commits. post_detail renders the thread from that cache, so a post whose
+comments have not changed costs no comment query per view.
+"""
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from main import content_versions
+from .models import Comment, Post
+
+THREAD_KEY = 'blog:comment_thread:{}'
+
+
+def invalidate_threads(post_ids):
+    cache.delete_many([THREAD_KEY.format(post_id) for post_id in set(post_ids)])
+
+
+def _apply_deltas(deltas):
+    """Apply ``{post_id: delta}`` with one UPDATE per distinct delta"""
+    by_delta = defaultdict(list)
+    for post_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(post_id)
+    for delta, post_ids in by_delta.items():
+        Post.objects.filter(pk__in=post_ids).update(approved_comment_count=F('approved_comment_count') + delta)
+    transaction.on_commit(lambda: invalidate_threads(deltas))
+    # The comment updates above bypass post_save
+    transaction.on_commit(lambda: content_versions.bump(Comment, Post))
+
+
+def submit_comment(post, name, email, content, ip_address=None, website=''):
+    """Store a new comment in the moderation queue"""
+    try:
+        URLValidator(schemes=['http', 'https'])(website)
+    except ValidationError:
+        website = ''
+    return Comment.objects.create(
+        post=post,
+        name=name,
+        email=email,
+        website=website,
+        content=content,
+        ip_address=ip_address,
+    )
+
+
+def set_approved(queryset, approved=True):
+    """
+    Approve (or unapprove) every comment in ``queryset`` that is not already
+    in that state. Returns the number of comments changed.
+    """
+    with transaction.atomic():
+        changed = list(
+            queryset.filter(approved=not approved).select_for_update().values_list('pk', 'post_id')
+        )
+        if not changed:
+            return 0
+        Comment.objects.filter(pk__in=[pk for pk, _ in changed]).update(approved=approved)
+        step = 1 if approved else -1
+        _apply_deltas({post_id: n * step for post_id, n in Counter(post_id for _, post_id in changed).items()})
+    return len(changed)
+
+
+def delete_comments(queryset):
+    """Delete comments, taking approved ones off their posts' counts"""
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values_list('pk', 'post_id', 'approved'))
+        Comment.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+        _apply_deltas({
+            post_id: -n for post_id, n in
+            Counter(post_id for _, post_id, approved in rows if approved).items()
+        })
+    return len(rows)
+
+
+def comment_changed(comment, previous_post_id=None):
+    """
+    Recount and re-render the post's thread after an approved comment was
+    edited or its approval was toggled outside set_approved. Pass
+    ``previous_post_id`` when the comment was moved, so the post it left
+    is recounted too.
+    """
+    post_ids = {comment.post_id, previous_post_id} - {None}
+    refresh_comment_counts(Post.objects.filter(pk__in=post_ids))
+    transaction.on_commit(lambda: invalidate_threads(post_ids))
+
+
+def refresh_comment_counts(posts=None):
+    """Recompute approved_comment_count from the comments table"""
+    posts = Post.objects.all() if posts is None else posts
+    counts = posts.annotate(n=Count('comments', filter=Q(comments__approved=True))).values_list('pk', 'n')
+    by_count = defaultdict(list)
+    for post_id, n in counts:
+        by_count[n].append(post_id)
+    for n, post_ids in by_count.items():
+        Post.objects.filter(pk__in=post_ids).update(approved_comment_count=n)
+    transaction.on_commit(lambda: content_versions.bump(Post))
+
+
+def comment_thread(post):
+    """Return the rendered approved-comment thread for a post, from cache"""
+    key = THREAD_KEY.format(post.pk)
+    html = cache.get(key)
+    if html is None:
+        if post.approved_comment_count:
+            comments = post.comments.filter(approved=True).order_by('-created_at')
+        else:
+            comments = []
+        html = render_to_string('blog/comment_thread.html', {'comments': comments})
+        cache.set(key, html, None)
+    return mark_safe(html)
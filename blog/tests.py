@@ -1,3 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from main import content_versions
+
+from . import moderation
+from .models import Category, Comment, Post
+
+
+class CommentModerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = get_user_model().objects.create(username='editor', email='editor@example.com')
+        category = Category.objects.create(name='Field Notes')
+        self.post = Post.objects.create(
+            title='Tracking rhino', category=category, author=author, content='...', status='published'
+        )
+        self.url = reverse('blog:post_detail', args=[self.post.slug])
+
+    def comment(self, **extra):
+        return moderation.submit_comment(self.post, name='Rudo', email='rudo@example.com', content='Great read', **extra)
+
+    def test_submitted_comments_wait_for_approval(self):
+        self.client.post(self.url, {'name': 'Rudo', 'email': 'rudo@example.com', 'comment': 'Hi', 'website': 'javascript:alert(1)'})
+        comment = Comment.objects.get()
+        self.assertFalse(comment.approved)
+        self.assertEqual(comment.website, '')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 0)
+
+    def test_batched_approval_updates_count_and_thread(self):
+        self.comment()
+        self.comment()
+        self.assertNotContains(self.client.get(self.url), 'Great read')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(moderation.set_approved(Comment.objects.all()), 2)
+        self.assertEqual(moderation.set_approved(Comment.objects.all()), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 2)
+        self.assertContains(self.client.get(self.url), 'Great read', count=2)
+
+        moderation.delete_comments(Comment.objects.filter(pk=Comment.objects.first().pk))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 1)
+
+    def test_moving_an_approved_comment_recounts_both_posts(self):
+        comment = self.comment()
+        moderation.set_approved(Comment.objects.all())
+        other = Post.objects.create(title='Elephant corridors', category=self.post.category, content='...',
+                                    status='published')
+        admin = get_user_model().objects.create(username='admin', email='admin@example.com', is_staff=True,
+                                                is_superuser=True)
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:blog_comment_change', args=[comment.pk]), {
+            'post': other.pk, 'name': comment.name, 'email': comment.email, 'website': '',
+            'content': comment.content, 'approved': 'on', 'ip_address': '',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.approved_comment_count, other.approved_comment_count), (0, 1))
+
+    def test_moderation_moves_content_versions(self):
+        self.comment()
+        token = content_versions.token(Comment, Post)
+        with self.captureOnCommitCallbacks(execute=True):
+            moderation.set_approved(Comment.objects.all())
+        self.assertNotEqual(content_versions.token(Comment, Post), token)
+
+    def test_cached_thread_needs_no_comment_query(self):
+        self.comment()
+        with self.captureOnCommitCallbacks(execute=True):
+            moderation.set_approved(Comment.objects.all())
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Great read')
+        self.assertFalse([q['sql'] for q in queries if 'blog_comment' in q['sql']])
@@ -13,4 +13,8 @@ urlpatterns = [
     # Category and tag listings
     path('category/<slug:slug>/', views.category_list, name='category_list'),
     path('tag/<slug:slug>/', views.tag_list, name='tag_list'),
+    
+    # Feeds
+    path('feed/', views.post_feed, name='post_feed'),
+    path('feed/atom/', views.post_feed_atom, name='post_feed_atom'),
 ]
@@ -1,8 +1,9 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import Q, Count, F
 from django.contrib import messages
-from .models import Post, Category, Tag, Comment
+from .models import Post, Category, Tag
+from . import moderation
 
 def post_list(request):
     """Display all published blog posts"""
@@ -59,36 +60,33 @@ def post_detail(request, slug):
     """Display a single blog post"""
     post = get_object_or_404(Post, slug=slug, status='published')
     
-    # Increment view count
-    post.views += 1
-    post.save()
-    
-    # Get related posts (same category)
-    related_posts = Post.objects.filter(
-        category=post.category,
-        status='published'
-    ).exclude(id=post.id).distinct()[:3]
-    
-    # Get approved comments
-    comments = post.comments.filter(approved=True).order_by('-created_at')
-    
     # Handle comment submission
     if request.method == 'POST' and request.POST.get('comment'):
-        comment = Comment(
-            post=post,
+        moderation.submit_comment(
+            post,
             name=request.POST.get('name'),
             email=request.POST.get('email'),
             content=request.POST.get('comment'),
-            ip_address=request.META.get('REMOTE_ADDR')
+            ip_address=request.META.get('REMOTE_ADDR'),
+            website=request.POST.get('website', ''),
         )
-        comment.save()
         messages.success(request, 'Your comment has been submitted and is awaiting approval.')
         return redirect('blog:post_detail', slug=post.slug)
     
+    # Increment view count without rewriting the rest of the row
+    Post.objects.filter(pk=post.pk).update(views=F('views') + 1)
+    post.views += 1
+    
+    # Get related posts (same category)
+    related_posts = Post.objects.filter(
+        category=post.category,
+        status='published'
+    ).exclude(id=post.id).distinct()[:3]
+    
     context = {
         'post': post,
         'related_posts': related_posts,
-        'comments': comments,
+        'comment_thread': moderation.comment_thread(post),
     }
     return render(request, 'blog/post_detail.html', context)
 
@@ -131,3 +129,15 @@ def tag_list(request, slug):
         'post_count': posts.count(),
     }
     return render(request, 'blog/tag_list.html', context)
+
+
+def post_feed(request):
+    """RSS feed of the latest published posts"""
+    from main import sitemaps
+    return sitemaps.document_response(request, 'feed:posts:rss', 'application/rss+xml; charset=utf-8')
+
+
+def post_feed_atom(request):
+    """Atom feed of the latest published posts"""
+    from main import sitemaps
+    return sitemaps.document_response(request, 'feed:posts:atom', 'application/atom+xml; charset=utf-8')
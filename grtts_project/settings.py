@@ -1,9 +1,8 @@
 import os
+import tempfile
 import dj_database_url
 from pathlib import Path
 import environ
-import pymysql
-pymysql.install_as_MySQLdb()
 
 # Initialize environ
 env = environ.Env(
@@ -13,8 +12,9 @@ env = environ.Env(
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Read .env file if it exists (for local development)
-environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
+# Read .env file if it exists (for local development; Vercel injects the environment directly)
+if os.path.exists(os.path.join(BASE_DIR, '.env')):
+    environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = env('SECRET_KEY', default='your-secret-key-here-change-this-in-production')
@@ -53,12 +53,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Critical: Must be here after SecurityMiddleware
+    'main.middleware.RequestTimingMiddleware',  # After WhiteNoise so static files aren't timed
+    'main.querylog.QueryInspectionMiddleware',  # Only when QUERY_INSPECTION is on
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'main.middleware.ProfilingMiddleware',  # Only when PROFILING_ENABLED is on
 ]
 
 ROOT_URLCONF = 'grtts_project.urls'
@@ -66,12 +69,10 @@ ROOT_URLCONF = 'grtts_project.urls'
 # Templates Configuration
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [
-            os.path.join(BASE_DIR, 'main/templates'),
-            os.path.join(BASE_DIR, 'blog/templates'),
-        ],
-        'APP_DIRS': True,
+        'BACKEND': 'main.templating.TimedDjangoTemplates',  # DjangoTemplates that reports render time
+        # main/templates and blog/templates are found through their apps; listing
+        # them in DIRS as well made every miss search them twice
+        'DIRS': [],
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -79,6 +80,11 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -94,6 +100,16 @@ DATABASES = {
     )
 }
 
+# MySQL goes through PyMySQL's MySQLdb shim. Importing it (and the cryptography
+# package it pulls in) costs ~20ms of cold start, so only do it when it's the driver in use.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+    import pymysql
+    pymysql.install_as_MySQLdb()
+
+# Optional file-backed test database (SQLite's default in-memory test DB can't be shared across threads)
+if env('TEST_DATABASE_NAME', default=''):
+    DATABASES['default']['TEST'] = {'NAME': env('TEST_DATABASE_NAME')}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -121,13 +137,7 @@ if DEBUG:
     DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
     MEDIA_URL = '/media/'
     MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-    
-    # Create media directories if they don't exist
-    os.makedirs(MEDIA_ROOT, exist_ok=True)
-    os.makedirs(os.path.join(MEDIA_ROOT, 'blog'), exist_ok=True)
-    os.makedirs(os.path.join(MEDIA_ROOT, 'courses'), exist_ok=True)
-    os.makedirs(os.path.join(MEDIA_ROOT, 'testimonials'), exist_ok=True)
-    os.makedirs(os.path.join(MEDIA_ROOT, 'locations'), exist_ok=True)
+    # FileSystemStorage creates upload directories as it saves into them
 else:
     # Production: Use Backblaze B2 with private bucket and signed URLs
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
@@ -192,7 +202,9 @@ ALLOWED_FILE_TYPES = [
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email Configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Counts sent and failed mail for /metrics, then delivers through EMAIL_DELIVERY_BACKEND
+EMAIL_BACKEND = 'main.email_backends.MetricsEmailBackend'
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -243,3 +255,101 @@ ONEMONEY_API_KEY = env('ONEMONEY_API_KEY', default='')
 
 # Payment test mode
 PAYMENT_TEST_MODE = env.bool('PAYMENT_TEST_MODE', default=True)
+
+# Admin changelists on large tables use estimated counts above this many rows
+ESTIMATED_COUNT_THRESHOLD = env.int('ESTIMATED_COUNT_THRESHOLD', default=10000)
+ESTIMATED_COUNT_CACHE_TIMEOUT = env.int('ESTIMATED_COUNT_CACHE_TIMEOUT', default=300)  # seconds
+
+# Certificate verification logs are queued and written in batches
+VERIFICATION_LOG_BATCH_SIZE = env.int('VERIFICATION_LOG_BATCH_SIZE', default=100)
+VERIFICATION_LOG_FLUSH_INTERVAL = env.int('VERIFICATION_LOG_FLUSH_INTERVAL', default=5)  # seconds
+
+# Per-IP limit on certificate verification attempts: BURST per window, averaging PER_MINUTE
+VERIFICATION_RATE_BURST = env.int('VERIFICATION_RATE_BURST', default=10)
+VERIFICATION_RATE_PER_MINUTE = env.int('VERIFICATION_RATE_PER_MINUTE', default=30)
+
+# Seconds a process keeps its certificate filter and status map before
+# rebuilding them, even if it hasn't seen a certificate change
+VERIFICATION_SNAPSHOT_MAX_AGE = env.int('VERIFICATION_SNAPSHOT_MAX_AGE', default=60)
+
+# Key for signed certificate verification tokens (defaults to SECRET_KEY)
+CERTIFICATE_SIGNING_KEY = env('CERTIFICATE_SIGNING_KEY', default='')
+
+# Seconds crawlers may cache sitemap.xml and the feeds before revalidating
+SITEMAP_MAX_AGE = env.int('SITEMAP_MAX_AGE', default=3600)
+
+# URLs per sitemap page. The protocol allows at most 50,000 (and 50 MB, which
+# that many of these entries stay well under)
+SITEMAP_PAGE_SIZE = env.int('SITEMAP_PAGE_SIZE', default=50000)
+
+# Seconds browsers and proxies may cache autocomplete responses
+AUTOCOMPLETE_MAX_AGE = env.int('AUTOCOMPLETE_MAX_AGE', default=300)
+
+# Fraction of requests timed and logged by RequestTimingMiddleware (staff requests
+# are always timed, for their Server-Timing header, but only logged if sampled)
+REQUEST_TIMING_SAMPLE_RATE = env.float('REQUEST_TIMING_SAMPLE_RATE', default=0.0)
+
+# Per-view latency, query and cache metrics served at /metrics. Scrapers
+# authenticate with "Authorization: Bearer <METRICS_TOKEN>"; staff can always read it.
+# Under gunicorn point METRICS_DIR at a directory shared by the workers.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_DIR = env('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = env.float('METRICS_FLUSH_INTERVAL', default=5)  # seconds
+
+# Development/staging query inspection: log queries slower than SLOW_QUERY_MS
+# and SELECTs repeated QUERY_REPEAT_THRESHOLD times in one request (N+1)
+QUERY_INSPECTION = env.bool('QUERY_INSPECTION', default=env.bool('DEBUG', default=False))
+SLOW_QUERY_MS = env.float('SLOW_QUERY_MS', default=100)
+QUERY_REPEAT_THRESHOLD = env.int('QUERY_REPEAT_THRESHOLD', default=5)
+
+# Opt-in stack sampling of production requests (see main.profiling). Staff can
+# profile any request with an X-Profile header; PROFILING_ROUTES samples a
+# fraction of a route, e.g. PROFILING_ROUTES=main:home=0.01,*=0.001.
+# Profiles go to PROFILING_DIR on local disk, or the default storage if unset.
+PROFILING_ENABLED = env.bool('PROFILING_ENABLED', default=False)
+PROFILING_ROUTES = {route: float(rate) for route, rate in env.dict('PROFILING_ROUTES', default={}).items()}
+PROFILING_INTERVAL_MS = env.float('PROFILING_INTERVAL_MS', default=5)
+PROFILING_DIR = env('PROFILING_DIR', default='')
+
+# Compile every project template when a worker boots (grtts_project.wsgi). Off on
+# Vercel, where each cold start would pay for templates the instance may never render
+TEMPLATE_PRELOAD = env.bool('TEMPLATE_PRELOAD', default=not env.bool('DEBUG', default=False) and not os.environ.get('VERCEL'))
+
+# Seconds a rendered {% fragment %} is kept; content changes replace it sooner
+FRAGMENT_CACHE_TIMEOUT = env.int('FRAGMENT_CACHE_TIMEOUT', default=86400)
+
+# Two-tier cache (main.cache_backends.TieredCache): a small per-process LRU in
+# front of the cache shared by every worker. CACHE_URL picks the shared tier,
+# e.g. redis://host:6379/0 in production or dbcache://cache_table (run
+# createcachetable first); the default file cache in the temp directory is
+# shared by the workers on one host. Only content-versioned keys, which never
+# change in place, are kept in the per-process tier.
+CACHES = {
+    'default': {
+        'BACKEND': 'main.cache_backends.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_KEY_PREFIXES': ['fragments:', 'sitemaps:'],
+            'LOCAL_MAX_ENTRIES': env.int('CACHE_LOCAL_MAX_ENTRIES', default=500),
+            'LOCAL_TIMEOUT': env.int('CACHE_LOCAL_TIMEOUT', default=60),  # seconds
+            'NEGATIVE_TIMEOUT': env.int('CACHE_NEGATIVE_TIMEOUT', default=30),  # seconds
+        },
+    },
+    'shared': env.cache_url('CACHE_URL', default='filecache://' + os.path.join(tempfile.gettempdir(), 'grtts-cache')),
+}
+
+# Tests get a shared cache tier of their own in a temporary directory
+TEST_RUNNER = 'grtts_project.test_runner.TestRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'main.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'main.queries': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
@@ -0,0 +1,32 @@
+import copy
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the suite against a shared cache tier of its own, so the cache.clear()
+    calls in tests never empty the one CACHE_URL points at. Verification
+    events are only flushed by the tests themselves: a background flush
+    would write from another thread in the middle of some later test.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='grtts-test-cache-')
+        test_caches = copy.deepcopy(settings.CACHES)
+        test_caches['shared'] = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.cache_dir,
+        }
+        self.settings_override = override_settings(CACHES=test_caches, VERIFICATION_LOG_FLUSH_INTERVAL=3600)
+        self.settings_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -12,5 +12,12 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'grtts_project.settings')
 
 application = get_wsgi_application()
 
+from django.conf import settings  # noqa: E402
+
+if settings.TEMPLATE_PRELOAD:
+    # Parse templates now rather than on each worker's first requests
+    from main.templating import preload_templates
+    preload_templates()
+
 # Vercel looks for 'app' - so we create an alias
 app = application
@@ -10,6 +10,9 @@ from .models import (
     UserDocument,
     JobPost, JobApplication  # Added these
 )
+from .inbox import mark_read
+from .paginators import EstimatedCountPaginator
+
 class LocationImageInline(admin.TabularInline):
     model = LocationImage
     extra = 3
@@ -114,7 +117,7 @@ class ContactMessageAdmin(admin.ModelAdmin):
     actions = ['mark_as_read']
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        mark_read(queryset)
     mark_as_read.short_description = "Mark selected messages as read"
     
     fieldsets = (
@@ -249,12 +252,16 @@ class PaymentAdmin(admin.ModelAdmin):
 
 @admin.register(PaymentWebhook)
 class PaymentWebhookAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ['provider', 'event_type', 'processed', 'created_at']
     list_filter = ['provider', 'processed', 'created_at']
     readonly_fields = ['payload', 'created_at']
 
 @admin.register(NewsletterSubscriber)
 class NewsletterSubscriberAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ['email', 'first_name', 'last_name', 'is_active', 'subscribed_at']
     list_filter = ['is_active', 'subscribed_at']
     search_fields = ['email', 'first_name', 'last_name']
@@ -286,7 +293,7 @@ class StudentInquiryAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        mark_read(queryset)
     mark_as_read.short_description = "Mark selected as read"
     
     fieldsets = (
@@ -306,10 +313,11 @@ class LandownerInquiryAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'service', 'property_size', 'created_at', 'is_read']
     list_filter = ['service', 'is_read', 'created_at']
     search_fields = ['name', 'email', 'organization']
+    actions = ['mark_as_read']
     readonly_fields = ['created_at']
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        mark_read(queryset)
     mark_as_read.short_description = "Mark selected as read"
     
     fieldsets = (
@@ -336,10 +344,11 @@ class EnthusiastInquiryAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'interest', 'created_at', 'is_read']
     list_filter = ['interest', 'is_read', 'created_at']
     search_fields = ['name', 'email']
+    actions = ['mark_as_read']
     readonly_fields = ['created_at']
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        mark_read(queryset)
     mark_as_read.short_description = "Mark selected as read"
     
     fieldsets = (
@@ -359,10 +368,11 @@ class OtherInquiryAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'category', 'subject', 'created_at', 'is_read']
     list_filter = ['category', 'urgency', 'is_read', 'created_at']
     search_fields = ['name', 'email', 'subject']
+    actions = ['mark_as_read']
     readonly_fields = ['created_at']
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        mark_read(queryset)
     mark_as_read.short_description = "Mark selected as read"
     
     fieldsets = (
@@ -399,6 +409,8 @@ class NewsletterCampaignAdmin(admin.ModelAdmin):
 
 @admin.register(NewsletterTracking)
 class NewsletterTrackingAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ['campaign', 'subscriber', 'opened_at', 'clicked_at']
     list_filter = ['campaign', 'opened_at']
     search_fields = ['subscriber__email']
@@ -533,10 +545,12 @@ class CertificateAdmin(admin.ModelAdmin):
 
 @admin.register(CertificateVerificationLog)
 class CertificateVerificationLogAdmin(admin.ModelAdmin):
-    list_display = ['certificate', 'ip_address', 'successful', 'verified_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_display = ['certificate_number', 'ip_address', 'successful', 'verified_at']
     list_filter = ['successful', 'verified_at']
-    search_fields = ['certificate__certificate_number', 'ip_address']
-    readonly_fields = ['certificate', 'ip_address', 'user_agent', 'verified_at', 'successful']
+    search_fields = ['certificate_number', 'ip_address']
+    readonly_fields = ['certificate', 'certificate_number', 'ip_address', 'user_agent', 'verified_at', 'successful']
 
 @admin.register(UserDocument)
 class UserDocumentAdmin(admin.ModelAdmin):
@@ -0,0 +1,117 @@
+"""
+Typeahead suggestions for course titles, job titles, locations, blog tags
+and blog categories.
+
+Every word-start of every name is stored as a key in one sorted list, so a
+prefix lookup is a bisect plus a short forward scan and "ranger" finds
+"Basic Ranger Course". The list is process-local and rebuilt from the
+database when the source models' main.content_versions token moves.
+"""
+import bisect
+import re
+import threading
+
+from django.urls import reverse
+
+from blog.models import Category, Tag
+from . import content_versions
+from .models import Course, DeploymentLocation, JobPost
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall((text or '').lower()))
+
+
+# kind -> (label, rows of (url key, name), url builder)
+SOURCES = {
+    'course': (
+        'Course',
+        lambda: Course.objects.filter(is_active=True).values_list('pk', 'title'),
+        lambda pk, name: reverse('main:course_detail', args=[pk]),
+    ),
+    'job': (
+        'Job',
+        lambda: JobPost.objects.filter(is_active=True).values_list('pk', 'title'),
+        lambda pk, name: reverse('main:job_apply', args=[pk]),
+    ),
+    'location': (
+        'Location',
+        lambda: DeploymentLocation.objects.values_list('pk', 'name'),
+        lambda pk, name: reverse('main:location_detail', args=[pk]),
+    ),
+    'tag': (
+        'Tag',
+        lambda: Tag.objects.values_list('slug', 'name'),
+        lambda slug, name: reverse('blog:tag_list', args=[slug]),
+    ),
+    'category': (
+        'Category',
+        lambda: Category.objects.values_list('slug', 'name'),
+        lambda slug, name: reverse('blog:category_list', args=[slug]),
+    ),
+}
+SOURCE_MODELS = [Course, JobPost, DeploymentLocation, Tag, Category]
+
+
+class PrefixIndex:
+    """Sorted ``(key, entry)`` pairs searched with bisect"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        keys = []
+        for position, entry in enumerate(entries):
+            words = normalize(entry['name']).split()
+            for start in range(len(words)):
+                # Word position breaks ties so matches on the first word come first
+                keys.append((' '.join(words[start:]), start, position))
+        keys.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.refs = [(start, position) for _, start, position in keys]
+
+    def lookup(self, prefix, limit=8):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        matches = {}
+        i = bisect.bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            start, position = self.refs[i]
+            if position not in matches or start < matches[position]:
+                matches[position] = start
+            i += 1
+        ranked = sorted(matches, key=lambda p: (matches[p], len(self.entries[p]['name']), self.entries[p]['name']))
+        return [self.entries[position] for position in ranked[:limit]]
+
+
+def build_index():
+    entries = []
+    for kind, (label, rows, url) in SOURCES.items():
+        for key, name in rows():
+            entries.append({'name': name, 'kind': kind, 'label': label, 'url': url(key, name)})
+    return PrefixIndex(entries)
+
+
+class Suggestions:
+    """Process-local PrefixIndex, rebuilt when the source models' content version changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+
+    def get(self):
+        version = content_versions.token(*SOURCE_MODELS)
+        with self._lock:
+            if self._index is None or self._version != version:
+                self._index = build_index()
+                self._version = version
+            return self._index, version
+
+    def lookup(self, prefix, limit=8):
+        index, _ = self.get()
+        return index.lookup(prefix, limit)
+
+
+suggestions = Suggestions()
@@ -0,0 +1,279 @@
+"""
+Cache backends that report hits and misses to main.timing and main.metrics.
+
+TieredCache is the project's default cache: a small in-process LRU (the
+local tier) in front of the cache every worker shares (the shared tier,
+another CACHES alias: Redis in production, a file or database cache
+locally). Only keys under LOCAL_KEY_PREFIXES are kept locally. Those must
+be keys whose value never changes in place, such as fragment and sitemap
+entries keyed on a main.content_versions token, because nothing tells
+other processes when a key is overwritten or deleted. Everything else is
+read straight from the shared tier.
+
+get_or_set() recomputes a missing value once: other threads wait for it,
+and other processes wait on a lock key in the shared tier. A None result
+is cached for NEGATIVE_TIMEOUT, so a lookup that finds nothing isn't
+repeated on every request.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import pickle
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.utils.functional import cached_property
+
+from . import metrics, timing
+
+_missing = object()
+# Local-tier marker for a key the shared tier doesn't have
+_absent = object()
+
+
+class InstrumentedCacheMixin:
+    """Counts get() results; the stock get_many() and get_or_set() go through get()"""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        if value is _missing:
+            timing.record_cache(0, 1)
+            metrics.cache_requests.inc('miss')
+            return default
+        timing.record_cache(1, 0)
+        metrics.cache_requests.inc('hit')
+        return value
+
+
+class LocMemCache(InstrumentedCacheMixin, BaseLocMemCache):
+    pass
+
+
+class TieredCache(BaseCache):
+    """
+    OPTIONS:
+        SHARED              alias of the shared tier in CACHES
+        LOCAL_KEY_PREFIXES  keys kept in the local tier (see the module docstring)
+        LOCAL_MAX_ENTRIES   size of the local tier, least recently used dropped first
+        LOCAL_TIMEOUT       seconds a key is kept locally, at most
+        NEGATIVE_TIMEOUT    seconds get_or_set() keeps a None result
+        FILL_TIMEOUT        seconds a recomputation may hold its lock
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_prefixes = tuple(options.get('LOCAL_KEY_PREFIXES', ()))
+        self.local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', 500))
+        self.local_timeout = float(options.get('LOCAL_TIMEOUT', 60))
+        self.negative_timeout = options.get('NEGATIVE_TIMEOUT', 30)
+        self.fill_timeout = float(options.get('FILL_TIMEOUT', 10))
+        self._local = OrderedDict()  # local key -> (expires at, pickled value or _absent)
+        self._lock = threading.Lock()
+        self._fills = {}  # local key -> [lock, threads using it]
+
+    @cached_property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    # -- local tier ----------------------------------------------------------
+
+    def _local_key(self, key, version):
+        """The local tier's key, or None if ``key`` is only kept in the shared tier"""
+        if not key.startswith(self.local_prefixes):
+            return None
+        return self.make_and_validate_key(key, version)
+
+    def _local_get(self, local_key):
+        with self._lock:
+            entry = self._local.get(local_key)
+            if entry is None:
+                return _missing
+            expires, pickled = entry
+            if expires <= time.monotonic():
+                del self._local[local_key]
+                return _missing
+            self._local.move_to_end(local_key)
+        return pickled if pickled is _absent else pickle.loads(pickled)
+
+    def _local_set(self, local_key, value, timeout=None):
+        ttl = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        if ttl <= 0:
+            self._local_delete(local_key)
+            return
+        pickled = value if value is _absent else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[local_key] = (time.monotonic() + ttl, pickled)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, local_key):
+        with self._lock:
+            self._local.pop(local_key, None)
+
+    # -- cache API -----------------------------------------------------------
+
+    def _timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _record(self, hits, misses):
+        timing.record_cache(hits, misses)
+        if hits:
+            metrics.cache_requests.inc('hit', amount=hits)
+        if misses:
+            metrics.cache_requests.inc('miss', amount=misses)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        found, remote = {}, {}
+        for key in keys:
+            local_key = self._local_key(key, version)
+            value = _missing if local_key is None else self._local_get(local_key)
+            if value is _missing:
+                remote[key] = local_key
+                if local_key is not None:
+                    metrics.cache_tier_requests.inc('local', 'miss')
+            elif value is _absent:
+                metrics.cache_tier_requests.inc('local', 'negative')
+            else:
+                metrics.cache_tier_requests.inc('local', 'hit')
+                found[key] = value
+        if remote:
+            fetched = self.shared.get_many(list(remote), version=version)
+            for key, local_key in remote.items():
+                if key in fetched:
+                    metrics.cache_tier_requests.inc('shared', 'hit')
+                    found[key] = fetched[key]
+                else:
+                    metrics.cache_tier_requests.inc('shared', 'miss')
+                if local_key is not None:
+                    self._local_set(local_key, fetched.get(key, _absent))
+        self._record(len(found), len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        self.shared.set(key, value, timeout, version=version)
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self._local_set(local_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        added = self.shared.add(key, value, timeout, version=version)
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            if added:
+                self._local_set(local_key, value, timeout)
+            else:
+                self._local_delete(local_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, self._timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self._local_delete(local_key)
+        return self.shared.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Redis keeps the key's timeout; the file and database caches re-set
+        # it with their default timeout, so callers that need one touch() after
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self._local_delete(local_key)
+        return self.shared.incr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _missing, version) is not _missing
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    # -- single-flight recomputation -----------------------------------------
+
+    @contextmanager
+    def _single_flight(self, key):
+        """Let one thread at a time in this process through for ``key``"""
+        with self._lock:
+            fill = self._fills.setdefault(key, [threading.Lock(), 0])
+            fill[1] += 1
+        try:
+            with fill[0]:
+                yield
+        finally:
+            with self._lock:
+                fill[1] -= 1
+                if not fill[1]:
+                    del self._fills[key]
+
+    def _shared_get(self, key, version):
+        """Read past the local tier, which may still remember the key as missing"""
+        value = self.shared.get(key, _missing, version=version)
+        local_key = self._local_key(key, version)
+        if local_key is not None and value is not _missing:
+            self._local_set(local_key, value)
+        return value
+
+    def _fill(self, key, compute, timeout, version):
+        value = compute()
+        if value is None:
+            timeout = self.negative_timeout
+            metrics.cache_fills.inc('negative')
+        else:
+            metrics.cache_fills.inc('computed')
+        self.set(key, value, timeout, version)
+        return value
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, _missing, version)
+        if value is not _missing:
+            return value
+        if not callable(default):
+            return super().get_or_set(key, default, timeout, version)
+
+        with self._single_flight(self.make_and_validate_key(key, version)):
+            # Another thread or process may have filled it while this one waited
+            value = self._shared_get(key, version)
+            if value is not _missing:
+                metrics.cache_fills.inc('waited')
+                return value
+
+            lock_key = f'{key}:filling'
+            if self.shared.add(lock_key, 1, self.fill_timeout, version=version):
+                try:
+                    return self._fill(key, default, timeout, version)
+                finally:
+                    self.shared.delete(lock_key, version=version)
+
+            # Another process is recomputing; wait for its value, or for its lock to go
+            deadline = time.monotonic() + self.fill_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = self._shared_get(key, version)
+                if value is not _missing:
+                    metrics.cache_fills.inc('waited')
+                    return value
+                if not self.shared.has_key(lock_key, version=version):
+                    break
+            return self._fill(key, default, timeout, version)
+
+    def stats(self):
+        """This process's lookups per tier and recomputations: {'local_hit': 3, 'computed': 1, ...}"""
+        found = {}
+        for (name, labels, _), value in metrics.local_values().items():
+            if name == metrics.cache_tier_requests.name:
+                found['_'.join(labels)] = int(value)
+            elif name == metrics.cache_fills.name:
+                found[labels[0]] = int(value)
+        return found
@@ -0,0 +1,104 @@
+"""
+Certificate PDF rendering.
+
+Everything that is the same on every certificate (border, logo, headings)
+is drawn once per worker process into a base layout. Each certificate is a
+copy of that image with the recipient details and a QR code holding the
+signed verification link drawn on top, saved as a single-page PDF. The
+functions here only take plain dicts so they can run in worker processes
+without touching the database.
+"""
+import io
+import os
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+PAGE_SIZE = (1754, 1240)  # A4 landscape at 150 dpi
+RESOLUTION = 150.0
+BRAND_GREEN = (45, 90, 59)
+DARK_GREEN = (30, 60, 44)
+GREY = (90, 90, 90)
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), 'static', 'images', 'logo.png')
+
+_layout = None
+_fonts = {}
+
+
+def _font(size):
+    if size not in _fonts:
+        try:
+            _fonts[size] = ImageFont.truetype('DejaVuSans.ttf', size)
+        except OSError:
+            _fonts[size] = ImageFont.load_default(size=size)
+    return _fonts[size]
+
+
+def _centered(draw, y, text, size, fill):
+    font = _font(size)
+    width = draw.textlength(text, font=font)
+    draw.text(((PAGE_SIZE[0] - width) / 2, y), text, font=font, fill=fill)
+
+
+def build_layout():
+    """Draw the parts of the certificate that never change"""
+    image = Image.new('RGB', PAGE_SIZE, 'white')
+    draw = ImageDraw.Draw(image)
+    width, height = PAGE_SIZE
+
+    draw.rectangle([30, 30, width - 30, height - 30], outline=BRAND_GREEN, width=12)
+    draw.rectangle([60, 60, width - 60, height - 60], outline=DARK_GREEN, width=3)
+
+    if os.path.exists(LOGO_PATH):
+        logo = Image.open(LOGO_PATH).convert('RGBA')
+        logo.thumbnail((180, 180))
+        image.paste(logo, ((width - logo.width) // 2, 100), logo)
+
+    _centered(draw, 300, 'CERTIFICATE OF COMPLETION', 72, BRAND_GREEN)
+    _centered(draw, 420, 'This is to certify that', 36, GREY)
+    _centered(draw, 640, 'has successfully completed', 36, GREY)
+
+    draw.text((140, 1000), 'Completion date', font=_font(26), fill=GREY)
+    draw.text((140, 1090), 'Certificate number', font=_font(26), fill=GREY)
+    draw.text((width - 400, 1120), 'Scan to verify', font=_font(24), fill=GREY)
+    return image
+
+
+def init_worker():
+    """Process pool initializer: compile the shared layout once per worker"""
+    global _layout
+    _layout = build_layout()
+
+
+def render_certificate(data):
+    """
+    Render one certificate. ``data`` holds id, certificate_number, full_name,
+    course_name, completion_date, duration and verify_url. Returns
+    ``(id, pdf_bytes)``.
+    """
+    global _layout
+    if _layout is None:
+        _layout = build_layout()
+
+    image = _layout.copy()
+    draw = ImageDraw.Draw(image)
+
+    _centered(draw, 500, data['full_name'], 84, DARK_GREEN)
+    _centered(draw, 720, data['course_name'], 56, BRAND_GREEN)
+    if data.get('duration'):
+        _centered(draw, 810, data['duration'], 32, GREY)
+
+    draw.text((460, 995), data['completion_date'], font=_font(32), fill=DARK_GREEN)
+    draw.text((460, 1085), data['certificate_number'], font=_font(32), fill=DARK_GREEN)
+
+    qr = qrcode.QRCode(box_size=6, border=2, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(data['verify_url'])
+    qr.make(fit=True)
+    qr_image = qr.make_image(fill_color='black', back_color='white').get_image().convert('RGB')
+    qr_image.thumbnail((300, 300))
+    image.paste(qr_image, (PAGE_SIZE[0] - 140 - qr_image.width, 1100 - qr_image.height))
+
+    buffer = io.BytesIO()
+    image.save(buffer, 'PDF', resolution=RESOLUTION)
+    return data['id'], buffer.getvalue()
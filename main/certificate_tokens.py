@@ -0,0 +1,91 @@
+"""
+Offline-verifiable certificate tokens.
+
+A token is ``<payload>.<signature>``, both base64url without padding. The
+payload is the certificate number, recipient name, course name and
+completion date joined with a unit separator; the signature is a truncated
+HMAC-SHA256 over it keyed from CERTIFICATE_SIGNING_KEY (SECRET_KEY by
+default). Checking a token's signature needs no database access; whether
+the certificate still exists, is valid and still has the details the token
+carries comes from the cached status map in main.verification, which keeps
+a fingerprint of those details per certificate.
+"""
+import base64
+import hashlib
+import hmac
+from datetime import date
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+SEPARATOR = '\x1f'
+SIGNATURE_BYTES = 16
+SALT = 'main.certificate_tokens'
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(payload):
+    key = getattr(settings, 'CERTIFICATE_SIGNING_KEY', None) or settings.SECRET_KEY
+    return salted_hmac(SALT, payload, secret=key, algorithm='sha256').digest()[:SIGNATURE_BYTES]
+
+
+def _payload(certificate_number, full_name, course_name, completion_date):
+    if isinstance(completion_date, date):
+        completion_date = completion_date.isoformat()
+    return SEPARATOR.join([certificate_number, full_name, course_name, completion_date]).encode('utf-8')
+
+
+def make_token(certificate):
+    """Return the signed token for a Certificate"""
+    payload = _payload(
+        certificate.certificate_number, certificate.full_name, certificate.course_name, certificate.completion_date,
+    )
+    return f"{_b64encode(payload)}.{_b64encode(_signature(payload))}"
+
+
+def fingerprint(certificate_number, full_name, course_name, completion_date):
+    """Short digest of the details a token carries; it changes when any of them is corrected"""
+    return hashlib.blake2b(
+        _payload(certificate_number, full_name, course_name, completion_date), digest_size=8,
+    ).digest()
+
+
+def read_token(token):
+    """
+    Check a token's signature and return its fields as a dict with
+    certificate_number, full_name, course_name and completion_date.
+    Raises InvalidToken if the token is malformed or was not signed by us.
+    """
+    try:
+        encoded_payload, encoded_signature = token.split('.')
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except (ValueError, TypeError):
+        raise InvalidToken("Malformed certificate token")
+
+    if not hmac.compare_digest(signature, _signature(payload)):
+        raise InvalidToken("Certificate token signature does not match")
+
+    try:
+        number, full_name, course_name, completion_date = payload.decode('utf-8').split(SEPARATOR)
+        completion_date = date.fromisoformat(completion_date)
+    except ValueError:
+        raise InvalidToken("Certificate token payload is malformed")
+
+    return {
+        'certificate_number': number,
+        'full_name': full_name,
+        'course_name': course_name,
+        'completion_date': completion_date,
+    }
@@ -0,0 +1,63 @@
+"""
+Content versions: a counter per public content model, in the shared cache.
+
+main.signals moves a model's counter on every save, delete and
+many-to-many change, so "has anything changed?" is one get_many() instead
+of a MAX(updated_at) scan. Caches key their entries on token(...) of the
+models they're built from (page and fragment caches, ETags, process-local
+indexes) and never need deleting: a change moves the token and the stale
+entries are simply not asked for again.
+
+Counters start from the current time in microseconds, so one that was
+evicted restarts above any value it had before.
+"""
+import time
+
+from django.core.cache import cache
+
+from blog.models import Category, Comment, Post, Tag
+from .models import FAQ, Course, DeploymentLocation, JobPost, LocationImage, Testimonial
+
+KEY = 'content_version:{}'
+
+TRACKED = [Course, FAQ, Testimonial, DeploymentLocation, LocationImage, JobPost, Post, Category, Tag, Comment]
+
+
+def _key(model):
+    if model not in TRACKED:
+        raise ValueError(f"{model._meta.label} isn't tracked; add it to main.content_versions.TRACKED")
+    return KEY.format(model._meta.label_lower)
+
+
+def _start():
+    return time.time_ns() // 1000
+
+
+def versions(models=None):
+    """``{model: version}`` for ``models`` (default: every tracked model), in one cache lookup"""
+    keys = {model: _key(model) for model in (TRACKED if models is None else models)}
+    found = cache.get_many(list(keys.values()))
+    for key in keys.values():
+        if key not in found:
+            cache.add(key, _start(), None)
+            found[key] = cache.get(key)
+    return {model: found[key] for model, key in keys.items()}
+
+
+def token(*models):
+    """A string that changes whenever any of ``models`` changes"""
+    return '.'.join(str(version) for version in versions(models).values())
+
+
+def bump(*models):
+    """Record that rows of ``models`` changed"""
+    for model in models:
+        key = _key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _start(), None)
+        else:
+            # The file and database caches increment by re-setting the key with
+            # the default timeout; counters must not expire
+            cache.touch(key, None)
@@ -0,0 +1,35 @@
+"""
+Email backend that counts delivered and failed messages for main.metrics.
+"""
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from . import metrics
+
+
+class MetricsEmailBackend(BaseEmailBackend):
+    """Delivers through EMAIL_DELIVERY_BACKEND and counts the outcome"""
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(settings.EMAIL_DELIVERY_BACKEND, fail_silently=fail_silently, **kwargs)
+
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        return self.backend.close()
+
+    def send_messages(self, email_messages):
+        source = metrics.current_email_source()
+        try:
+            sent = self.backend.send_messages(email_messages) or 0
+        except Exception:
+            metrics.email_failures.inc(source, amount=len(email_messages))
+            raise
+        metrics.emails_sent.inc(source, amount=sent)
+        if sent < len(email_messages):
+            # fail_silently backends report failures by sending fewer
+            metrics.email_failures.inc(source, amount=len(email_messages) - sent)
+        return sent
@@ -0,0 +1,29 @@
+"""
+Versioned fragment cache for template parts shared across pages.
+
+{% fragment 'name' [vary_on ...] %}...{% endfragment %} (from the
+``fragments`` tag library) caches its rendered HTML under a key built from
+the fragment's template source, the main.content_versions token of the
+models listed for it in FRAGMENTS, and any vary_on values. A fragment
+renders once per content change and every other request is one cache read.
+
+A cached fragment is shared by every visitor: nothing per user or per
+request ({% csrf_token %}, request.user, messages) may go inside one.
+"""
+import hashlib
+
+from . import content_versions
+from .models import FAQ
+
+# Fragment name -> the models whose rows it displays
+FRAGMENTS = {
+    'navigation': [],
+    'footer': [],
+    'footer_close': [],
+    'faq_sidebar': [FAQ],
+}
+
+
+def cache_key(name, source, vary_on=()):
+    parts = [source, content_versions.token(*FRAGMENTS[name]), *(str(value) for value in vary_on)]
+    return f'fragments:{name}:' + hashlib.md5(':'.join(parts).encode()).hexdigest()
@@ -0,0 +1,122 @@
+"""
+Unified staff inbox over the four inquiry models and ContactMessage.
+
+Each source row is mirrored into InboxItem (see main.signals), so the
+triage view reads one table through composite indexes and pages with a
+(created_at, id) keyset cursor instead of OFFSET. Unread counts per kind
+come from a single GROUP BY that is cached until an item changes.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+
+from .models import (
+    ContactMessage, EnthusiastInquiry, InboxItem, LandownerInquiry, OtherInquiry, StudentInquiry,
+)
+
+UNREAD_COUNTS_KEY = 'inbox:unread_counts'
+PAGE_SIZE = 50
+
+SOURCES = {
+    'student': (StudentInquiry, lambda obj: f"{obj.get_course_display()} inquiry"),
+    'landowner': (LandownerInquiry, lambda obj: obj.get_service_display()),
+    'enthusiast': (EnthusiastInquiry, lambda obj: f"Interested in: {obj.get_interest_display()}"),
+    'other': (OtherInquiry, lambda obj: obj.subject),
+    'contact': (ContactMessage, lambda obj: obj.subject),
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _) in SOURCES.items()}
+
+
+def sync_item(instance):
+    """Create or refresh the InboxItem mirroring a source row"""
+    kind = KIND_BY_MODEL[type(instance)]
+    subject = SOURCES[kind][1](instance) or ''
+    InboxItem.objects.update_or_create(
+        kind=kind,
+        object_id=instance.pk,
+        defaults={
+            'name': instance.name,
+            'email': instance.email,
+            'subject': subject[:200],
+            'is_read': instance.is_read,
+            'created_at': instance.created_at,
+        },
+    )
+    cache.delete(UNREAD_COUNTS_KEY)
+
+
+def remove_item(instance):
+    InboxItem.objects.filter(kind=KIND_BY_MODEL[type(instance)], object_id=instance.pk).delete()
+    cache.delete(UNREAD_COUNTS_KEY)
+
+
+def mark_read(queryset, is_read=True):
+    """
+    Set is_read on a source queryset and its inbox items. Used by admin
+    actions, whose queryset.update() bypasses the post_save sync.
+    """
+    kind = KIND_BY_MODEL[queryset.model]
+    ids = list(queryset.values_list('pk', flat=True))
+    updated = queryset.model.objects.filter(pk__in=ids).update(is_read=is_read)
+    InboxItem.objects.filter(kind=kind, object_id__in=ids).update(is_read=is_read)
+    cache.delete(UNREAD_COUNTS_KEY)
+    return updated
+
+
+def mark_items_read(item_ids, is_read=True):
+    """Set is_read on inbox items and on the source rows they mirror"""
+    items = InboxItem.objects.filter(pk__in=item_ids).values_list('kind', 'object_id')
+    by_kind = {}
+    for kind, object_id in items:
+        by_kind.setdefault(kind, []).append(object_id)
+    for kind, object_ids in by_kind.items():
+        SOURCES[kind][0].objects.filter(pk__in=object_ids).update(is_read=is_read)
+    InboxItem.objects.filter(pk__in=item_ids).update(is_read=is_read)
+    cache.delete(UNREAD_COUNTS_KEY)
+
+
+def unread_counts():
+    """Return ``{kind: unread count}`` for every kind, plus 'total'"""
+    counts = cache.get(UNREAD_COUNTS_KEY)
+    if counts is None:
+        rows = InboxItem.objects.filter(is_read=False).values('kind').annotate(n=Count('id')).order_by()
+        counts = {kind: 0 for kind in SOURCES}
+        counts.update({row['kind']: row['n'] for row in rows})
+        counts['total'] = sum(counts.values())
+        cache.set(UNREAD_COUNTS_KEY, counts, None)
+    return counts
+
+
+def encode_cursor(item):
+    return f"{item.created_at.isoformat()}_{item.pk}"
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = cursor.rsplit('_', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (AttributeError, ValueError):
+        return None
+    return (created_at, pk) if created_at else None
+
+
+def page(cursor=None, kind=None, unread_only=False, limit=PAGE_SIZE):
+    """
+    Return ``(items, next_cursor)`` for the page after ``cursor``, newest
+    first. ``next_cursor`` is None on the last page.
+    """
+    items = InboxItem.objects.all()
+    if kind:
+        items = items.filter(kind=kind)
+    if unread_only:
+        items = items.filter(is_read=False)
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        items = items.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    items = list(items.order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return items[:limit], next_cursor
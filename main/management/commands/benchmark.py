@@ -0,0 +1,101 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from benchmarks import runner
+from benchmarks.routes import KNOWN_FAILURES, SKIPPED
+from main import verification
+from main.seeding import seed
+
+BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the benchmark suite (startup, URL resolution, per-view latency and query counts) "
+        "against a freshly seeded test database and compare with the stored baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help="Write the results as the new baseline")
+        parser.add_argument('--repeat', type=int, default=20, help="Warm requests per view")
+        parser.add_argument('--scale', type=int, default=1, help="Multiply the seeded row counts")
+        parser.add_argument('--threshold', type=float, default=25.0, help="Allowed slowdown in percent")
+        parser.add_argument('--startup-threshold', type=float, default=50.0, help="Allowed startup slowdown in percent")
+        parser.add_argument('--min-ms', type=float, default=1.0, help="Ignore view slowdowns smaller than this")
+        parser.add_argument('--skip-startup', action='store_true', help="Don't spawn interpreters to time startup")
+
+    def handle(self, *args, **options):
+        results = {'vendor': connection.vendor, 'scale': options['scale']}
+        if not options['skip_startup']:
+            results['startup'] = runner.measure_startup()
+            self.stdout.write(f"Startup: boot {results['startup']['boot_ms']:.0f}ms")
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            # Nothing under benchmark should reach a real mailbox, and development
+            # query inspection would be measured along with the views
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                                   QUERY_INSPECTION=False):
+                # No placeholder uploads: the suite shouldn't write to media storage
+                staff, _ = seed(scale=options['scale'], media=False)
+                results['resolve'] = runner.measure_resolution()
+                results['views'] = runner.measure_views(staff, repeat=options['repeat'])
+                verification.flush()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        self.report(results)
+
+        if options['save_baseline']:
+            broken = sorted(name for name, view in results['views'].items() if view['status'] >= 500)
+            if broken:
+                raise CommandError(
+                    f"Not saving a baseline with server errors on {', '.join(broken)}; fix them or list them "
+                    "in benchmarks.routes.KNOWN_FAILURES"
+                )
+            with open(options['baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+            return
+
+        if not os.path.exists(options['baseline']):
+            raise CommandError(f"No baseline at {options['baseline']}; run with --save-baseline first")
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        if (baseline['vendor'], baseline['scale']) != (results['vendor'], results['scale']):
+            raise CommandError(
+                f"The baseline was recorded on {baseline['vendor']} at scale {baseline['scale']}; "
+                f"this run used {results['vendor']} at scale {results['scale']}"
+            )
+
+        regressions, notes = runner.compare(
+            results, baseline, options['threshold'], options['min_ms'], options['startup_threshold']
+        )
+        for note in notes:
+            self.stdout.write(f"  note: {note}")
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(f"  REGRESSION {regression}")
+            raise CommandError(f"{len(regressions)} benchmark regressions against {options['baseline']}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+    def report(self, results):
+        resolve_us = sum(route['us'] for route in results['resolve'].values())
+        self.stdout.write(f"URL resolution: {resolve_us / len(results['resolve']):.1f}us per route on average")
+        self.stdout.write(f"{'route':<34} {'status':>6} {'best ms':>8} {'median':>8} {'queries':>8} {'cold':>5}")
+        for name, view in sorted(results['views'].items(), key=lambda item: -item[1]['ms']):
+            self.stdout.write(
+                f"{name:<34} {view['status']:>6} {view['ms']:>8.2f} {view['median_ms']:>8.2f} "
+                f"{view['queries']:>8} {view['cold_queries']:>5}"
+            )
+        for name, reason in SKIPPED.items():
+            self.stdout.write(f"{name:<34} skipped: {reason}")
+        for name, reason in KNOWN_FAILURES.items():
+            self.stdout.write(f"{name:<34} known failure, skipped: {reason}")
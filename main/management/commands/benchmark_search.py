@@ -0,0 +1,86 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.search import SOURCES, SearchIndex, build_index
+
+VOCABULARY = """
+    ranger tracking tracker trail spoor rhino elephant lion leopard buffalo poaching anti patrol patrols
+    conservation wildlife habitat reserve park hwange victoria falls zambezi matabeleland bush field
+    training course courses specialist advanced basic certificate certification instructor trainee
+    firearms navigation gps gis mapping survival first aid radio communication camp deployment location
+    landowner community research ecology biodiversity ecosystem species monitoring data report drone
+    job career application volunteer internship salary experience requirements responsibilities team
+    fitness endurance discipline leadership law enforcement security threat response incident scene
+""".split()
+
+
+def filler_words(rng, count=3000):
+    """Pronounceable made-up words standing in for the long tail of real text"""
+    syllables = ['ka', 'ri', 'mo', 'ta', 'ne', 'shi', 'zu', 'la', 'po', 'ga', 'be', 'du', 'ndo', 'mbi', 'we', 'yo']
+    return list({''.join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(count)})
+
+
+class Command(BaseCommand):
+    help = "Measure site search latency against the live index or a synthetic corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', type=int, default=0, help="Index N generated documents instead of the database")
+        parser.add_argument('--queries', type=int, default=2000)
+        parser.add_argument('--budget-ms', type=float, default=5.0, help="Fail if p99 latency exceeds this")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        started = time.perf_counter()
+        index = self.synthetic_index(options['synthetic'], rng) if options['synthetic'] else build_index()
+        build_time = time.perf_counter() - started
+        if not len(index):
+            raise CommandError("The index is empty; seed the database or pass --synthetic N")
+
+        started = time.perf_counter()
+        snapshot = index.dumps()
+        dump_time = time.perf_counter() - started
+        started = time.perf_counter()
+        index = SearchIndex.loads(snapshot)
+        load_time = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{len(index)} documents, {len(index.postings)} terms; built in {build_time * 1000:.0f}ms, "
+            f"snapshot {len(snapshot) / 1024:.0f} KiB (dump {dump_time * 1000:.0f}ms, load {load_time * 1000:.0f}ms)"
+        )
+
+        queries = [
+            ' '.join(rng.choices(VOCABULARY, k=rng.choice([1, 1, 2, 2, 3])))
+            for _ in range(options['queries'])
+        ]
+
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, limit=20)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        quantiles = statistics.quantiles(timings, n=100)
+        p50, p95, p99 = quantiles[49], quantiles[94], quantiles[98]
+        self.stdout.write(
+            f"{len(timings)} queries: p50 {p50:.3f}ms  p95 {p95:.3f}ms  p99 {p99:.3f}ms  max {timings[-1]:.3f}ms"
+        )
+        if p99 > options['budget_ms']:
+            raise CommandError(f"p99 search latency {p99:.2f}ms is over the {options['budget_ms']}ms budget")
+        self.stdout.write(self.style.SUCCESS(f"p99 within the {options['budget_ms']}ms budget"))
+
+    def synthetic_index(self, count, rng):
+        index = SearchIndex()
+        kinds = list(SOURCES)
+        words = VOCABULARY + filler_words(rng)
+        weights = [1 / (rank + 1) for rank in range(len(words))]  # Zipf-like word frequencies
+        for pk in range(1, count + 1):
+            title = ' '.join(rng.choices(words, weights, k=rng.randint(3, 8))).title()
+            body = ' '.join(rng.choices(words, weights, k=rng.randint(80, 600)))
+            index.add((rng.choice(kinds), pk), title, body, url=f'/synthetic/{pk}/', summary=body[:200])
+        return index
@@ -0,0 +1,153 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: import the WSGI entry point, then push one
+# request through the callable the way the platform would.
+CHILD = """
+import io, json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'grtts_project.settings')
+from grtts_project.wsgi import application
+booted = time.perf_counter()
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+    'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': True,
+    'wsgi.run_once': False,
+}
+status = []
+body = b''.join(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+responded = time.perf_counter()
+print('COLDSTART ' + json.dumps({
+    'boot_ms': (booted - started) * 1000,
+    'first_request_ms': (responded - booted) * 1000,
+    'status': status[0],
+    'modules': sorted(sys.modules),
+}))
+"""
+
+# Boots nothing of the project, only the framework it sits on. Project times
+# are compared with the baseline relative to this, which cancels out machine speed.
+CALIBRATION = """
+import json, time
+started = time.perf_counter()
+import django.core.handlers.wsgi, django.db.models, django.template.defaulttags
+print('COLDSTART ' + json.dumps({'calibration_ms': (time.perf_counter() - started) * 1000}))
+"""
+
+# Modules that are only needed by a few code paths and should never load at boot
+DEFERRED_MODULES = ['boto3', 'botocore', 'stripe', 'PIL', 'qrcode', 'pymysql']
+
+
+def parse_importtime(stderr):
+    """Sum ``-X importtime`` self times (microseconds) per top-level package"""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return packages
+
+
+def run_once(path):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD, path],
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+    )
+    measurement = _measurement(result)
+    measurement['imports'] = parse_importtime(result.stderr)
+    return measurement
+
+
+def calibrate():
+    result = subprocess.run([sys.executable, '-c', CALIBRATION], cwd=settings.BASE_DIR, capture_output=True, text=True)
+    return _measurement(result)['calibration_ms']
+
+
+def _measurement(result):
+    lines = [line for line in result.stdout.splitlines() if line.startswith('COLDSTART ')]
+    if result.returncode or not lines:
+        raise CommandError(f"Cold start run failed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1][len('COLDSTART '):])
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile cold start: boot the WSGI app in fresh interpreters under -X importtime, "
+        "time the first request, and compare against a saved baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help="Path of the first request")
+        parser.add_argument('--runs', type=int, default=5, help="Fresh processes to measure (median is reported)")
+        parser.add_argument('--top', type=int, default=15, help="Slowest packages to list")
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'coldstart-baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--max-regression', type=float, default=20.0, help="Allowed slowdown in percent")
+
+    def handle(self, *args, **options):
+        runs, calibrations = [], []
+        for _ in range(options['runs']):
+            runs.append(run_once(options['path']))
+            calibrations.append(calibrate())
+        result = {
+            'path': options['path'],
+            'status': runs[-1]['status'],
+            'calibration_ms': statistics.median(calibrations),
+            'boot_ms': statistics.median(run['boot_ms'] for run in runs),
+            'first_request_ms': statistics.median(run['first_request_ms'] for run in runs),
+        }
+        result['total_ms'] = result['boot_ms'] + result['first_request_ms']
+
+        self.stdout.write(
+            f"{options['runs']} cold starts of {result['path']} ({result['status']}): "
+            f"boot {result['boot_ms']:.0f}ms, first request {result['first_request_ms']:.0f}ms, "
+            f"total {result['total_ms']:.0f}ms (medians)"
+        )
+        packages = {
+            package: statistics.median(run['imports'].get(package, 0) for run in runs)
+            for package in runs[-1]['imports']
+        }
+        self.stdout.write("Import time by package (median self time; the WSGI module includes django.setup()):")
+        for package in sorted(packages, key=packages.get, reverse=True)[:options['top']]:
+            self.stdout.write(f"  {packages[package] / 1000:8.1f}ms  {package}")
+
+        loaded = set(runs[-1]['modules'])
+        eager = [name for name in DEFERRED_MODULES if name in loaded]
+        if eager and settings.DATABASES['default']['ENGINE'].endswith('mysql'):
+            eager = [name for name in eager if name != 'pymysql']
+        if eager:
+            self.stdout.write(self.style.WARNING(f"Loaded before the first response: {', '.join(eager)}"))
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as f:
+                json.dump(result, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+            return
+
+        if not os.path.exists(options['baseline']):
+            return
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        limit = 1 + options['max_regression'] / 100
+        # What the baseline's times would be on this machine
+        speed = result['calibration_ms'] / baseline['calibration_ms']
+        regressions = [
+            f"{key} {result[key]:.0f}ms vs {baseline[key] * speed:.0f}ms"
+            for key in ('boot_ms', 'first_request_ms', 'total_ms')
+            if result[key] > baseline[key] * speed * limit
+        ]
+        if regressions:
+            raise CommandError(f"Cold start regressed more than {options['max_regression']}%: {'; '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Within {options['max_regression']}% of baseline "
+            f"(total {baseline['total_ms'] * speed:.0f}ms, scaled by machine speed {speed:.2f})"
+        ))
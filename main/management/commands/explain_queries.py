@@ -0,0 +1,115 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.models import Comment, Post
+from main.models import (
+    FAQ, CertificateVerificationLog, ContactMessage, Course, CourseApplication, CourseRegistration, Donation,
+    EnthusiastInquiry, InboxItem, JobApplication, JobPost, LandownerInquiry, NewsletterSubscriber, OtherInquiry,
+    Payment, PaymentWebhook, StudentInquiry, Testimonial, User,
+)
+
+
+def known_querysets():
+    """
+    The filter/order shapes the public views and the admin changelists run.
+    Parameter values are placeholders; only the plan shape matters.
+    """
+    return [
+        ('blog: published posts', Post.objects.filter(status='published').order_by('-published_date')[:6]),
+        ('blog: category posts', Post.objects.filter(category_id=1, status='published').order_by('-published_date')[:6]),
+        ('blog: approved comments', Comment.objects.filter(post_id=1, approved=True).order_by('-created_at')),
+        ('blog: moderation queue', Comment.objects.filter(approved=False).order_by('-created_at')[:100]),
+        ('home: featured courses', Course.objects.filter(is_active=True)[:3]),
+        ('courses: by type', Course.objects.filter(is_active=True, course_type='BASIC')),
+        ('home: testimonials', Testimonial.objects.filter(is_active=True).order_by('-created_at')[:3]),
+        ('faq: active', FAQ.objects.filter(is_active=True)),
+        ('careers: active jobs', JobPost.objects.filter(is_active=True)),
+        ('register: email lookup', User.objects.filter(email='applicant@example.com')),
+        ('inbox: unread', InboxItem.objects.filter(is_read=False).order_by('-created_at', '-id')[:51]),
+        ('admin: unread student inquiries', StudentInquiry.objects.filter(is_read=False)[:100]),
+        ('admin: unread landowner inquiries', LandownerInquiry.objects.filter(is_read=False)[:100]),
+        ('admin: unread enthusiast inquiries', EnthusiastInquiry.objects.filter(is_read=False)[:100]),
+        ('admin: unread general inquiries', OtherInquiry.objects.filter(is_read=False)[:100]),
+        ('admin: unread contact messages', ContactMessage.objects.filter(is_read=False)[:100]),
+        ('admin: pending donations', Donation.objects.filter(status='pending')[:100]),
+        ('admin: pending payments', Payment.objects.filter(status='pending')[:100]),
+        ('admin: registrations by status', CourseRegistration.objects.filter(status='pending')[:100]),
+        ('admin: unpaid registrations', CourseRegistration.objects.filter(payment_status='pending')[:100]),
+        ('admin: applications by status', CourseApplication.objects.filter(status='submitted')[:100]),
+        ('admin: unpaid applications', CourseApplication.objects.filter(payment_status='pending')[:100]),
+        ('certificates: course graduates', CourseApplication.objects.filter(course_id=1, status='completed')),
+        ('admin: job applications', JobApplication.objects.filter(job_id=1, status='pending')),
+        ('webhooks: unprocessed', PaymentWebhook.objects.filter(processed=False).order_by('created_at')[:100]),
+        ('admin: active subscribers', NewsletterSubscriber.objects.filter(is_active=True)[:100]),
+        ('admin: failed verifications', CertificateVerificationLog.objects.filter(successful=False)[:100]),
+    ]
+
+
+def full_scans(vendor, plan):
+    """Return the plan lines that read a whole table"""
+    if vendor == 'sqlite':
+        return [
+            line.strip() for line in plan.splitlines()
+            if 'SCAN ' in line and 'USING' not in line
+        ]
+    if vendor == 'postgresql':
+        return [line.strip() for line in plan.splitlines() if 'Seq Scan' in line]
+    if vendor == 'mysql':
+        return [
+            f"table {table}: full scan" for table in
+            _mysql_scanned_tables(json.loads(plan))
+        ]
+    return []
+
+
+def _mysql_scanned_tables(node):
+    if isinstance(node, dict):
+        if node.get('access_type') == 'ALL':
+            yield node.get('table_name', '?')
+        for value in node.values():
+            yield from _mysql_scanned_tables(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _mysql_scanned_tables(value)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the project's known querysets and flag full table scans. "
+        "Run it against a database with realistic row counts and fresh statistics; "
+        "PostgreSQL and MySQL will rightly prefer a scan on near-empty tables. "
+        "SQLite cannot use an index for Django's bare boolean filters, so plans "
+        "for is_active/approved lookups are only meaningful on MySQL or PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan, not just flagged ones")
+        parser.add_argument('--strict', action='store_true', help="Exit with an error if any query scans a table")
+
+    def handle(self, *args, **options):
+        database = options['database']
+        vendor = connections[database].vendor
+        explain_options = {'format': 'json'} if vendor == 'mysql' else {}
+
+        flagged = 0
+        for label, queryset in known_querysets():
+            plan = queryset.using(database).explain(**explain_options)
+            scans = full_scans(vendor, plan)
+            if scans:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"FULL SCAN  {label}"))
+                for line in scans:
+                    self.stdout.write(f"    {line}")
+            else:
+                self.stdout.write(f"ok         {label}")
+            if options['verbose_plans']:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    | {line}")
+
+        if flagged and options['strict']:
+            raise CommandError(f"{flagged} known queries scan a full table")
+        summary = f"{flagged} of {len(known_querysets())} known queries scan a full table"
+        self.stdout.write(self.style.WARNING(summary) if flagged else self.style.SUCCESS(summary))
@@ -0,0 +1,175 @@
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from main.certificate_tokens import make_token
+from main.models import Certificate, Course, CourseApplication, CourseRegistration, User
+from main.sequences import yearly_numbers
+from main.verification import invalidate_certificate_snapshots
+
+
+class Command(BaseCommand):
+    help = "Issue certificates for a course cohort and render their PDFs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', required=True, help="Course id or exact title")
+        parser.add_argument('--completion-date', help="YYYY-MM-DD (defaults to today)")
+        parser.add_argument('--grade', default='', help="Grade recorded on every certificate")
+        parser.add_argument('--issued-by', help="Username recorded as the issuer")
+        parser.add_argument('--workers', type=int, default=None, help="PDF render processes (default: CPU count)")
+        parser.add_argument('--upload-threads', type=int, default=8, help="Concurrent storage uploads")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per bulk_create/bulk_update")
+        parser.add_argument('--no-pdf', action='store_true', help="Create certificates without rendering PDFs")
+        parser.add_argument('--dry-run', action='store_true', help="Only report who would be issued a certificate")
+
+    def handle(self, *args, **options):
+        course = self.get_course(options['course'])
+        completion_date = timezone.now().date()
+        if options['completion_date']:
+            completion_date = parse_date(options['completion_date'])
+            if completion_date is None:
+                raise CommandError("--completion-date must be YYYY-MM-DD")
+
+        issued_by = None
+        if options['issued_by']:
+            issued_by = User.objects.filter(username=options['issued_by']).first()
+            if issued_by is None:
+                raise CommandError(f"No user named {options['issued_by']}")
+
+        recipients = self.get_recipients(course)
+        self.stdout.write(f"{len(recipients)} graduates of '{course.title}' without a certificate")
+        if not recipients or options['dry_run']:
+            return
+
+        started = time.perf_counter()
+        certificates = self.create_certificates(
+            course, recipients, completion_date, options['grade'], issued_by, options['batch_size']
+        )
+        created_at = time.perf_counter()
+        self.stdout.write(
+            f"Created {len(certificates)} certificates in {created_at - started:.2f}s"
+        )
+
+        if not options['no_pdf']:
+            self.render_and_upload(certificates, options)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Issued {len(certificates)} certificates in {elapsed:.2f}s "
+            f"({len(certificates) / elapsed:.1f} certificates/s)"
+        ))
+
+    def get_course(self, value):
+        courses = Course.objects.all()
+        course = courses.filter(pk=value).first() if value.isdigit() else None
+        course = course or courses.filter(title=value).first()
+        if course is None:
+            raise CommandError(f"No course matching '{value}'")
+        return course
+
+    def get_recipients(self, course):
+        """Completed applications and attended registrations that have no certificate yet"""
+        recipients = []
+        applications = CourseApplication.objects.filter(
+            course=course, status='completed', certificate__isnull=True
+        ).select_related('applicant__user')
+        for application in applications:
+            recipients.append({
+                'application': application,
+                'full_name': application.applicant.user.get_full_name(),
+            })
+
+        registrations = CourseRegistration.objects.filter(
+            course=course, status='attended', certificate__isnull=True
+        )
+        for registration in registrations:
+            recipients.append({
+                'registration': registration,
+                'full_name': registration.full_name,
+            })
+        return recipients
+
+    def create_certificates(self, course, recipients, completion_date, grade, issued_by, batch_size):
+        with transaction.atomic():
+            numbers = yearly_numbers(
+                'GRTTS', Certificate.objects.all(), 'certificate_number',
+                timezone.now().year, count=len(recipients)
+            )
+            certificates = [
+                Certificate(
+                    certificate_number=number,
+                    registration=recipient.get('registration'),
+                    application=recipient.get('application'),
+                    full_name=recipient['full_name'],
+                    course_name=course.title,
+                    completion_date=completion_date,
+                    grade=grade,
+                    duration=course.duration,
+                    verification_token=secrets.token_urlsafe(24),
+                    issued_by=issued_by,
+                )
+                for number, recipient in zip(numbers, recipients)
+            ]
+            Certificate.objects.bulk_create(certificates, batch_size=batch_size)
+
+        # bulk_create skips post_save, so refresh the verification snapshots here
+        invalidate_certificate_snapshots()
+
+        # Not every backend returns primary keys from bulk_create (e.g. MySQL)
+        if any(certificate.pk is None for certificate in certificates):
+            certificates = list(Certificate.objects.filter(certificate_number__in=numbers))
+        return certificates
+
+    def render_and_upload(self, certificates, options):
+        from main.certificate_pdf import init_worker, render_certificate
+
+        jobs = [
+            {
+                'id': certificate.pk,
+                'certificate_number': certificate.certificate_number,
+                'full_name': certificate.full_name,
+                'course_name': certificate.course_name,
+                'duration': certificate.duration,
+                'completion_date': certificate.completion_date.strftime('%d %B %Y'),
+                'verify_url': settings.SITE_URL.rstrip('/') + reverse(
+                    'main:verify_certificate_token', args=[make_token(certificate)]
+                ),
+            }
+            for certificate in certificates
+        ]
+        by_id = {certificate.pk: certificate for certificate in certificates}
+        field = Certificate._meta.get_field('pdf_file')
+
+        def upload(result):
+            certificate_id, pdf = result
+            certificate = by_id[certificate_id]
+            name = field.generate_filename(certificate, f"{certificate.certificate_number}.pdf")
+            certificate.pdf_file.name = field.storage.save(name, ContentFile(pdf))
+            return certificate
+
+        started = time.perf_counter()
+        uploaded = []
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as renderers, \
+                ThreadPoolExecutor(max_workers=options['upload_threads']) as uploaders:
+            chunksize = max(1, len(jobs) // ((options['workers'] or 4) * 8))
+            uploads = [
+                uploaders.submit(upload, result)
+                for result in renderers.map(render_certificate, jobs, chunksize=chunksize)
+            ]
+            for future in uploads:
+                uploaded.append(future.result())
+
+        Certificate.objects.bulk_update(uploaded, ['pdf_file'], batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Rendered and uploaded {len(uploaded)} PDFs in {elapsed:.2f}s "
+            f"({len(uploaded) / elapsed:.1f} PDFs/s)"
+        )
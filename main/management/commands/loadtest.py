@@ -0,0 +1,104 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import loadtest
+
+
+def parse_mix(value):
+    """'home=30,post_detail=20' -> {'home': 30, 'post_detail': 20}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in loadtest.DEFAULT_MIX:
+            raise CommandError(f"Unknown route '{name}' in --mix; choose from {', '.join(loadtest.DEFAULT_MIX)}")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Bad weight for '{name}' in --mix")
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the site with concurrent HTTP clients and report latency percentiles, throughput and "
+        "error rates per route. Form posts (newsletter signups) write to the database."
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--gunicorn', action='store_true', help="Start a local gunicorn on grtts_project.wsgi")
+        target.add_argument('--url', help="Load an already running server instead (http:// only)")
+        parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes")
+        parser.add_argument('--threads', type=int, default=1, help="gunicorn threads per worker")
+        parser.add_argument('--concurrency', type=int, default=20, help="Concurrent clients")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run")
+        parser.add_argument('--mix', type=parse_mix, help="Weighted routes, e.g. home=30,post_detail=20 "
+                                                          "(default: %s)" % ','.join(f'{k}={v}' for k, v in loadtest.DEFAULT_MIX.items()))
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the results as JSON")
+        parser.add_argument('--compare', help="Earlier --output file to compare against")
+
+    def handle(self, *args, **options):
+        if options['url']:
+            if not options['url'].startswith('http://'):
+                raise CommandError("--url must be an http:// URL")
+            target = loadtest.ExternalServer(options['url'])
+        elif options['gunicorn']:
+            target = loadtest.GunicornServer(options['workers'], options['threads'])
+        else:
+            target = loadtest.InProcessServer()
+
+        try:
+            results = loadtest.run(
+                target, mix=options['mix'], concurrency=options['concurrency'], duration=options['duration'],
+                seed=options['seed'],
+            )
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)
+        self.report(results, previous)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['output']}"))
+
+    def report(self, results, previous=None):
+        self.stdout.write(
+            f"{results['target']}: {results['concurrency']} clients for {results['duration_s']:.1f}s"
+        )
+        header = (
+            f"{'route':<24} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} "
+            f"{'429s':>6}"
+        )
+        if previous:
+            header += f" {'p95 change':>11} {'req/s change':>13}"
+        self.stdout.write(header)
+        rows = list(results['routes'].items()) + [('TOTAL', results['total'])]
+        for name, row in rows:
+            line = (
+                f"{name:<24} {row['requests']:>8} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{row['p99_ms']:>8.1f} {row['error_rate']:>6.1%} {row['rate_limited']:>6}"
+            )
+            before = previous['total'] if previous and name == 'TOTAL' else (previous or {}).get('routes', {}).get(name)
+            if before:
+                line += f" {change(row['p95_ms'], before['p95_ms']):>11} {change(row['rps'], before['rps']):>13}"
+            self.stdout.write(line)
+        for name, row in results['routes'].items():
+            if row['errors']:
+                self.stdout.write(self.style.WARNING(f"  {name}: statuses {row['statuses']}"))
+        if results['total']['rate_limited']:
+            self.stdout.write(self.style.WARNING(
+                f"  {results['total']['rate_limited']} requests were rate limited (429); "
+                "they are left out of the latencies and errors"
+            ))
+
+
+def change(now, then):
+    return f"{(now / then - 1) * 100:+.0f}%" if then else 'n/a'
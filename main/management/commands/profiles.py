@@ -0,0 +1,60 @@
+from collections import Counter
+from fnmatch import fnmatch
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import profiling
+
+
+def frame_totals(stacks):
+    """(self samples, inclusive samples) per frame label"""
+    own, inclusive = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+    return own, inclusive
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge the collapsed-stack profiles saved by ProfilingMiddleware and summarize them by view. "
+        "Patterns select views by dotted path, e.g. 'main.views.*' 'blog.views.post_detail'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('patterns', nargs='*', default=['*'], help="View paths to include (shell patterns)")
+        parser.add_argument('--top', type=int, default=15, help="Frames to list per view")
+        parser.add_argument('--output', help="Write the merged stacks of every selected view to this file")
+
+    def handle(self, *args, **options):
+        stored = {
+            view: names for view, names in profiling.stored_profiles().items()
+            if any(fnmatch(view, pattern) for pattern in options['patterns'])
+        }
+        if not stored:
+            raise CommandError("No saved profiles match " + ' '.join(options['patterns']))
+
+        merged = Counter()
+        for view, names in stored.items():
+            stacks = Counter()
+            for name in names:
+                profiling.load(name, stacks)
+            merged.update(stacks)
+            self.report(view, len(names), stacks, options['top'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.writelines(f'{stack} {count}\n' for stack, count in merged.most_common())
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(merged)} merged stacks to {options['output']}"))
+
+    def report(self, view, profiles, stacks, top):
+        total = sum(stacks.values())
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{view}: {profiles} profiles, {total} samples"))
+        if not total:
+            return
+        own, inclusive = frame_totals(stacks)
+        self.stdout.write(f"  {'self':>6} {'total':>6}  frame")
+        for frame, count in own.most_common(top):
+            self.stdout.write(f"  {count / total:>6.1%} {inclusive[frame] / total:>6.1%}  {frame}")
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from main.seeding import BATCH_SIZE, PER_SCALE, SEEDED_MODELS, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with deterministic synthetic data for load testing "
+        f"(about {sum(PER_SCALE.values()):,} rows per unit of --scale)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help="Multiply the row counts (120 is about 1M rows)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data")
+        parser.add_argument('--today', help="YYYY-MM-DD that generated dates count back from (defaults to today)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Rows per bulk_create")
+        parser.add_argument('--no-media', action='store_true', help="Leave file fields empty instead of pointing "
+                                                                     "them at shared placeholder files")
+        parser.add_argument('--force', action='store_true', help="Add to tables that already have rows (such as an "
+                                                                 "existing superuser); fails if any seeded row clashes")
+
+    def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError("--scale must be at least 1")
+        today = None
+        if options['today']:
+            today = parse_date(options['today'])
+            if today is None:
+                raise CommandError("--today must be YYYY-MM-DD")
+        filled = [model._meta.label for model in SEEDED_MODELS if model.objects.exists()]
+        if filled and not options['force']:
+            raise CommandError(
+                f"{', '.join(filled)} already have rows; run `manage.py flush` first, or pass --force to add to them"
+            )
+
+        started = time.perf_counter()
+        _, created = seed(
+            scale=options['scale'], seed=options['seed'], today=today, media=not options['no_media'],
+            batch_size=options['batch_size'], log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        elapsed = time.perf_counter() - started
+        total = sum(created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total:,} rows across {len(created)} tables in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)"
+        ))
@@ -0,0 +1,258 @@
+"""
+Process-local metrics, exposed in the Prometheus text format at /metrics.
+
+Counters and histograms are kept per thread: a thread only ever adds to its
+own dict, so recording takes no lock, and a scrape sums the dicts. Gunicorn
+serves from several worker processes, so with METRICS_DIR set every process
+also writes its totals to a file there (at most every
+METRICS_FLUSH_INTERVAL seconds, and on exit) and a scrape adds up all the
+files; whichever worker answers reports the whole server. Files from
+processes that have exited are kept so counters never go backwards; clear
+the directory when deploying.
+"""
+import atexit
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+REGISTRY = []
+_shards = []
+
+
+class _Shard(threading.local):
+    def __init__(self):
+        self.values = defaultdict(float)
+        _shards.append(self.values)
+
+
+_local = _Shard()
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        REGISTRY.append(self)
+
+    def exposition(self, values):
+        """Text format lines for ``values``: {(label values, slot): value}"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines += self.samples(values)
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        _local.values[(self.name, labels, None)] += amount
+
+    def samples(self, values):
+        for (labels, _), value in sorted(values.items()):
+            yield f'{self.name}{_labels(self.labels, labels)} {_format(value)}'
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        values = _local.values
+        values[(self.name, labels, bisect_left(self.buckets, value))] += 1
+        values[(self.name, labels, 'sum')] += value
+
+    def samples(self, values):
+        for labels in sorted({labels for labels, _ in values}):
+            count = 0
+            for slot, bound in enumerate(self.buckets + (float('inf'),)):
+                count += values.get((labels, slot), 0)
+                le = '+Inf' if slot == len(self.buckets) else _format(bound)
+                yield f'{self.name}_bucket{_labels(self.labels, labels, [("le", le)])} {_format(count)}'
+            yield f'{self.name}_sum{_labels(self.labels, labels)} {_format(values.get((labels, "sum"), 0))}'
+            yield f'{self.name}_count{_labels(self.labels, labels)} {_format(count)}'
+
+
+class Gauge(Metric):
+    """Read when scraped from ``collect()``, which returns {label values: value}"""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, collect, labels=()):
+        super().__init__(name, documentation, labels)
+        self.collect = collect
+
+    def samples(self, values):
+        for labels, value in sorted(self.collect().items()):
+            yield f'{self.name}{_labels(self.labels, labels)} {_format(value)}'
+
+
+# =============================================================================
+# APPLICATION METRICS
+# =============================================================================
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _pending_webhooks():
+    from .models import PaymentWebhook
+    return {(): PaymentWebhook.objects.filter(processed=False).count()}
+
+
+requests_total = Counter('grtts_http_requests_total', 'HTTP responses by view and status.', ['view', 'status'])
+request_duration = Histogram(
+    'grtts_http_request_duration_seconds', 'Time to produce a response, by view.', ['view'], LATENCY_BUCKETS,
+)
+request_queries = Histogram(
+    'grtts_db_queries_per_request', 'Database queries issued per request, by view.', ['view'], QUERY_BUCKETS,
+)
+request_db_time = Histogram(
+    'grtts_db_time_per_request_seconds', 'Time spent in database queries per request, by view.', ['view'],
+    LATENCY_BUCKETS,
+)
+template_duration = Histogram(
+    'grtts_template_render_seconds', 'Time to render a template, including what it extends and includes.',
+    ['template'], LATENCY_BUCKETS,
+)
+cache_requests = Counter('grtts_cache_requests_total', 'Cache lookups by result (hit or miss).', ['result'])
+cache_tier_requests = Counter(
+    'grtts_cache_tier_requests_total', 'Tiered cache lookups by tier (local or shared) and result (hit, miss or negative).',
+    ['tier', 'result'],
+)
+cache_fills = Counter(
+    'grtts_cache_fills_total', 'get_or_set() misses by outcome (computed, negative, or waited for another fill).',
+    ['outcome'],
+)
+emails_sent = Counter('grtts_emails_sent_total', 'Email messages delivered, by source.', ['source'])
+email_failures = Counter('grtts_email_failures_total', 'Email messages that failed to send, by source.', ['source'])
+inquiries_received = Counter('grtts_inquiries_received_total', 'Inquiries and contact messages received, by kind.',
+                             ['kind'])
+pending_webhooks = Gauge('grtts_payment_webhooks_pending', 'Payment webhooks not yet processed.', _pending_webhooks)
+
+_email_source = ContextVar('email_source', default='notification')
+
+
+@contextmanager
+def email_source(source):
+    """Count mail sent inside the block (or decorated function) under ``source``"""
+    token = _email_source.set(source)
+    try:
+        yield
+    finally:
+        _email_source.reset(token)
+
+
+def current_email_source():
+    return _email_source.get()
+
+
+def observe_request(view, status, timing):
+    """Record a finished request from its main.timing.RequestTiming"""
+    requests_total.inc(view, str(status))
+    request_duration.observe(timing.total_ms / 1000, view)
+    request_queries.observe(timing.db_count, view)
+    request_db_time.observe(timing.db_ms / 1000, view)
+
+
+# =============================================================================
+# AGGREGATION
+# =============================================================================
+
+_process = {'pid': None, 'file': None, 'flushed': 0.0}
+
+
+def _process_file():
+    # Named per process start rather than per pid, which the OS reuses
+    if _process['pid'] != os.getpid():
+        _process['pid'] = os.getpid()
+        _process['file'] = f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+    return _process['file']
+
+
+def local_values():
+    """This process's totals: {(metric name, label values, slot): value}"""
+    totals = defaultdict(float)
+    for shard in list(_shards):
+        # dict.copy() is atomic under the GIL, so the owning thread can keep writing
+        for key, value in shard.copy().items():
+            totals[key] += value
+    return totals
+
+
+def flush():
+    """Write this process's totals to METRICS_DIR"""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return
+    _process['flushed'] = time.monotonic()
+    rows = [[name, list(labels), slot, value] for (name, labels, slot), value in local_values().items()]
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(rows, f)
+    os.replace(path, os.path.join(directory, _process_file()))
+
+
+def maybe_flush():
+    if settings.METRICS_DIR and time.monotonic() - _process['flushed'] >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+atexit.register(flush)
+
+
+def collect():
+    """Totals across every process that has written to METRICS_DIR, plus this one"""
+    totals = local_values()
+    directory = settings.METRICS_DIR
+    if directory:
+        own = _process_file()
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            if os.path.basename(path) == own:
+                continue
+            try:
+                with open(path) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, slot, value in rows:
+                totals[(name, tuple(labels), slot)] += value
+    return totals
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    by_metric = defaultdict(dict)
+    for (name, labels, slot), value in collect().items():
+        by_metric[name][(labels, slot)] = value
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.exposition(by_metric.get(metric.name, {}))
+    return '\n'.join(lines) + '\n'
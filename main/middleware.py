@@ -0,0 +1,92 @@
+import logging
+import random
+import sys
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, profiling
+from .timing import timed_request
+
+logger = logging.getLogger('main.timing')
+
+
+class RequestTimingMiddleware:
+    """
+    Time a sample of requests (REQUEST_TIMING_SAMPLE_RATE) plus every staff
+    request. Sampled requests are logged; staff responses carry a
+    Server-Timing header for the browser's network panel instead. With
+    METRICS_ENABLED every request is timed for main.metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        self.metrics = settings.METRICS_ENABLED
+
+    def __call__(self, request):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        # Only a logged-in browser can be staff; checking the cookie keeps
+        # anonymous traffic off the session table
+        maybe_staff = settings.SESSION_COOKIE_NAME in request.COOKIES
+        if not sampled and not maybe_staff and not self.metrics:
+            return self.get_response(request)
+
+        with timed_request() as timing:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view = match.view_name if match else ''
+        if self.metrics:
+            metrics.observe_request(view or 'unmatched', response.status_code, timing)
+            metrics.maybe_flush()
+
+        user = getattr(request, 'user', None)
+        is_staff = bool(user and user.is_staff)
+        if is_staff:
+            response['Server-Timing'] = timing.server_timing()
+        if sampled:
+            fields = {
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                **timing.as_dict(),
+            }
+            logger.info(
+                'request ' + ' '.join(f'{key}={value}' for key, value in fields.items()),
+                extra={'timing': fields},
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Sample the stacks of chosen requests with main.profiling: staff requests
+    sending an ``X-Profile`` header, and a PROFILING_ROUTES fraction of each
+    listed route (``'*'`` covers the rest). Profiles cover the view and
+    anything it renders. Off unless PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.routes = settings.PROFILING_ROUTES
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        rate = self.routes.get(request.resolver_match.view_name, self.routes.get('*', 0))
+        requested = 'X-Profile' in request.headers and getattr(request, 'user', None) and request.user.is_staff
+        if requested or (rate > 0 and random.random() < rate):
+            # Stacks start at the handler frame that calls the view
+            request._profiler = profiling.StackSampler(root=sys._getframe(1)).start()
+            request._profiled_view = profiling.view_path(view_func)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        sampler = getattr(request, '_profiler', None)
+        if sampler is not None:
+            name = profiling.save(request._profiled_view, sampler.stop())
+            if 'X-Profile' in request.headers:
+                response['X-Profile-Saved'] = name
+        return response
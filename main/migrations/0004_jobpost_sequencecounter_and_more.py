@@ -0,0 +1,127 @@
+# Generated by Django 4.2 on 2026-10-19 14:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_courseapplication_application_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('category', models.CharField(choices=[('ranger', 'Field Ranger'), ('gis', 'GIS Specialist'), ('training', 'Training Instructor'), ('admin', 'Administration'), ('research', 'Research'), ('other', 'Other')], default='other', max_length=50)),
+                ('job_type', models.CharField(choices=[('full_time', 'Full Time'), ('part_time', 'Part Time'), ('contract', 'Contract'), ('internship', 'Internship'), ('volunteer', 'Volunteer')], default='full_time', max_length=50)),
+                ('location', models.CharField(max_length=200)),
+                ('description', models.TextField(help_text='Main job description')),
+                ('requirements', models.TextField(help_text='List requirements (one per line)')),
+                ('responsibilities', models.TextField(blank=True, help_text='List responsibilities (one per line)')),
+                ('salary_range', models.CharField(blank=True, help_text='e.g., $500-$1000/month', max_length=100)),
+                ('deadline', models.DateField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('icon', models.CharField(default='fa-briefcase', help_text='FontAwesome icon class (e.g., fa-shield-alt, fa-map)', max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-is_active', 'deadline', 'title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='address',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='city',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='date_of_birth',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='emergency_name',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='emergency_phone',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='emergency_relationship',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='gender',
+            field=models.CharField(blank=True, choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='nationality',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='applicantprofile',
+            name='province',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='certificate_number',
+            field=models.CharField(blank=True, help_text='Leave blank to allocate the next GRTTS-YYYY-NNNN number', max_length=50, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='userdocument',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='documents', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='JobApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=100)),
+                ('last_name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=20)),
+                ('cover_letter', models.TextField()),
+                ('experience_years', models.IntegerField(default=0, help_text='Years of relevant experience')),
+                ('current_employer', models.CharField(blank=True, max_length=200)),
+                ('current_position', models.CharField(blank=True, max_length=200)),
+                ('cv', models.FileField(upload_to='job_applications/cv/')),
+                ('cover_letter_file', models.FileField(blank=True, null=True, upload_to='job_applications/cover_letters/')),
+                ('additional_docs', models.FileField(blank=True, null=True, upload_to='job_applications/additional/')),
+                ('status', models.CharField(choices=[('pending', 'Pending Review'), ('reviewing', 'Under Review'), ('interviewed', 'Interviewed'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('withdrawn', 'Withdrawn')], default='pending', max_length=20)),
+                ('notes', models.TextField(blank=True, help_text='Admin notes about this application')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('user_agent', models.TextField(blank=True)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='main.jobpost')),
+            ],
+            options={
+                'ordering': ['-applied_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-19 14:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_certificate_numbers(apps, schema_editor):
+    CertificateVerificationLog = apps.get_model('main', 'CertificateVerificationLog')
+    Certificate = apps.get_model('main', 'Certificate')
+    CertificateVerificationLog.objects.filter(certificate__isnull=False).update(
+        certificate_number=models.Subquery(
+            Certificate.objects.filter(pk=models.OuterRef('certificate_id')).values('certificate_number')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_jobpost_sequencecounter_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificateverificationlog',
+            name='certificate_number',
+            field=models.CharField(blank=True, help_text='Number submitted for verification', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='certificateverificationlog',
+            name='certificate',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='main.certificate'),
+        ),
+        migrations.RunPython(backfill_certificate_numbers, migrations.RunPython.noop),
+    ]
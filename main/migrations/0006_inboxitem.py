@@ -0,0 +1,75 @@
+# Generated by Django 4.2 on 2026-10-19 14:16
+
+from django.db import migrations, models
+
+
+def backfill_inbox(apps, schema_editor):
+    InboxItem = apps.get_model('main', 'InboxItem')
+
+    def display(model, field, value):
+        return dict(model._meta.get_field(field).flatchoices).get(value, value)
+
+    sources = {
+        'student': ('StudentInquiry', lambda m, o: f"{display(m, 'course', o.course)} inquiry"),
+        'landowner': ('LandownerInquiry', lambda m, o: display(m, 'service', o.service)),
+        'enthusiast': ('EnthusiastInquiry', lambda m, o: f"Interested in: {display(m, 'interest', o.interest)}"),
+        'other': ('OtherInquiry', lambda m, o: o.subject),
+        'contact': ('ContactMessage', lambda m, o: o.subject),
+    }
+    for kind, (model_name, subject) in sources.items():
+        model = apps.get_model('main', model_name)
+        InboxItem.objects.bulk_create([
+            InboxItem(
+                kind=kind,
+                object_id=obj.pk,
+                name=obj.name,
+                email=obj.email,
+                subject=(subject(model, obj) or '')[:200],
+                is_read=obj.is_read,
+                created_at=obj.created_at,
+            )
+            for obj in model.objects.iterator()
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_certificateverificationlog_certificate_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('student', 'Student Inquiry'), ('landowner', 'Landowner Inquiry'), ('enthusiast', 'Enthusiast Inquiry'), ('other', 'General Inquiry'), ('contact', 'Contact Message')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('name', models.CharField(max_length=200)),
+                ('email', models.EmailField(max_length=254)),
+                ('subject', models.CharField(blank=True, max_length=200)),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inboxitem',
+            index=models.Index(fields=['-created_at', '-id'], name='inbox_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inboxitem',
+            index=models.Index(fields=['is_read', '-created_at', '-id'], name='inbox_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inboxitem',
+            index=models.Index(fields=['kind', 'is_read', '-created_at', '-id'], name='inbox_kind_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='inboxitem',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='inbox_item_unique_source'),
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,153 @@
+# Generated by Django 4.2 on 2026-10-19 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_inboxitem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['-issue_date'], name='certificate_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificateverificationlog',
+            index=models.Index(fields=['-verified_at'], name='verification_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificateverificationlog',
+            index=models.Index(fields=['successful', '-verified_at'], name='verification_outcome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['-created_at'], name='contact_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['is_read', '-created_at'], name='contact_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', 'course_type', 'title'], name='course_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(fields=['-application_date'], name='application_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(fields=['status', '-application_date'], name='application_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(fields=['payment_status', '-application_date'], name='application_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseapplication',
+            index=models.Index(fields=['course', 'status'], name='application_course_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseregistration',
+            index=models.Index(fields=['-registered_at'], name='registration_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseregistration',
+            index=models.Index(fields=['status', '-registered_at'], name='registration_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseregistration',
+            index=models.Index(fields=['payment_status', '-registered_at'], name='registration_payment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['-created_at'], name='donation_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['status', '-created_at'], name='donation_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enthusiastinquiry',
+            index=models.Index(fields=['-created_at'], name='enthusiast_inquiry_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enthusiastinquiry',
+            index=models.Index(fields=['is_read', '-created_at'], name='enthusiast_inquiry_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(fields=['is_active', 'order'], name='faq_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['-applied_at'], name='jobapplication_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', 'status'], name='jobapplication_job_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['is_active', 'deadline', 'title'], name='jobpost_active_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='landownerinquiry',
+            index=models.Index(fields=['-created_at'], name='landowner_inquiry_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='landownerinquiry',
+            index=models.Index(fields=['is_read', '-created_at'], name='landowner_inquiry_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=models.Index(fields=['-subscribed_at'], name='subscriber_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=models.Index(fields=['is_active', '-subscribed_at'], name='subscriber_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otherinquiry',
+            index=models.Index(fields=['-created_at'], name='other_inquiry_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otherinquiry',
+            index=models.Index(fields=['is_read', '-created_at'], name='other_inquiry_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-created_at'], name='payment_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', '-created_at'], name='payment_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentwebhook',
+            index=models.Index(fields=['-created_at'], name='webhook_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentwebhook',
+            index=models.Index(fields=['processed', 'created_at'], name='webhook_processed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentinquiry',
+            index=models.Index(fields=['-created_at'], name='student_inquiry_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentinquiry',
+            index=models.Index(fields=['is_read', '-created_at'], name='student_inquiry_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['is_active', '-created_at'], name='testimonial_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['email'], name='user_email_idx'),
+        ),
+    ]
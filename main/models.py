@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import EmailValidator, RegexValidator
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
@@ -31,6 +31,10 @@ class StudentInquiry(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='student_inquiry_recent_idx'),
+            models.Index(fields=['is_read', '-created_at'], name='student_inquiry_unread_idx'),
+        ]
 
 
 class LandownerInquiry(models.Model):
@@ -62,6 +66,10 @@ class LandownerInquiry(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='landowner_inquiry_recent_idx'),
+            models.Index(fields=['is_read', '-created_at'], name='landowner_inquiry_unread_idx'),
+        ]
 
 
 class EnthusiastInquiry(models.Model):
@@ -87,6 +95,10 @@ class EnthusiastInquiry(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='enthusiast_inquiry_recent_idx'),
+            models.Index(fields=['is_read', '-created_at'], name='enthusiast_inquiry_unread_idx'),
+        ]
 
 
 class OtherInquiry(models.Model):
@@ -123,6 +135,46 @@ class OtherInquiry(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='other_inquiry_recent_idx'),
+            models.Index(fields=['is_read', '-created_at'], name='other_inquiry_unread_idx'),
+        ]
+
+
+class InboxItem(models.Model):
+    """
+    Denormalized copy of every inquiry and contact message, kept in sync by
+    main.signals, so staff can triage all of them from one indexed table.
+    """
+    KIND_CHOICES = [
+        ('student', 'Student Inquiry'),
+        ('landowner', 'Landowner Inquiry'),
+        ('enthusiast', 'Enthusiast Inquiry'),
+        ('other', 'General Inquiry'),
+        ('contact', 'Contact Message'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    name = models.CharField(max_length=200)
+    email = models.EmailField()
+    subject = models.CharField(max_length=200, blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.name} - {self.subject}"
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='inbox_item_unique_source'),
+        ]
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='inbox_recent_idx'),
+            models.Index(fields=['is_read', '-created_at', '-id'], name='inbox_unread_idx'),
+            models.Index(fields=['kind', 'is_read', '-created_at', '-id'], name='inbox_kind_idx'),
+        ]
 
 
 class Course(models.Model):
@@ -148,6 +200,9 @@ class Course(models.Model):
     
     class Meta:
         ordering = ['course_type', 'title']
+        indexes = [
+            models.Index(fields=['is_active', 'course_type', 'title'], name='course_active_type_idx'),
+        ]
 
 
 class Testimonial(models.Model):
@@ -160,6 +215,11 @@ class Testimonial(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.position}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', '-created_at'], name='testimonial_active_idx'),
+        ]
 
 
 class ContactMessage(models.Model):
@@ -176,6 +236,10 @@ class ContactMessage(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='contact_recent_idx'),
+            models.Index(fields=['is_read', '-created_at'], name='contact_unread_idx'),
+        ]
 
 
 class DeploymentLocation(models.Model):
@@ -236,6 +300,9 @@ class FAQ(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['is_active', 'order'], name='faq_active_order_idx'),
+        ]
         verbose_name = "FAQ"
         verbose_name_plural = "FAQs"
 
@@ -299,6 +366,10 @@ class Donation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='donation_recent_idx'),
+            models.Index(fields=['status', '-created_at'], name='donation_status_idx'),
+        ]
 
 
 class CourseRegistration(models.Model):
@@ -344,6 +415,11 @@ class CourseRegistration(models.Model):
     
     class Meta:
         ordering = ['-registered_at']
+        indexes = [
+            models.Index(fields=['-registered_at'], name='registration_recent_idx'),
+            models.Index(fields=['status', '-registered_at'], name='registration_status_idx'),
+            models.Index(fields=['payment_status', '-registered_at'], name='registration_payment_idx'),
+        ]
 
 
 class Payment(models.Model):
@@ -390,6 +466,10 @@ class Payment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='payment_recent_idx'),
+            models.Index(fields=['status', '-created_at'], name='payment_status_idx'),
+        ]
 
 
 class PaymentWebhook(models.Model):
@@ -404,6 +484,10 @@ class PaymentWebhook(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='webhook_recent_idx'),
+            models.Index(fields=['processed', 'created_at'], name='webhook_processed_idx'),
+        ]
 
 
 class NewsletterSubscriber(models.Model):
@@ -421,6 +505,10 @@ class NewsletterSubscriber(models.Model):
     
     class Meta:
         ordering = ['-subscribed_at']
+        indexes = [
+            models.Index(fields=['-subscribed_at'], name='subscriber_recent_idx'),
+            models.Index(fields=['is_active', '-subscribed_at'], name='subscriber_active_idx'),
+        ]
 
 
 class NewsletterCampaign(models.Model):
@@ -465,6 +553,11 @@ class User(AbstractUser):
     reset_token = models.CharField(max_length=100, blank=True)
     reset_token_created = models.DateTimeField(blank=True, null=True)
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['email'], name='user_email_idx'),
+        ]
+    
     def __str__(self):
         return self.email
 
@@ -509,6 +602,15 @@ class ApplicantProfile(models.Model):
         return f"{self.user.first_name} {self.user.last_name}"
 
 
+class SequenceCounter(models.Model):
+    """Per-sequence counter row used by main.sequences to hand out numbers"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
 class CourseApplication(models.Model):
     """Comprehensive course application with file uploads and tracking"""
     
@@ -593,30 +695,33 @@ class CourseApplication(models.Model):
     class Meta:
         unique_together = ['applicant', 'course']
         ordering = ['-application_date']
+        indexes = [
+            models.Index(fields=['-application_date'], name='application_recent_idx'),
+            models.Index(fields=['status', '-application_date'], name='application_status_idx'),
+            models.Index(fields=['payment_status', '-application_date'], name='application_payment_idx'),
+            models.Index(fields=['course', 'status'], name='application_course_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.applicant.user.get_full_name()} - {self.course.title}"
     
     def save(self, *args, **kwargs):
-        if not self.application_number:
-            year = timezone.now().year
-            last_app = CourseApplication.objects.filter(
-                application_number__startswith=f"APP-{year}"
-            ).order_by('-application_number').first()
-            
-            if last_app and last_app.application_number:
-                last_num = int(last_app.application_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            self.application_number = f"APP-{year}-{new_num:04d}"
+        if self.application_number:
+            return super().save(*args, **kwargs)
+        
+        from .sequences import yearly_numbers
         
-        super().save(*args, **kwargs)
+        # Allocate inside the insert's transaction so a failed save gives the number back
+        with transaction.atomic():
+            self.application_number = yearly_numbers(
+                'APP', CourseApplication.objects.all(), 'application_number', timezone.now().year
+            )[0]
+            super().save(*args, **kwargs)
 
 
 class Certificate(models.Model):
-    certificate_number = models.CharField(max_length=50, unique=True)
+    certificate_number = models.CharField(max_length=50, unique=True, blank=True,
+                                          help_text="Leave blank to allocate the next GRTTS-YYYY-NNNN number")
     registration = models.OneToOneField(CourseRegistration, on_delete=models.CASCADE, null=True, blank=True)
     application = models.OneToOneField(CourseApplication, on_delete=models.CASCADE, null=True, blank=True)
     full_name = models.CharField(max_length=200)
@@ -636,27 +741,51 @@ class Certificate(models.Model):
     def __str__(self):
         return f"{self.certificate_number} - {self.full_name}"
     
+    def save(self, *args, **kwargs):
+        if self.certificate_number:
+            return super().save(*args, **kwargs)
+        
+        from .sequences import yearly_numbers
+        
+        with transaction.atomic():
+            self.certificate_number = yearly_numbers(
+                'GRTTS', Certificate.objects.all(), 'certificate_number', timezone.now().year
+            )[0]
+            super().save(*args, **kwargs)
+    
+    def get_signed_token(self):
+        from .certificate_tokens import make_token
+        return make_token(self)
+    
     def verify(self):
-        self.view_count += 1
-        self.save()
+        Certificate.objects.filter(pk=self.pk).update(view_count=models.F('view_count') + 1)
+        self.refresh_from_db(fields=['view_count'])
         return self.is_valid
     
     class Meta:
         ordering = ['-issue_date']
+        indexes = [
+            models.Index(fields=['-issue_date'], name='certificate_recent_idx'),
+        ]
 
 
 class CertificateVerificationLog(models.Model):
-    certificate = models.ForeignKey(Certificate, on_delete=models.CASCADE)
+    certificate = models.ForeignKey(Certificate, on_delete=models.CASCADE, null=True, blank=True)
+    certificate_number = models.CharField(max_length=50, blank=True, help_text="Number submitted for verification")
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
     verified_at = models.DateTimeField(auto_now_add=True)
     successful = models.BooleanField(default=True)
     
     def __str__(self):
-        return f"{self.certificate.certificate_number} - {self.verified_at}"
+        return f"{self.certificate_number} - {self.verified_at}"
     
     class Meta:
         ordering = ['-verified_at']
+        indexes = [
+            models.Index(fields=['-verified_at'], name='verification_recent_idx'),
+            models.Index(fields=['successful', '-verified_at'], name='verification_outcome_idx'),
+        ]
 
 
 class UserDocument(models.Model):
@@ -734,6 +863,9 @@ class JobPost(models.Model):
     
     class Meta:
         ordering = ['-is_active', 'deadline', 'title']
+        indexes = [
+            models.Index(fields=['is_active', 'deadline', 'title'], name='jobpost_active_deadline_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.location}"
@@ -794,6 +926,10 @@ class JobApplication(models.Model):
     
     class Meta:
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['-applied_at'], name='jobapplication_recent_idx'),
+            models.Index(fields=['job', 'status'], name='jobapplication_job_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.job.title}"
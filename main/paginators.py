@@ -0,0 +1,104 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_table_rows(model, using='default'):
+    """Return the planner/statistics row estimate for a model's table, or None"""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [table]
+                )
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [table]
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+    except Exception as e:
+        logger.warning(f"Row estimate failed for {table}: {e}")
+        return None
+
+    # reltuples is -1 on tables that have never been vacuumed/analyzed
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def estimate_queryset_rows(queryset):
+    """Return the Postgres planner estimate for a filtered queryset, or None"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    try:
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        logger.warning(f"EXPLAIN estimate failed: {e}")
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large append-only tables.
+
+    Above ESTIMATED_COUNT_THRESHOLD rows the count comes from table statistics
+    (Postgres/MySQL) or a short-lived cached count (SQLite and other backends)
+    instead of a fresh COUNT(*). Small results, including most filtered
+    changelist views, always get an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+
+        threshold = getattr(settings, 'ESTIMATED_COUNT_THRESHOLD', 10000)
+        filtered = bool(queryset.query.where) or queryset.query.distinct
+
+        if filtered:
+            estimate = estimate_queryset_rows(queryset)
+        else:
+            estimate = estimate_table_rows(queryset.model, using=queryset.db)
+
+        if estimate is not None:
+            if estimate >= threshold:
+                return estimate
+            return queryset.count()
+
+        return self._cached_count(queryset, threshold)
+
+    def _cached_count(self, queryset, threshold):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(f"{sql}|{params}".encode()).hexdigest()
+        cache_key = f"paginator:count:{queryset.db}:{digest}"
+
+        count = cache.get(cache_key)
+        if count is None:
+            count = queryset.count()
+            if count >= threshold:
+                cache.set(
+                    cache_key,
+                    count,
+                    getattr(settings, 'ESTIMATED_COUNT_CACHE_TIMEOUT', 300)
+                )
+        return count
@@ -0,0 +1,113 @@
+"""
+Sampling profiler for individual production requests.
+
+A StackSampler thread looks at the request thread's stack every
+PROFILING_INTERVAL_MS through sys._current_frames(), so it works in
+threaded and sync workers alike and costs nothing for requests that
+aren't profiled. ProfilingMiddleware decides which requests to profile
+and saves each profile as a collapsed-stack file ("frame;frame;frame
+count" per line, the input flamegraph.pl and speedscope read) named
+after the view, e.g. profiles/main.views.home/20260101-120000-ab12cd34.folded.
+`manage.py profiles` merges and summarizes them.
+"""
+from collections import Counter
+import sys
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+
+PREFIX = 'profiles'
+SUFFIX = '.folded'
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame, root=None):
+    """'outer;...;inner' for the stack ending at ``frame``, starting at ``root`` if it's on it"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        if frame is root:
+            break
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Counts the collapsed stacks of one thread, sampled from a background thread"""
+
+    def __init__(self, thread_id=None, interval_ms=None, root=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = (interval_ms or settings.PROFILING_INTERVAL_MS) / 1000
+        self.root = root
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame, self.root)] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+def view_path(func):
+    """Dotted path of a view function, e.g. main.views.home"""
+    func = getattr(func, 'view_class', func)
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def storage():
+    """PROFILING_DIR on local disk when set, otherwise the default file storage"""
+    if settings.PROFILING_DIR:
+        return FileSystemStorage(location=settings.PROFILING_DIR)
+    return default_storage
+
+
+def save(view, stacks):
+    """Write ``stacks`` as a collapsed-stack file for ``view``; returns the stored name"""
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    name = f'{PREFIX}/{view}/{stamp}-{uuid.uuid4().hex[:8]}{SUFFIX}'
+    content = ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+    return storage().save(name, ContentFile(content.encode()))
+
+
+def load(name, target=None):
+    """Add the collapsed stacks in stored file ``name`` to ``target`` (a Counter)"""
+    target = Counter() if target is None else target
+    with storage().open(name) as f:
+        for line in f.read().decode().splitlines():
+            stack, _, count = line.rpartition(' ')
+            if stack:
+                target[stack] += int(count)
+    return target
+
+
+def stored_profiles():
+    """{view dotted path: [stored file names]}"""
+    store = storage()
+    try:
+        views, _ = store.listdir(PREFIX)
+    except FileNotFoundError:
+        return {}
+    found = {}
+    for view in sorted(views):
+        _, files = store.listdir(f'{PREFIX}/{view}')
+        found[view] = [f'{PREFIX}/{view}/{name}' for name in sorted(files) if name.endswith(SUFFIX)]
+    return found
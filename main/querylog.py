@@ -0,0 +1,152 @@
+"""
+Slow-query log and N+1 detector for development and staging.
+
+QueryInspectionMiddleware (on when QUERY_INSPECTION is set, which defaults
+to DEBUG) watches every query a request makes. Queries are grouped by
+fingerprint, the SQL with its literals replaced by ``?``. When a SELECT
+fingerprint repeats QUERY_REPEAT_THRESHOLD times in one request, that is
+logged as an N+1 pattern; any query slower than SLOW_QUERY_MS is logged
+too. Both carry the project frames of the stack that issued the query,
+including the template and line when it came from a template.
+
+Tests can use QueryPatternAssertions.assertNoRepeatedQueries() to fail
+on the same patterns.
+"""
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+import logging
+import os
+import re
+import sys
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('main.queries')
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'%s|\?')
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+# Instrumentation every request passes through, left out of stacks
+PLUMBING = {'main/querylog.py', 'main/timing.py', 'main/templating.py', 'main/middleware.py'}
+
+
+def fingerprint(sql):
+    """SQL with literals and parameter placeholders normalized to ``?``"""
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _LISTS.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def caller_stack(limit=8):
+    """
+    Project frames that led to the current query, innermost last, as
+    strings. Template nodes being rendered show up as their template and
+    line.
+    """
+    base_dir = str(settings.BASE_DIR)
+    lines = []
+    frame = sys._getframe(1)
+    while frame is not None and len(lines) < limit:
+        code = frame.f_code
+        if code.co_name == 'render_annotated' and 'self' in frame.f_locals:
+            node = frame.f_locals['self']
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                line = f'template {origin.template_name or origin.name}, line {token.lineno}: {token.contents[:80]}'
+                if not lines or lines[-1] != line:
+                    lines.append(line)
+        elif code.co_filename.startswith(base_dir) and 'site-packages' not in code.co_filename:
+            path = os.path.relpath(code.co_filename, base_dir)
+            if path not in PLUMBING:
+                lines.append(f'{path}:{frame.f_lineno} in {code.co_name}')
+        frame = frame.f_back
+    return lines[::-1]
+
+
+class QueryInspector:
+    """Collects the queries made while active; see inspect_queries()"""
+
+    def __init__(self, slow_ms=None):
+        self.slow_ms = settings.SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self.counts = Counter()
+        self.stacks = {}
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            key = fingerprint(sql)
+            self.counts[key] += 1
+            if key not in self.stacks:
+                self.stacks[key] = caller_stack()
+            if elapsed_ms >= self.slow_ms:
+                self.slow.append((elapsed_ms, sql, caller_stack()))
+
+    def repeated(self, threshold):
+        """[(fingerprint, count, stack)] for SELECTs run at least ``threshold`` times"""
+        return [
+            (key, count, self.stacks[key])
+            for key, count in self.counts.most_common()
+            if count >= threshold and key.upper().startswith('SELECT')
+        ]
+
+
+def describe(stack):
+    return '\n'.join(f'    {line}' for line in stack) or '    (no project frames)'
+
+
+@contextmanager
+def inspect_queries(slow_ms=None, using=None):
+    """Watch queries on ``using`` (default: every connection); yields the QueryInspector"""
+    inspector = QueryInspector(slow_ms)
+    targets = [connections[using]] if using else connections.all()
+    with ExitStack() as stack:
+        for connection in targets:
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+
+
+class QueryInspectionMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.QUERY_REPEAT_THRESHOLD
+
+    def __call__(self, request):
+        with inspect_queries() as inspector:
+            response = self.get_response(request)
+
+        where = f'{request.method} {request.path}'
+        for elapsed_ms, sql, stack in inspector.slow:
+            logger.warning('Slow query (%.1fms) during %s: %s\n%s', elapsed_ms, where, sql, describe(stack))
+        for key, count, stack in inspector.repeated(self.threshold):
+            logger.warning('Possible N+1 during %s: %d queries like %s\n%s', where, count, key, describe(stack))
+        return response
+
+
+class QueryPatternAssertions:
+    """TestCase mixin for failing tests on N+1 query patterns"""
+
+    @contextmanager
+    def assertNoRepeatedQueries(self, threshold=None, using='default'):
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        with inspect_queries(slow_ms=float('inf'), using=using) as inspector:
+            yield inspector
+        repeated = inspector.repeated(threshold)
+        if repeated:
+            self.fail('\n'.join(
+                f'{count} queries like {key}\n{describe(stack)}' for key, count, stack in repeated
+            ))
@@ -0,0 +1,105 @@
+"""
+Applicant registration write path.
+
+Uploaded documents are written to storage concurrently on a thread pool
+before the database transaction opens, so the transaction only covers the
+three INSERTs (user, profile, one bulk insert for the documents). If the
+transaction fails the uploaded files are deleted again, so a failed
+registration leaves neither orphan rows nor orphan files.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import transaction
+
+from .models import ApplicantProfile, User, UserDocument
+
+logger = logging.getLogger(__name__)
+
+# (form field, UserDocument.document_type, description)
+DOCUMENT_FIELDS = [
+    ('profile_photo', 'photo', 'Profile photo'),
+    ('id_document', 'id', 'ID document'),
+    ('cv', 'cv', 'CV/Resume'),
+    ('certificates', 'certificate', 'Certificate'),
+]
+
+PROFILE_FIELDS = [
+    'date_of_birth', 'gender', 'nationality', 'address', 'city', 'province',
+    'emergency_name', 'emergency_phone', 'emergency_relationship',
+    'medical_conditions', 'dietary_requirements',
+]
+
+
+def upload_documents(files):
+    """
+    Save ``{document_type: uploaded_file}`` to UserDocument storage in
+    parallel and return ``{document_type: stored_name}``.
+    """
+    field = UserDocument._meta.get_field('file')
+
+    def save(item):
+        document_type, upload = item
+        name = field.generate_filename(None, upload.name)
+        return document_type, field.storage.save(name, upload, max_length=field.max_length)
+
+    if not files:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(files)) as pool:
+        return dict(pool.map(save, files.items()))
+
+
+def delete_documents(names):
+    field = UserDocument._meta.get_field('file')
+    for name in names:
+        try:
+            field.storage.delete(name)
+        except Exception as e:
+            logger.error(f"Could not remove orphaned upload {name}: {e}")
+
+
+def register_applicant(data):
+    """
+    Create the User, ApplicantProfile and UserDocuments for a validated
+    ApplicantRegistrationForm's cleaned_data. Returns the new user.
+    """
+    email = User.objects.normalize_email(data['email'])
+    files = {
+        document_type: data[field_name]
+        for field_name, document_type, _ in DOCUMENT_FIELDS
+        if data.get(field_name)
+    }
+    stored = upload_documents(files)
+
+    try:
+        with transaction.atomic():
+            user = User(
+                username=User.normalize_username(email.split('@')[0]),
+                email=email,
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                phone=data['phone'],
+                user_type='applicant',
+            )
+            user.set_unusable_password()
+            user.save()
+
+            profile = {name: data.get(name) or '' for name in PROFILE_FIELDS}
+            profile['date_of_birth'] = data.get('date_of_birth')
+            ApplicantProfile.objects.create(user=user, **profile)
+
+            UserDocument.objects.bulk_create([
+                UserDocument(
+                    user=user,
+                    document_type=document_type,
+                    file=stored[document_type],
+                    description=f"{description} uploaded during registration for {email}",
+                )
+                for _, document_type, description in DOCUMENT_FIELDS
+                if document_type in stored
+            ])
+    except Exception:
+        delete_documents(stored.values())
+        raise
+
+    return user
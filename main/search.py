@@ -0,0 +1,318 @@
+"""
+Site-wide search over courses, blog posts, FAQs, jobs and locations.
+
+Documents are tokenized (lowercase, stopwords dropped, light suffix
+stemming) into an in-process inverted index and ranked with BM25, titles
+counting TITLE_WEIGHT times. Each process loads the index from a
+zlib-compressed snapshot in the shared cache, keyed on the source models'
+main.content_versions, and only rebuilds from the database when no
+snapshot exists for the current versions (one process builds it, the rest
+wait for it).
+
+Once a save or delete of a source model commits (see main.signals), the
+process that made it patches its index in place and publishes the result
+as the snapshot for the new versions. If other changes landed at the same
+time, so the patched index might be missing them, it drops its index and
+loads the snapshot for the current versions instead. Snapshots are never
+overwritten, so concurrent writers can't lose each other's changes.
+"""
+import heapq
+import math
+from operator import itemgetter
+import pickle
+import re
+import threading
+import zlib
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from blog.models import Post
+from . import content_versions
+from .models import FAQ, Course, DeploymentLocation, JobPost
+
+SNAPSHOT_KEY = 'search:snapshot:{}'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+TITLE_WEIGHT = 3
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have how i in into is it its of on or our so that the their them
+    then there these they this to was we were what when where which who will with you your
+""".split())
+
+
+# =============================================================================
+# TEXT PROCESSING
+# =============================================================================
+
+def stem(word):
+    """Strip common English inflections so 'tracking', 'trackers' and 'tracked' meet"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith(('ies', 'ied')) and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('es') and word[-3] in 'sxz' or word.endswith(('ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    for suffix in ('ations', 'ation', 'ments', 'ment', 'ness', 'ings', 'ing', 'edly', 'ers', 'er', 'ed', 'ly'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+    if word.endswith('e') and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [stem(token) for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+class SearchIndex:
+    """Inverted index with BM25 scoring. Documents are keyed by ``(kind, pk)``."""
+
+    def __init__(self):
+        self.postings = {}   # term -> {doc key: term frequency}
+        self.terms = {}      # doc key -> its distinct terms, for removal
+        self.lengths = {}    # doc key -> token count
+        self.documents = {}  # doc key -> display fields
+        self.total_length = 0
+        self._impacts = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, key, title, body, **fields):
+        self.remove(key)
+        terms = {}
+        for token in tokenize(title):
+            terms[token] = terms.get(token, 0) + TITLE_WEIGHT
+        for token in tokenize(body):
+            terms[token] = terms.get(token, 0) + 1
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[key] = frequency
+        length = sum(terms.values())
+        self.terms[key] = tuple(terms)
+        self.lengths[key] = length
+        self.total_length += length
+        self.documents[key] = {'title': title, **fields}
+        self._impacts.clear()
+
+    def remove(self, key):
+        if key not in self.documents:
+            return
+        for term in self.terms.pop(key):
+            postings = self.postings[term]
+            del postings[key]
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(key)
+        del self.documents[key]
+        self._impacts.clear()
+
+    def _term_impacts(self, term):
+        """
+        ``{doc key: BM25 contribution}`` for one term. Computed on first use
+        and kept until the index next changes, so repeated query terms cost
+        one dict merge instead of a BM25 evaluation per posting.
+        """
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            postings = self.postings[term]
+            average = self.total_length / len(self.lengths)
+            idf = math.log(1 + (len(self.documents) - len(postings) + 0.5) / (len(postings) + 0.5))
+            lengths = self.lengths
+            impacts = {
+                key: idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * lengths[key] / average))
+                for key, frequency in postings.items()
+            }
+            self._impacts[term] = impacts
+        return impacts
+
+    def search(self, query, limit=20, kind=None):
+        """Return ``[(score, key), ...]`` best first"""
+        matched = sorted(
+            (self._term_impacts(term) for term in set(tokenize(query)) if term in self.postings),
+            key=len, reverse=True,
+        )
+        if not matched:
+            return []
+        scores = dict(matched[0])
+        get = scores.get
+        for impacts in matched[1:]:
+            for key, impact in impacts.items():
+                scores[key] = get(key, 0.0) + impact
+        items = scores.items()
+        if kind:
+            items = [(key, score) for key, score in items if key[0] == kind]
+        return [(score, key) for key, score in heapq.nlargest(limit, items, key=itemgetter(1))]
+
+    def dumps(self):
+        return zlib.compress(pickle.dumps(
+            (self.postings, self.terms, self.lengths, self.documents, self.total_length), pickle.HIGHEST_PROTOCOL
+        ))
+
+    @classmethod
+    def loads(cls, data):
+        index = cls()
+        (index.postings, index.terms, index.lengths, index.documents,
+         index.total_length) = pickle.loads(zlib.decompress(data))
+        return index
+
+
+# =============================================================================
+# SOURCES
+# =============================================================================
+
+def _plain(html, words=40):
+    return Truncator(strip_tags(html or '')).words(words)
+
+
+def _course(course):
+    return {
+        'title': course.title,
+        'body': f"{course.get_course_type_display()} {course.duration} {strip_tags(course.description)}",
+        'url': reverse('main:course_detail', args=[course.pk]),
+        'summary': _plain(course.description),
+    }
+
+
+def _post(post):
+    return {
+        'title': post.title,
+        'body': f"{strip_tags(post.excerpt)} {strip_tags(post.content)}",
+        'url': post.get_absolute_url(),
+        'summary': _plain(post.excerpt or post.content),
+    }
+
+
+def _faq(faq):
+    return {
+        'title': faq.question,
+        'body': strip_tags(faq.answer),
+        'url': f"{reverse('main:faq')}#faq-{faq.pk}",
+        'summary': _plain(faq.answer),
+    }
+
+
+def _job(job):
+    return {
+        'title': job.title,
+        'body': (
+            f"{job.get_category_display()} {job.get_job_type_display()} {job.location} "
+            f"{job.description} {job.requirements} {job.responsibilities}"
+        ),
+        'url': reverse('main:job_apply', args=[job.pk]),
+        'summary': _plain(job.description),
+    }
+
+
+def _location(location):
+    return {
+        'title': location.name,
+        'body': strip_tags(location.description),
+        'url': reverse('main:location_detail', args=[location.pk]),
+        'summary': _plain(location.description),
+    }
+
+
+# kind -> (label, model, searchable queryset, document fields)
+SOURCES = {
+    'course': ('Course', Course, lambda: Course.objects.filter(is_active=True), _course),
+    'post': ('Article', Post, lambda: Post.objects.filter(status='published'), _post),
+    'faq': ('FAQ', FAQ, lambda: FAQ.objects.filter(is_active=True), _faq),
+    'job': ('Job', JobPost, lambda: JobPost.objects.filter(is_active=True), _job),
+    'location': ('Location', DeploymentLocation, lambda: DeploymentLocation.objects.all(), _location),
+}
+KIND_BY_MODEL = {model: kind for kind, (_, model, _, _) in SOURCES.items()}
+SOURCE_MODELS = list(KIND_BY_MODEL)
+
+
+def build_index():
+    index = SearchIndex()
+    for kind, (_, _, queryset, fields) in SOURCES.items():
+        for obj in queryset().iterator():
+            index.add((kind, obj.pk), **fields(obj))
+    return index
+
+
+def _snapshot_key(versions):
+    return SNAPSHOT_KEY.format('.'.join(str(version) for version in versions.values()))
+
+
+class SiteSearch:
+    """Process-local SearchIndex kept in step with the shared snapshot"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._versions = None
+
+    def get(self):
+        versions = content_versions.versions(SOURCE_MODELS)
+        with self._lock:
+            if self._index is None or self._versions != versions:
+                snapshot = cache.get_or_set(_snapshot_key(versions), lambda: build_index().dumps(), SNAPSHOT_TIMEOUT)
+                self._index = SearchIndex.loads(snapshot)
+                self._versions = versions
+            return self._index
+
+    def _patch(self, model, change):
+        versions = content_versions.versions(SOURCE_MODELS)
+        with self._lock:
+            if self._index is None:
+                return
+            expected = dict(self._versions)
+            expected[model] += 1
+            if versions != expected:
+                # Other changes committed too; the snapshot for these versions has them all
+                self._index = None
+                return
+            change(self._index)
+            self._versions = versions
+            cache.add(_snapshot_key(versions), self._index.dumps(), SNAPSHOT_TIMEOUT)
+
+    def update(self, instance):
+        """Re-index (or drop, if no longer searchable) one source object; call after commit"""
+        kind = KIND_BY_MODEL[type(instance)]
+        _, model, queryset, fields = SOURCES[kind]
+        if queryset().filter(pk=instance.pk).exists():
+            document = fields(instance)
+            self._patch(model, lambda index: index.add((kind, instance.pk), **document))
+        else:
+            self._patch(model, lambda index: index.remove((kind, instance.pk)))
+
+    def remove(self, model, pk):
+        """Drop a deleted source object; call after commit"""
+        self._patch(model, lambda index: index.remove((KIND_BY_MODEL[model], pk)))
+
+    def search(self, query, limit=20, kind=None):
+        """Return result dicts (kind, label, title, url, summary, score), best first"""
+        index = self.get()
+        results = []
+        for score, key in index.search(query, limit=limit, kind=kind):
+            document = index.documents[key]
+            results.append({
+                'kind': key[0],
+                'label': SOURCES[key[0]][0],
+                'title': document['title'],
+                'url': document['url'],
+                'summary': document['summary'],
+                'score': score,
+            })
+        return results
+
+
+site_search = SiteSearch()
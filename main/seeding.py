@@ -0,0 +1,394 @@
+"""
+Deterministic synthetic data for load testing and benchmarks.
+
+``seed(scale)`` fills an empty database with referentially consistent rows
+for every model that grows in production (posts and comments, newsletter
+subscribers and open tracking, certificates and verification logs, the
+inquiry inbox, course and job applications). Catalogue content (courses,
+locations, FAQs, jobs) stays at a realistic fixed size; everything else is
+multiplied by ``scale``, roughly 8,500 rows per unit, so ``scale=120`` is
+about a million rows.
+
+Rows go in with bulk_create in batches and bypass model signals, so the
+derived caches are invalidated once at the end. The same ``seed`` and
+``today`` always produce the same data, timestamps included.
+"""
+from contextlib import contextmanager
+from datetime import datetime, time as datetime_time, timedelta
+import hashlib
+from itertools import islice
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post, Tag
+from blog.moderation import invalidate_threads, refresh_comment_counts
+from . import content_versions, inbox
+from .models import (
+    FAQ, ApplicantProfile, Certificate, CertificateVerificationLog, ContactMessage, Course, CourseApplication,
+    DeploymentLocation, EnthusiastInquiry, InboxItem, JobApplication, JobPost, LandownerInquiry, NewsletterCampaign,
+    NewsletterSubscriber, NewsletterTracking, OtherInquiry, SequenceCounter, StudentInquiry, Testimonial, User,
+)
+from .verification import invalidate_certificate_snapshots
+
+BATCH_SIZE = 2000
+
+# The tables seed() fills; the seed command won't add to them unless they are empty or it is forced
+SEEDED_MODELS = (
+    User, Course, DeploymentLocation, FAQ, Testimonial, JobPost, Category, Tag, Post, Comment, NewsletterSubscriber,
+    NewsletterCampaign, NewsletterTracking, ApplicantProfile, CourseApplication, Certificate,
+    CertificateVerificationLog, JobApplication, StudentInquiry, LandownerInquiry, EnthusiastInquiry, OtherInquiry,
+    ContactMessage, InboxItem,
+)
+
+# Rows per unit of scale
+PER_SCALE = {
+    'applicants': 50,
+    'certificates': 500,
+    'verifications': 2000,
+    'posts': 200,
+    'comments': 1000,
+    'subscribers': 1000,
+    'tracking': 1000,
+    'student_inquiries': 300,
+    'landowner_inquiries': 100,
+    'enthusiast_inquiries': 100,
+    'other_inquiries': 100,
+    'contact_messages': 300,
+    'job_applications': 200,
+}
+
+WORDS = """
+    ranger tracking spoor rhino elephant lion leopard buffalo poaching patrol conservation wildlife habitat
+    reserve park hwange zambezi matabeleland bush field training course specialist advanced certificate
+    instructor firearms navigation gps mapping survival first aid radio camp deployment community research
+    ecology species monitoring report drone fitness endurance discipline leadership security incident
+""".split()
+FIRST_NAMES = ['Tendai', 'Rudo', 'Tatenda', 'Nyasha', 'Farai', 'Chipo', 'Tinashe', 'Kudzai', 'Simba', 'Rufaro',
+               'Thabo', 'Nokuthula', 'Sipho', 'Lindiwe', 'Blessing', 'Precious', 'Tapiwa', 'Vimbai']
+LAST_NAMES = ['Moyo', 'Ncube', 'Sibanda', 'Dube', 'Ndlovu', 'Mpofu', 'Chikwanha', 'Mutasa', 'Banda', 'Phiri',
+              'Nyathi', 'Gumbo', 'Maphosa', 'Khumalo', 'Zulu', 'Marufu']
+TOWNS = ['Hwange', 'Victoria Falls', 'Bulawayo', 'Harare', 'Kariba', 'Mutare', 'Gweru', 'Masvingo']
+
+# A 1x1 PNG and a one-page PDF, stored once and shared by every seeded row
+PLACEHOLDER_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c63f8cfc0f01f0005000201e3a0e8f40000000049454e44ae426082'
+)
+PLACEHOLDER_PDF = (
+    b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+    b'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+    b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n'
+    b'trailer<</Root 1 0 R>>\n%%EOF\n'
+)
+
+
+class Generator:
+    """Seeded random text, names and timestamps"""
+
+    def __init__(self, seed, now):
+        self.rng = random.Random(seed)
+        self.now = now
+
+    def choice(self, values):
+        return self.rng.choice(values)
+
+    def choice_of(self, model, field):
+        return self.rng.choice(model._meta.get_field(field).choices)[0]
+
+    def sentence(self, words=12):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize() + '.'
+
+    def title(self, words=4):
+        return self.sentence(words)[:-1].title()
+
+    def paragraphs(self, count=3):
+        return '\n\n'.join(' '.join(self.sentence(self.rng.randint(8, 18)) for _ in range(4)) for _ in range(count))
+
+    def person(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def phone(self):
+        return f"07{self.rng.randint(10000000, 89999999)}"
+
+    def ip(self):
+        return f"41.{self.rng.randint(0, 255)}.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}"
+
+    def past(self, days=730):
+        """A timestamp within the last ``days`` days, skewed towards recent"""
+        return self.now - timedelta(seconds=int(self.rng.triangular(0, days, 0) * 86400))
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create store the generated created/updated times instead of now()"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def insert(model, rows, batch_size=BATCH_SIZE):
+    """bulk_create ``rows`` (any iterable) in batches; return the new primary keys in order"""
+    # Not every backend returns ids from a bulk insert, but each one hands out
+    # increasing ids, so the new rows are the ones above the current maximum
+    last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        model.objects.bulk_create(batch)
+    return list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True))
+
+
+def placeholder_files():
+    files = {}
+    for name, content in [('seed/placeholder.png', PLACEHOLDER_PNG), ('seed/placeholder.pdf', PLACEHOLDER_PDF)]:
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        files[name.rsplit('.', 1)[-1]] = name
+    return files
+
+
+def seed(scale=1, seed=0, today=None, media=True, batch_size=BATCH_SIZE, log=None):
+    """
+    Populate an empty database. Returns ``(staff user, {model label: rows})``.
+    ``log`` is called with a progress message after each table.
+    """
+    today = today or timezone.localdate()
+    now = timezone.make_aware(datetime.combine(today, datetime_time(12)))
+    gen = Generator(seed, now)
+    files = placeholder_files() if media else {'png': '', 'pdf': ''}
+    counts = {key: value * scale for key, value in PER_SCALE.items()}
+    created = {}
+
+    def table(model, rows):
+        ids = insert(model, rows, batch_size)
+        created[model._meta.label] = len(ids)
+        if log:
+            log(f"{model._meta.label}: {len(ids)}")
+        return ids
+
+    with transaction.atomic(), explicit_timestamps(*SEEDED_MODELS):
+        # A salt derived from the seed keeps auth_user identical between runs
+        salt = hashlib.sha256(f'seed-password:{seed}'.encode()).hexdigest()[:32]
+        password = make_password('seed-password', salt=salt)
+        staff = User.objects.create(
+            username='seed-staff', email='staff@example.com', password=password, first_name='Seed', last_name='Staff',
+            is_staff=True, is_superuser=True, user_type='admin', date_joined=now,
+        )
+
+        # Catalogue
+        course_ids = table(Course, (
+            Course(
+                title=f"{gen.title(3)} {n}", course_type=gen.choice_of(Course, 'course_type'),
+                duration=f"{gen.rng.randint(2, 12)} weeks", description=gen.paragraphs(2), price=gen.rng.randint(2, 30) * 50,
+                image=files['png'], is_active=n % 6 != 0, created_at=gen.past(),
+            )
+            for n in range(24)
+        ))
+        table(DeploymentLocation, (
+            DeploymentLocation(
+                name=f"{gen.choice(TOWNS)} Camp {n}", description=gen.paragraphs(2), main_image=files['png'],
+                created_at=gen.past(), updated_at=gen.past(90),
+            )
+            for n in range(12)
+        ))
+        table(FAQ, (FAQ(question=gen.sentence(8)[:-1] + '?', answer=gen.paragraphs(1), order=n, created_at=gen.past())
+                    for n in range(40)))
+        table(Testimonial, (
+            Testimonial(name=' '.join(gen.person()), position='Game Ranger', content=gen.paragraphs(1), image=files['png'],
+                        created_at=gen.past())
+            for _ in range(15)
+        ))
+        job_ids = table(JobPost, (
+            JobPost(
+                title=f"{gen.title(2)} Officer {n}", category=gen.choice_of(JobPost, 'category'),
+                job_type=gen.choice_of(JobPost, 'job_type'), location=gen.choice(TOWNS), description=gen.paragraphs(2),
+                requirements='\n'.join(gen.sentence(6) for _ in range(5)),
+                responsibilities='\n'.join(gen.sentence(6) for _ in range(5)),
+                deadline=today + timedelta(days=gen.rng.randint(-10, 60)), is_active=n % 4 != 0,
+                created_at=gen.past(180), updated_at=gen.past(30),
+            )
+            for n in range(20)
+        ))
+
+        # Blog
+        category_ids = table(Category, (
+            Category(name=name, slug=name.lower().replace(' ', '-'), created_at=gen.past())
+            for name in ['Field Notes', 'Training', 'Conservation', 'Community', 'Research', 'News', 'Careers', 'Events']
+        ))
+        tag_ids = table(Tag, (Tag(name=word, slug=word, created_at=gen.past()) for word in sorted(set(WORDS))[:30]))
+        post_ids = table(Post, (
+            Post(
+                title=f"{gen.title(6)} {n}", slug=f"post-{n}", category_id=gen.choice(category_ids), author=staff,
+                content=gen.paragraphs(6), excerpt=gen.sentence(25), featured_image=files['png'],
+                status='published' if n % 10 else 'draft', published_date=published, views=gen.rng.randint(0, 5000),
+                created_at=published, updated_at=published,
+            )
+            for n, published in enumerate(sorted((gen.past(1460) for _ in range(counts['posts'])), reverse=True))
+        ))
+        table(Post.tags.through, (
+            Post.tags.through(post_id=post_id, tag_id=tag_id)
+            for post_id in post_ids for tag_id in gen.rng.sample(tag_ids, 3)
+        ))
+        table(Comment, (
+            Comment(
+                post_id=gen.choice(post_ids), name=' '.join(gen.person()), email=f"reader{n}@example.com",
+                content=gen.sentence(20), approved=n % 5 != 0, ip_address=gen.ip(), created_at=created_at,
+                updated_at=created_at,
+            )
+            for n, created_at in ((n, gen.past()) for n in range(counts['comments']))
+        ))
+        refresh_comment_counts()
+
+        # Newsletter
+        subscriber_ids = table(NewsletterSubscriber, (
+            NewsletterSubscriber(
+                email=f"subscriber{n}@example.com", first_name=gen.person()[0], is_active=n % 9 != 0,
+                subscribed_at=gen.past(), ip_address=gen.ip(), source=gen.choice(['footer', 'blog', 'contact']),
+            )
+            for n in range(counts['subscribers'])
+        ))
+        campaigns = 12
+        campaign_ids = table(NewsletterCampaign, (
+            NewsletterCampaign(
+                title=gen.title(4), subject=gen.sentence(6), content=gen.paragraphs(3), sent_at=now - timedelta(days=30 * n),
+                created_at=now - timedelta(days=30 * n + 2), recipients_count=len(subscriber_ids),
+            )
+            for n in range(campaigns)
+        ))
+        per_campaign = min(len(subscriber_ids), counts['tracking'] // campaigns)
+        table(NewsletterTracking, (
+            NewsletterTracking(
+                campaign_id=campaign_id, subscriber_id=subscriber_id,
+                opened_at=now - timedelta(days=30 * n, hours=-gen.rng.randint(1, 72)) if gen.rng.random() < 0.4 else None,
+            )
+            for n, campaign_id in enumerate(campaign_ids)
+            for subscriber_id in gen.rng.sample(subscriber_ids, per_campaign)
+        ))
+
+        # Applicants, applications and certificates
+        user_ids = table(User, (
+            User(
+                username=f"applicant{n}", email=f"applicant{n}@example.com", password=password,
+                first_name=first, last_name=last, phone=gen.phone(), date_joined=gen.past(),
+            )
+            for n, (first, last) in ((n, gen.person()) for n in range(counts['applicants']))
+        ))
+        profile_ids = table(ApplicantProfile, (
+            ApplicantProfile(
+                user_id=user_id, nationality='Zimbabwean', city=gen.choice(TOWNS), gender=gen.choice_of(ApplicantProfile, 'gender'),
+                cv=files['pdf'], created_at=gen.past(), updated_at=gen.past(30),
+            )
+            for user_id in user_ids
+        ))
+        year = today.year
+        application_ids = table(CourseApplication, (
+            CourseApplication(
+                applicant_id=profile_id, course_id=gen.choice(course_ids), status=gen.choice_of(CourseApplication, 'status'),
+                application_number=f"APP-{year}-{n:04d}", application_date=gen.past(365), motivation_text=gen.paragraphs(1),
+                cv_resume=files['pdf'], profile_photo=files['png'], updated_at=gen.past(30),
+            )
+            for n, profile_id in enumerate(profile_ids, start=1)
+        ))
+        completed = list(
+            CourseApplication.objects.filter(pk__gte=application_ids[0], status='completed').values_list(
+                'pk', 'applicant__user__first_name', 'applicant__user__last_name', 'course__title',
+            )
+        )
+        certificate_ids = table(Certificate, (
+            Certificate(
+                certificate_number=f"GRTTS-{year}-{n:04d}", application_id=application[0] if application else None,
+                full_name=f"{application[1]} {application[2]}" if application else ' '.join(gen.person()),
+                course_name=application[3] if application else gen.title(3), completion_date=completed_on,
+                grade=gen.choice(['Distinction', 'Merit', 'Pass']), score=gen.rng.randint(50, 100), duration='6 weeks',
+                is_valid=n % 50 != 0, verification_token=f"seed-{seed}-{n}", pdf_file=files['pdf'], issued_by=staff,
+                issue_date=completed_on, created_at=now - timedelta(days=(today - completed_on).days),
+            )
+            for n, application, completed_on in (
+                (n, completed[n - 1] if n <= len(completed) else None, today - timedelta(days=gen.rng.randint(0, 1095)))
+                for n in range(1, counts['certificates'] + 1)
+            )
+        ))
+        for prefix, total in [(f'GRTTS-{year}', len(certificate_ids)), (f'APP-{year}', len(application_ids))]:
+            SequenceCounter.objects.update_or_create(name=prefix, defaults={'value': total})
+        table(CertificateVerificationLog, (
+            CertificateVerificationLog(
+                # Nine in ten look up a real certificate; the rest mistype a number
+                certificate_id=certificate_ids[n - 1] if n <= len(certificate_ids) else None,
+                certificate_number=f"GRTTS-{year}-{n:04d}", ip_address=gen.ip(), user_agent='Mozilla/5.0 (seed)',
+                verified_at=gen.past(365), successful=n <= len(certificate_ids),
+            )
+            for n in (
+                gen.rng.randint(1, len(certificate_ids)) if gen.rng.random() < 0.9 else len(certificate_ids) + gen.rng.randint(1, 9999)
+                for _ in range(counts['verifications'])
+            )
+        ))
+
+        # Careers
+        table(JobApplication, (
+            JobApplication(
+                job_id=gen.choice(job_ids), first_name=first, last_name=last, email=f"candidate{n}@example.com",
+                phone=gen.phone(), cover_letter=gen.paragraphs(2), experience_years=gen.rng.randint(0, 15),
+                cv=files['pdf'], status=gen.choice_of(JobApplication, 'status'), ip_address=gen.ip(),
+                applied_at=applied_at, updated_at=applied_at,
+            )
+            for n, (first, last), applied_at in ((n, gen.person(), gen.past(180)) for n in range(counts['job_applications']))
+        ))
+
+        # Inquiries, mirrored into the staff inbox
+        def person_fields(n, kind):
+            first, last = gen.person()
+            return {'name': f"{first} {last}", 'email': f"{kind}{n}@example.com", 'is_read': gen.rng.random() < 0.7,
+                    'created_at': gen.past(365)}
+
+        sources = [
+            ('student', StudentInquiry, lambda n: StudentInquiry(
+                phone=gen.phone(), age=gen.rng.randint(18, 35), nationality='Zimbabwean',
+                course=gen.choice_of(StudentInquiry, 'course'), **person_fields(n, 'student'))),
+            ('landowner', LandownerInquiry, lambda n: LandownerInquiry(
+                phone=gen.phone(), service=gen.choice_of(LandownerInquiry, 'service'), **person_fields(n, 'landowner'))),
+            ('enthusiast', EnthusiastInquiry, lambda n: EnthusiastInquiry(
+                interest=gen.choice_of(EnthusiastInquiry, 'interest'), **person_fields(n, 'enthusiast'))),
+            ('other', OtherInquiry, lambda n: OtherInquiry(
+                category=gen.choice_of(OtherInquiry, 'category'), subject=gen.sentence(6), message=gen.paragraphs(1),
+                **person_fields(n, 'other'))),
+            ('contact', ContactMessage, lambda n: ContactMessage(
+                phone=gen.phone(), subject=gen.sentence(5), message=gen.paragraphs(1), **person_fields(n, 'contact'))),
+        ]
+        inbox_rows = 0
+        for kind, model, build in sources:
+            count = counts['contact_messages' if kind == 'contact' else f'{kind}_inquiries']
+            row_ids = table(model, (build(n) for n in range(count)))
+            subject = inbox.SOURCES[kind][1]
+            inbox_rows += len(insert(InboxItem, (
+                InboxItem(kind=kind, object_id=row.pk, name=row.name, email=row.email, subject=(subject(row) or '')[:200],
+                          is_read=row.is_read, created_at=row.created_at)
+                for row in model.objects.filter(pk__gte=row_ids[0]).order_by('pk').iterator()
+            ), batch_size))
+        created[InboxItem._meta.label] = inbox_rows
+        if log:
+            log(f"{InboxItem._meta.label}: {created[InboxItem._meta.label]}")
+
+    # bulk_create skipped the signals that keep these up to date
+    invalidate_certificate_snapshots()
+    invalidate_threads(post_ids)
+    content_versions.bump(*content_versions.TRACKED)
+    cache.delete(inbox.UNREAD_COUNTS_KEY)
+    return staff, created
@@ -0,0 +1,79 @@
+"""
+Gap-free number allocation backed by one counter row per sequence.
+
+Each allocation is a single ``UPDATE ... SET value = value + n`` on the
+counter row, so concurrent callers queue on the row lock instead of racing
+for the same number. Run the allocation inside the same transaction as the
+insert that uses it and a rollback hands the numbers back.
+"""
+import re
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import F
+
+from .models import SequenceCounter
+
+
+def allocate(name, count=1, initial=None):
+    """
+    Reserve ``count`` consecutive numbers from sequence ``name``.
+
+    ``initial`` is an optional callable returning the value to start from
+    when the counter row does not exist yet (e.g. the highest number already
+    stored before the sequence was introduced). Returns a ``range``.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    using = router.db_for_write(SequenceCounter)
+    counters = SequenceCounter.objects.using(using).filter(name=name)
+
+    with transaction.atomic(using=using):
+        if not counters.update(value=F('value') + count):
+            start = initial() if initial else 0
+            try:
+                with transaction.atomic(using=using):
+                    SequenceCounter.objects.using(using).create(name=name, value=start)
+            except IntegrityError:
+                # Another worker created the row first; use theirs
+                pass
+            counters.update(value=F('value') + count)
+        value = counters.values_list('value', flat=True).get()
+
+    return range(value - count + 1, value + 1)
+
+
+def next_value(name, initial=None):
+    """Reserve a single number from sequence ``name``"""
+    return allocate(name, 1, initial=initial)[0]
+
+
+def highest_existing(queryset, field, prefix):
+    """
+    Return the highest numeric suffix stored in ``field`` for values starting
+    with ``prefix``. Used once per sequence to seed a new counter row.
+    """
+    pattern = re.compile(rf'^{re.escape(prefix)}(\d+)$')
+    highest = 0
+    values = queryset.filter(**{f'{field}__startswith': prefix}).values_list(field, flat=True)
+    for value in values.iterator():
+        match = pattern.match(value or '')
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest
+
+
+def yearly_numbers(prefix, queryset, field, year, count=1):
+    """
+    Allocate ``count`` numbers formatted as ``{prefix}-{year}-NNNN``.
+
+    The per-year counter is seeded from existing rows the first time it is
+    used, so numbers carry on from data created before the counter existed.
+    """
+    full_prefix = f"{prefix}-{year}-"
+    numbers = allocate(
+        f"{prefix}-{year}",
+        count,
+        initial=lambda: highest_existing(queryset, field, full_prefix),
+    )
+    return [f"{full_prefix}{n:04d}" for n in numbers]
@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import content_versions, metrics
+from .inbox import KIND_BY_MODEL as INBOX_KINDS, SOURCES, remove_item, sync_item
+from .models import Certificate
+from .search import KIND_BY_MODEL as SEARCH_MODELS, site_search
+from .verification import invalidate_certificate_snapshots
+
+INBOX_MODELS = [model for model, _ in SOURCES.values()]
+
+
+@receiver([post_save, post_delete], sender=Certificate)
+def certificate_changed(sender, **kwargs):
+    invalidate_certificate_snapshots()
+
+
+def inbox_source_saved(sender, instance, created=False, **kwargs):
+    sync_item(instance)
+    if created:
+        metrics.inquiries_received.inc(INBOX_KINDS[sender])
+
+
+def inbox_source_deleted(sender, instance, **kwargs):
+    remove_item(instance)
+
+
+for model in INBOX_MODELS:
+    post_save.connect(inbox_source_saved, sender=model, dispatch_uid=f'inbox_saved_{model.__name__}')
+    post_delete.connect(inbox_source_deleted, sender=model, dispatch_uid=f'inbox_deleted_{model.__name__}')
+
+
+# Bumped after commit: a worker that saw the new token before then would
+# rebuild from the old rows and cache them under it
+def content_changed(sender, **kwargs):
+    transaction.on_commit(lambda: content_versions.bump(sender))
+
+
+def content_relation_changed(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        changed = {type(instance), model} & set(content_versions.TRACKED)
+        transaction.on_commit(lambda: content_versions.bump(*changed))
+
+
+for model in content_versions.TRACKED:
+    post_save.connect(content_changed, sender=model, dispatch_uid=f'content_saved_{model.__name__}')
+    post_delete.connect(content_changed, sender=model, dispatch_uid=f'content_deleted_{model.__name__}')
+    for field in model._meta.local_many_to_many:
+        m2m_changed.connect(content_relation_changed, sender=field.remote_field.through,
+                            dispatch_uid=f'content_m2m_{model.__name__}_{field.name}')
+
+
+# Connected after the content version receivers, so their on_commit bump
+# runs first and the patched index is published under the new versions
+def search_source_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: site_search.update(instance))
+
+
+def search_source_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: site_search.remove(sender, pk))
+
+
+for model in SEARCH_MODELS:
+    post_save.connect(search_source_saved, sender=model, dispatch_uid=f'search_saved_{model.__name__}')
+    post_delete.connect(search_source_deleted, sender=model, dispatch_uid=f'search_deleted_{model.__name__}')
@@ -0,0 +1,233 @@
+"""
+sitemap.xml and RSS/Atom feeds.
+
+Each sitemap section and each feed is rendered once into the cache together
+with a strong ETag (a hash of the bytes), keyed on the content versions of
+the models it is built from. A change only moves the key of the documents
+built from that model, so the next crawl regenerates that one section and
+every other request is a cache read or a 304.
+
+Sections longer than SITEMAP_PAGE_SIZE URLs (50,000, the protocol's limit)
+are split into pages, served as ``?p=2`` and so on and each listed in the
+sitemap index.
+"""
+import hashlib
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils import feedgenerator, timezone
+from django.utils.html import escape, strip_tags
+
+from blog.models import Category, Post
+from . import content_versions
+from .models import FAQ, Course, DeploymentLocation, JobPost
+
+DOCUMENT_KEY = 'sitemaps:{}:{}'
+# Superseded versions are never read again; let them expire
+DOCUMENT_TIMEOUT = 24 * 60 * 60
+FEED_ITEMS = 20
+
+
+def absolute(path):
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def _latest(*values):
+    values = [value for value in values if value]
+    return max(values) if values else None
+
+
+# =============================================================================
+# SITEMAP SECTIONS
+# =============================================================================
+
+def post_urls():
+    posts = Post.objects.filter(status='published')
+    yield reverse('blog:post_list'), posts.aggregate(latest=Max('updated_at'))['latest'], 'daily', '0.8'
+    # pk breaks ties so every page is built from the same order
+    for slug, updated in posts.order_by('-published_date', 'pk').values_list('slug', 'updated_at').iterator():
+        yield reverse('blog:post_detail', args=[slug]), updated, 'monthly', '0.6'
+
+
+def course_urls():
+    courses = list(Course.objects.filter(is_active=True).values_list('pk', 'created_at'))
+    yield reverse('main:courses'), _latest(*(created for _, created in courses)), 'weekly', '0.9'
+    for pk, created in courses:
+        yield reverse('main:course_detail', args=[pk]), created, 'monthly', '0.8'
+
+
+def location_urls():
+    locations = list(DeploymentLocation.objects.values_list('pk', 'updated_at'))
+    yield reverse('main:locations'), _latest(*(updated for _, updated in locations)), 'monthly', '0.7'
+    for pk, updated in locations:
+        yield reverse('main:location_detail', args=[pk]), updated, 'monthly', '0.6'
+
+
+def job_urls():
+    latest = JobPost.objects.filter(is_active=True).aggregate(latest=Max('updated_at'))['latest']
+    yield reverse('main:careers'), latest, 'weekly', '0.7'
+
+
+def faq_urls():
+    latest = FAQ.objects.filter(is_active=True).aggregate(latest=Max('created_at'))['latest']
+    yield reverse('main:faq'), latest, 'monthly', '0.5'
+
+
+SECTIONS = {
+    'posts': post_urls,
+    'courses': course_urls,
+    'locations': location_urls,
+    'jobs': job_urls,
+    'faq': faq_urls,
+}
+
+
+def render_section(name, page=1):
+    """Return one page of a section and whether there is another page after it"""
+    size = settings.SITEMAP_PAGE_SIZE
+    urls = list(islice(SECTIONS[name](), (page - 1) * size, page * size + 1))
+    more = len(urls) > size
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for path, lastmod, changefreq, priority in urls[:size]:
+        lines.append('<url>')
+        lines.append(f'<loc>{escape(absolute(path))}</loc>')
+        if lastmod:
+            lines.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+        lines.append(f'<changefreq>{changefreq}</changefreq><priority>{priority}</priority>')
+        lines.append('</url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines), more
+
+
+def section_url(name, page=1):
+    url = reverse('main:sitemap_section', args=[name])
+    return url if page == 1 else f'{url}?p={page}'
+
+
+def render_index():
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for name in SECTIONS:
+        page, more = 0, True
+        while more:
+            page += 1
+            doc = document(f'section:{name}', page)
+            more = doc['more']
+            lines.append('<sitemap>')
+            lines.append(f"<loc>{escape(absolute(section_url(name, page)))}</loc>")
+            lines.append(f'<lastmod>{doc["built_at"].isoformat(timespec="seconds")}</lastmod>')
+            lines.append('</sitemap>')
+    lines.append('</sitemapindex>')
+    return '\n'.join(lines)
+
+
+# =============================================================================
+# FEEDS
+# =============================================================================
+
+def render_post_feed(feed_class):
+    feed = feed_class(
+        title='GRTTS Blog',
+        link=absolute(reverse('blog:post_list')),
+        description='News and field notes from GRTTS',
+        language='en',
+        feed_url=absolute(reverse('blog:post_feed_atom' if feed_class is feedgenerator.Atom1Feed else 'blog:post_feed')),
+    )
+    posts = Post.objects.filter(status='published').select_related('author', 'category').order_by('-published_date')
+    for post in posts[:FEED_ITEMS]:
+        feed.add_item(
+            title=post.title,
+            link=absolute(post.get_absolute_url()),
+            description=strip_tags(post.excerpt),
+            pubdate=post.published_date,
+            updateddate=post.updated_at,
+            unique_id=absolute(post.get_absolute_url()),
+            author_name=(post.author.get_full_name() or None) if post.author else None,
+            categories=[post.category.name] if post.category else None,
+        )
+    return feed.writeString('utf-8')
+
+
+def render_job_feed(feed_class):
+    feed = feed_class(
+        title='GRTTS Careers',
+        link=absolute(reverse('main:careers')),
+        description='Open positions at GRTTS',
+        language='en',
+        feed_url=absolute(reverse('main:job_feed')),
+    )
+    for job in JobPost.objects.filter(is_active=True).order_by('-created_at')[:FEED_ITEMS]:
+        link = absolute(reverse('main:job_apply', args=[job.pk]))
+        feed.add_item(
+            title=f"{job.title} - {job.location}",
+            link=link,
+            description=job.description,
+            pubdate=job.created_at,
+            updateddate=job.updated_at,
+            unique_id=link,
+            categories=[job.get_category_display(), job.get_job_type_display()],
+        )
+    return feed.writeString('utf-8')
+
+
+RENDERERS = {
+    'index': render_index,
+    'feed:posts:rss': lambda: render_post_feed(feedgenerator.Rss201rev2Feed),
+    'feed:posts:atom': lambda: render_post_feed(feedgenerator.Atom1Feed),
+    'feed:jobs:rss': lambda: render_job_feed(feedgenerator.Rss201rev2Feed),
+}
+
+# The models each document is built from. The sitemap index carries the
+# sections' build times, so it changes whenever a section does.
+SOURCES = {
+    'index': [Post, Course, DeploymentLocation, JobPost, FAQ],
+    'section:posts': [Post],
+    'section:courses': [Course],
+    'section:locations': [DeploymentLocation],
+    'section:jobs': [JobPost],
+    'section:faq': [FAQ],
+    'feed:posts:rss': [Post, Category],
+    'feed:posts:atom': [Post, Category],
+    'feed:jobs:rss': [JobPost],
+}
+
+
+def document(name, page=1):
+    """
+    Return ``{'body', 'etag', 'built_at', 'more'}`` for a document, building
+    it on a miss. ``page`` and ``more`` (another page follows) are only used
+    by sitemap sections.
+    """
+    def build():
+        if name.startswith('section:'):
+            body, more = render_section(name.split(':', 1)[1], page)
+        else:
+            body, more = RENDERERS[name](), False
+        body = body.encode('utf-8')
+        return {
+            'body': body,
+            'etag': f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            'built_at': timezone.now(),
+            'more': more,
+        }
+
+    key = DOCUMENT_KEY.format(name if page == 1 else f'{name}:{page}', content_versions.token(*SOURCES[name]))
+    return cache.get_or_set(key, build, DOCUMENT_TIMEOUT)
+
+
+def document_response(request, name, content_type, page=1):
+    """Serve a cached document with a strong ETag, answering 304 when it matches"""
+    doc = document(name, page)
+    if doc['etag'] in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(doc['body'], content_type=content_type)
+    response['ETag'] = doc['etag']
+    response['Cache-Control'] = f'public, max-age={settings.SITEMAP_MAX_AGE}'
+    return response
+
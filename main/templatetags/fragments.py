@@ -0,0 +1,53 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+
+from main import fragments
+
+register = template.Library()
+
+
+def source_version(origin):
+    """Hash of the template's source, so a deploy that edits it misses the old entries"""
+    loader = getattr(origin, 'loader', None)
+    if loader is None:
+        return origin.name
+    try:
+        contents = loader.get_contents(origin)
+    except template.TemplateDoesNotExist:
+        return origin.name
+    return hashlib.md5(contents.encode()).hexdigest()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on, source):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+        self.source = source
+
+    def render(self, context):
+        key = fragments.cache_key(self.name, self.source, [value.resolve(context) for value in self.vary_on])
+        return cache.get_or_set(key, lambda: self.nodelist.render(context), settings.FRAGMENT_CACHE_TIMEOUT)
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    {% fragment 'name' [vary_on ...] %}...{% endfragment %}
+
+    ``name`` must be listed in main.fragments.FRAGMENTS with the models
+    the fragment displays.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2 or bits[1][0] not in '"\'' or bits[1][0] != bits[1][-1]:
+        raise template.TemplateSyntaxError("'fragment' needs a quoted fragment name")
+    name = bits[1][1:-1]
+    if name not in fragments.FRAGMENTS:
+        raise template.TemplateSyntaxError(f"Unknown fragment '{name}'; list it in main.fragments.FRAGMENTS")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    vary_on = [parser.compile_filter(bit) for bit in bits[2:]]
+    return FragmentNode(nodelist, name, vary_on, f'{source_version(parser.origin)}:{token.lineno}')
@@ -0,0 +1,88 @@
+"""
+Django template backend that reports render time to main.timing and,
+per template, to main.metrics.
+
+Only renders through the backend (render(), render_to_string(),
+TemplateResponse) are timed; {% include %} and {% extends %} happen inside
+them and are part of the same measurement.
+
+preload_templates() compiles every project template into the cached
+loader; grtts_project.wsgi calls it at worker boot when TEMPLATE_PRELOAD
+is set, so no request pays for parsing a template and every worker starts
+with the same cache.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics, timing
+
+logger = logging.getLogger(__name__)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            with timing.template_render():
+                return super().render(context, request)
+        finally:
+            metrics.template_duration.observe(time.perf_counter() - started, self.origin.template_name or '<string>')
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def _loader_dirs(loaders):
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            yield from _loader_dirs(loader.loaders)
+        else:
+            yield from loader.get_dirs()
+
+
+def project_template_names(engine):
+    """Names of the templates under BASE_DIR that ``engine`` can load, in lookup order"""
+    base_dir = str(settings.BASE_DIR)
+    seen = set()
+    for directory in _loader_dirs(engine.template_loaders):
+        directory = str(directory)
+        if not directory.startswith(base_dir) or not os.path.isdir(directory):
+            continue
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if not filename.endswith(('.html', '.txt', '.xml')):
+                    continue
+                name = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+
+def preload_templates():
+    """Compile every project template into each Django engine's cached loader; returns the count"""
+    started = time.perf_counter()
+    count = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in project_template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except Exception:
+                # A broken template should fail the page that uses it, not the worker
+                logger.exception("Couldn't precompile template %s", name)
+            else:
+                count += 1
+    logger.info('Precompiled %d templates in %.0fms', count, (time.perf_counter() - started) * 1000)
+    return count
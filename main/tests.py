@@ -1,3 +1,1004 @@
-from django.test import TestCase
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import send_mail
+from django.core.management import CommandError, call_command
+from django.template import TemplateSyntaxError, engines
+from django.db import DatabaseError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.models import Category, Post, Tag
+from . import (
+    autocomplete, content_versions, inbox, metrics, profiling, querylog, search, seeding, sitemaps, templating,
+    verification,
+)
+from .certificate_tokens import make_token
+from .models import (
+    FAQ, ApplicantProfile, Certificate, CertificateVerificationLog, ContactMessage, Course, CourseApplication,
+    DeploymentLocation, InboxItem, NewsletterSubscriber, SequenceCounter, User, UserDocument,
+)
+from .paginators import EstimatedCountPaginator
+from .sequences import allocate, yearly_numbers
+
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=5)
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        NewsletterSubscriber.objects.bulk_create(
+            NewsletterSubscriber(email=f"reader{n}@example.com") for n in range(8)
+        )
+
+    def test_large_counts_are_cached_on_sqlite(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('other backends read the table statistics')
+        self.assertEqual(EstimatedCountPaginator(NewsletterSubscriber.objects.all(), 2).count, 8)
+        NewsletterSubscriber.objects.create(email='late@example.com')
+        with self.assertNumQueries(0):
+            self.assertEqual(EstimatedCountPaginator(NewsletterSubscriber.objects.all(), 2).count, 8)
+
+        # Below the threshold the count is always exact
+        queryset = NewsletterSubscriber.objects.filter(email__startswith='late')
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 1)
+        NewsletterSubscriber.objects.create(email='later@example.com')
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 2)
+
+    def test_estimate_is_used_only_above_the_threshold(self):
+        queryset = NewsletterSubscriber.objects.all()
+        with mock.patch('main.paginators.estimate_table_rows', return_value=50000):
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 50000)
+        with mock.patch('main.paginators.estimate_table_rows', return_value=4):
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 8)
+
+    def test_changelist_pages(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        url = reverse('admin:main_newslettersubscriber_changelist')
+        with mock.patch('main.admin.NewsletterSubscriberAdmin.list_per_page', 3):
+            response = self.client.get(url, {'p': 3})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['cl'].paginator.num_pages, 3)
+            self.assertEqual(len(response.context['cl'].result_list), 2)
+            self.assertEqual(self.client.get(url, {'p': 4}).status_code, 302)
+
+
+class SequenceAllocatorTests(TestCase):
+    def test_numbers_are_consecutive(self):
+        self.assertEqual(list(allocate('test')), [1])
+        self.assertEqual(list(allocate('test', 3)), [2, 3, 4])
+        self.assertEqual(list(allocate('other')), [1])
+
+    def test_counter_is_seeded_from_existing_rows(self):
+        Certificate.objects.create(
+            certificate_number='GRTTS-2031-0041', full_name='A', course_name='B',
+            completion_date='2031-01-01', duration='6 weeks', verification_token='t1',
+        )
+        numbers = yearly_numbers('GRTTS', Certificate.objects.all(), 'certificate_number', 2031, count=2)
+        self.assertEqual(numbers, ['GRTTS-2031-0042', 'GRTTS-2031-0043'])
+
+
+class SequenceConcurrencyTests(TransactionTestCase):
+    THREADS = 16
+    ALLOCATIONS = 25
+
+    def test_concurrent_allocations_are_unique_and_gap_free(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('needs a shared test database; set TEST_DATABASE_NAME for SQLite')
+
+        results = []
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.ALLOCATIONS):
+                    value = allocate('stress')[0]
+                    with lock:
+                        results.append(value)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        total = self.THREADS * self.ALLOCATIONS
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(results), list(range(1, total + 1)))
+        self.assertEqual(SequenceCounter.objects.get(name='stress').value, total)
+
+
+@override_settings(VERIFICATION_LOG_BATCH_SIZE=5, VERIFICATION_LOG_FLUSH_INTERVAL=3600)
+class VerificationPipelineTests(TestCase):
+    def setUp(self):
+        verification.flush()
+        self.certificate = Certificate.objects.create(
+            full_name='A', course_name='B', completion_date='2031-01-01',
+            duration='6 weeks', verification_token='t1',
+        )
+
+    def test_events_are_written_in_batches(self):
+        for _ in range(4):
+            verification.record_verification(self.certificate.pk, '127.0.0.1', 'test')
+        self.assertEqual(CertificateVerificationLog.objects.count(), 0)
+
+        verification.record_verification(self.certificate.pk, '127.0.0.1', 'test')
+        self.assertEqual(CertificateVerificationLog.objects.count(), 5)
+        self.certificate.refresh_from_db()
+        self.assertEqual(self.certificate.view_count, 5)
+
+    def test_failed_batches_are_queued_again(self):
+        verification.record_verification(self.certificate.pk, '127.0.0.1', 'test')
+        with mock.patch.object(CertificateVerificationLog.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            with self.assertLogs('main.verification', 'ERROR'):
+                self.assertEqual(verification.flush(), 0)
+        self.assertEqual(verification.pending_count(), 1)
+        self.assertEqual(verification.flush(), 1)
+        self.assertEqual(CertificateVerificationLog.objects.count(), 1)
+
+    def test_quiet_workers_flush_after_the_interval(self):
+        flushed = threading.Event()
+        with mock.patch.object(verification, '_timer', None), \
+                mock.patch.object(verification, 'flush', side_effect=lambda: flushed.set()), \
+                override_settings(VERIFICATION_LOG_FLUSH_INTERVAL=0.2):
+            verification.record_verification(self.certificate.pk, '127.0.0.1', 'test')
+            self.assertFalse(flushed.is_set())
+            self.assertTrue(flushed.wait(5))
+        self.assertEqual(verification.flush(), 1)
+
+
+@override_settings(VERIFICATION_LOG_BATCH_SIZE=1, VERIFICATION_RATE_BURST=3)
+class VerifyCertificateViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.certificate = Certificate.objects.create(
+            full_name='A', course_name='B', completion_date='2031-01-01',
+            duration='6 weeks', verification_token='t1',
+        )
+        self.url = reverse('main:verify_certificate')
+
+    def test_valid_number_is_verified(self):
+        response = self.client.post(self.url, {'certificate_number': self.certificate.certificate_number})
+        self.assertTrue(response.context['verified'])
+        self.assertTrue(CertificateVerificationLog.objects.get().successful)
+
+    def test_unknown_number_skips_certificate_query_and_logs_failure(self):
+        self.client.post(self.url, {'certificate_number': 'GRTTS-1999-0001'})  # warm the filter
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'certificate_number': 'GRTTS-1999-0002'})
+        self.assertFalse(response.context['verified'])
+        self.assertFalse(any('"main_certificate"."certificate_number"' in q['sql'] for q in queries))
+        self.assertEqual(CertificateVerificationLog.objects.filter(successful=False).count(), 2)
+
+    def test_snapshots_expire_without_a_change_stamp(self):
+        verification.certificate_filter.get()
+        # Issued by another instance, whose change stamp never reaches this one
+        Certificate.objects.filter(pk=self.certificate.pk).update(certificate_number='GRTTS-2031-9999')
+        self.assertFalse(verification.certificate_filter.might_contain('GRTTS-2031-9999'))
+        with override_settings(VERIFICATION_SNAPSHOT_MAX_AGE=0):
+            self.assertTrue(verification.certificate_filter.might_contain('GRTTS-2031-9999'))
+
+    def test_attempts_are_rate_limited_per_ip(self):
+        for _ in range(3):
+            self.client.post(self.url, {'certificate_number': 'nope'})
+        response = self.client.post(self.url, {'certificate_number': 'nope'})
+        self.assertEqual(response.status_code, 429)
+
+
+@override_settings(VERIFICATION_RATE_BURST=3, VERIFICATION_RATE_PER_MINUTE=1, CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class VerificationRateLimitTests(SimpleTestCase):
+    def test_concurrent_attempts_share_one_count(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(verification.allow_verification('10.0.0.1')))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 3)
+        self.assertTrue(verification.allow_verification('10.0.0.2'))
+
+
+class IssueCertificatesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.course = Course.objects.create(title='Tracking', course_type='BASIC', duration='4 weeks', description='...')
+        for username in ['tendai', 'rudo']:
+            user = User.objects.create(username=username, first_name=username.title(), last_name='Moyo')
+            CourseApplication.objects.create(
+                applicant=ApplicantProfile.objects.create(user=user), course=self.course, status='completed',
+            )
+
+    def test_each_graduate_gets_one_certificate_with_a_pdf(self):
+        import qrcode
+
+        # Render in threads so the QR codes drawn can be seen from here
+        with mock.patch('main.management.commands.issue_certificates.ProcessPoolExecutor', ThreadPoolExecutor), \
+                mock.patch.object(qrcode.QRCode, 'add_data', autospec=True,
+                                  side_effect=qrcode.QRCode.add_data) as add_data:
+            call_command('issue_certificates', course='Tracking', completion_date='2031-03-01', stdout=StringIO())
+
+        certificates = Certificate.objects.filter(application__course=self.course)
+        self.assertEqual(sorted(certificates.values_list('full_name', flat=True)), ['Rudo Moyo', 'Tendai Moyo'])
+        verify_urls = {call.args[1] for call in add_data.call_args_list}
+        for certificate in certificates:
+            with certificate.pdf_file.open('rb') as pdf:
+                self.assertTrue(pdf.read().startswith(b'%PDF'))
+            url = settings.SITE_URL.rstrip('/') + reverse(
+                'main:verify_certificate_token', args=[certificate.get_signed_token()]
+            )
+            self.assertIn(url, verify_urls)
+            response = self.client.get(url[len(settings.SITE_URL.rstrip('/')):] + '?format=json')
+            self.assertTrue(response.json()['verified'])
+
+        out = StringIO()
+        call_command('issue_certificates', course='Tracking', no_pdf=True, stdout=out)
+        self.assertIn('0 graduates', out.getvalue())
+        self.assertEqual(certificates.count(), 2)
+
+
+class CertificateTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.certificate = Certificate.objects.create(
+            full_name='Tendai Moyo', course_name='Basic Ranger Course', completion_date=date(2031, 1, 1),
+            duration='6 weeks', verification_token='t1',
+        )
+
+    def url(self, token):
+        return reverse('main:verify_certificate_token', args=[token]) + '?format=json'
+
+    def test_valid_token_verifies_without_queries(self):
+        token = self.certificate.get_signed_token()
+        self.client.get(self.url(token))  # warm the status map
+        with self.assertNumQueries(0):
+            data = self.client.get(self.url(token)).json()
+        self.assertTrue(data['verified'])
+        self.assertEqual(data['full_name'], 'Tendai Moyo')
+        self.assertEqual(data['completion_date'], '2031-01-01')
+
+    def test_tampered_token_is_rejected(self):
+        token = self.certificate.get_signed_token()
+        forged = Certificate(
+            certificate_number=self.certificate.certificate_number, full_name='Someone Else',
+            course_name='Basic Ranger Course', completion_date=date(2031, 1, 1),
+        )
+        payload = make_token(forged).split('.')[0]
+        signature = token.split('.')[1]
+        response = self.client.get(self.url(f"{payload}.{signature}"))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['verified'])
+
+    def test_revoked_certificate_is_not_verified(self):
+        token = self.certificate.get_signed_token()
+        self.certificate.is_valid = False
+        self.certificate.save()
+        data = self.client.get(self.url(token)).json()
+        self.assertTrue(data['revoked'])
+        self.assertFalse(data['verified'])
+
+    def test_deleted_certificate_is_not_verified(self):
+        token = self.certificate.get_signed_token()
+        self.assertTrue(self.client.get(self.url(token)).json()['verified'])
+        self.certificate.delete()
+        data = self.client.get(self.url(token)).json()
+        self.assertFalse(data['verified'])
+
+    def test_tokens_with_corrected_details_are_not_verified(self):
+        token = self.certificate.get_signed_token()
+        self.certificate.full_name = 'Tendai M. Moyo'
+        self.certificate.save()
+        self.assertFalse(self.client.get(self.url(token)).json()['verified'])
+        self.assertTrue(self.client.get(self.url(self.certificate.get_signed_token())).json()['verified'])
+
+        # Also when the number isn't in the status map yet
+        self.certificate.refresh_from_db()
+        verification.certificate_statuses.get()
+        Certificate.objects.filter(pk=self.certificate.pk).update(certificate_number='GRTTS-2031-8888')
+        self.certificate.certificate_number = 'GRTTS-2031-8888'
+        stale = Certificate(
+            certificate_number='GRTTS-2031-8888', full_name='Tendai Moyo', course_name='Basic Ranger Course',
+            completion_date=date(2031, 1, 1),
+        )
+        self.assertFalse(self.client.get(self.url(make_token(stale))).json()['verified'])
+        self.assertTrue(self.client.get(self.url(self.certificate.get_signed_token())).json()['verified'])
+
+    def test_certificates_newer_than_the_snapshot_are_checked_in_the_database(self):
+        verification.certificate_statuses.get()
+        Certificate.objects.filter(pk=self.certificate.pk).update(certificate_number='GRTTS-2031-7777')
+        self.certificate.certificate_number = 'GRTTS-2031-7777'
+        self.assertTrue(self.client.get(self.url(self.certificate.get_signed_token())).json()['verified'])
+
+
+class RegistrationTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def form_data(self, **extra):
+        data = {
+            'first_name': 'Tendai', 'last_name': 'Moyo', 'email': 'tendai@example.com', 'phone': '+263771234567',
+            'cv': SimpleUploadedFile('cv.pdf', b'%PDF-1.4 cv'),
+            'id_document': SimpleUploadedFile('id.pdf', b'%PDF-1.4 id'),
+        }
+        data.update(extra)
+        return data
+
+    def test_registration_creates_user_profile_and_documents(self):
+        response = self.client.post(reverse('main:register'), self.form_data())
+        self.assertRedirects(response, reverse('main:home'))
+        user = User.objects.get(email='tendai@example.com')
+        self.assertEqual(user.user_type, 'applicant')
+        self.assertFalse(user.has_usable_password())
+        self.assertTrue(ApplicantProfile.objects.filter(user=user).exists())
+        self.assertEqual(sorted(user.documents.values_list('document_type', flat=True)), ['cv', 'id'])
+
+    def test_failed_registration_leaves_no_rows_or_files(self):
+        User.objects.create(username='tendai', email='other@example.com')
+        self.client.post(reverse('main:register'), self.form_data())
+        self.assertFalse(User.objects.filter(email='tendai@example.com').exists())
+        self.assertEqual(UserDocument.objects.count(), 0)
+        self.assertEqual([name for _, _, files in os.walk(settings.MEDIA_ROOT) for name in files], [])
+
+
+class InboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            ContactMessage.objects.create(name=f'Sender {i}', email=f'sender{i}@example.com', message='Hello')
+
+    def test_sources_are_mirrored_and_paged_by_keyset(self):
+        self.assertEqual(InboxItem.objects.count(), 5)
+        first, cursor = inbox.page(limit=3)
+        second, last_cursor = inbox.page(cursor=cursor, limit=3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertIsNone(last_cursor)
+        self.assertEqual(len({item.pk for item in first + second}), 5)
+
+    def test_marking_read_updates_source_and_counts(self):
+        self.assertEqual(inbox.unread_counts()['contact'], 5)
+        inbox.mark_read(ContactMessage.objects.filter(name='Sender 0'))
+        self.assertEqual(inbox.unread_counts()['contact'], 4)
+        item = InboxItem.objects.get(kind='contact', name='Sender 1')
+        inbox.mark_items_read([item.pk])
+        self.assertTrue(ContactMessage.objects.get(name='Sender 1').is_read)
+        self.assertEqual(inbox.unread_counts()['total'], 3)
+
+    def test_bulk_action_ignores_non_numeric_ids(self):
+        self.client.force_login(User.objects.create(username='staff', email='staff@example.com', is_staff=True))
+        item = InboxItem.objects.get(kind='contact', name='Sender 2')
+        response = self.client.post(reverse('main:staff_inbox'), {'items': ['x', '1.5', '²', str(item.pk)]})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(ContactMessage.objects.get(name='Sender 2').is_read)
+        self.assertEqual(inbox.unread_counts()['total'], 4)
+
+
+class ExplainQueriesCommandTests(TestCase):
+    def test_flags_full_scans_and_uses_composite_indexes(self):
+        out = StringIO()
+        call_command('explain_queries', verbose_plans=True, stdout=out)
+        output = out.getvalue()
+        self.assertIn('known queries scan a full table', output)
+        if connection.vendor == 'sqlite':
+            self.assertIn('post_status_published_idx', output)
+            self.assertIn('user_email_idx', output)
+
+
+class ColdStartTests(SimpleTestCase):
+    def test_import_times_are_grouped_by_package(self):
+        from .management.commands.coldstart import parse_importtime
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |     pymysql.err\n"
+            "import time:        50 |        150 |   pymysql\n"
+            "import time:      2000 |       2000 | main.views\n"
+        )
+        self.assertEqual(parse_importtime(stderr), {'pymysql': 150, 'main': 2000})
+
+    def test_baseline_is_checked_in(self):
+        with open(os.path.join(settings.BASE_DIR, 'benchmarks', 'coldstart-baseline.json')) as f:
+            baseline = json.load(f)
+        self.assertEqual(baseline['status'], '200 OK')
+        self.assertGreater(baseline['calibration_ms'], 0)
+
+    def test_mysql_driver_is_not_imported_for_other_databases(self):
+        if connection.vendor == 'mysql':
+            self.skipTest('MySQL needs the driver')
+        self.assertNotIn('pymysql', sys.modules)
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    def results(self, **view):
+        return {'resolve': {'main:home': {'us': 10, 'units': 1.0}},
+                'views': {'main:home': {'status': 200, 'ms': 4.0, 'units': 2.0, 'queries': 1, 'cold_queries': 2, **view}}}
+
+    def test_extra_queries_and_slowdowns_regress(self):
+        from benchmarks.runner import compare
+        baseline = self.results()
+        self.assertEqual(compare(self.results(), baseline, threshold=25, min_ms=1), ([], []))
+        regressions, _ = compare(self.results(queries=2), baseline, threshold=25, min_ms=1)
+        self.assertEqual(regressions, ['main:home: 2 queries vs 1'])
+        regressions, _ = compare(self.results(ms=8.0, units=4.0), baseline, threshold=25, min_ms=1)
+        self.assertEqual(len(regressions), 1)
+
+    def test_a_slower_machine_is_not_a_regression(self):
+        from benchmarks.runner import compare
+        # Twice the milliseconds at the same calibrated cost
+        regressions, _ = compare(self.results(ms=8.0), self.results(), threshold=25, min_ms=1)
+        self.assertEqual(regressions, [])
+
+    def test_server_errors_regress_even_if_the_baseline_had_them(self):
+        from benchmarks.runner import compare
+        regressions, _ = compare(self.results(status=500), self.results(status=500), threshold=25, min_ms=1)
+        self.assertEqual(regressions, ['main:home: status 500 (baseline 500)'])
+
+    def test_known_failures_are_left_out(self):
+        from benchmarks.routes import KNOWN_FAILURES, route_names
+        self.assertLessEqual(set(KNOWN_FAILURES), set(route_names()))
+        with mock.patch('benchmarks.routes.route_names', return_value=list(KNOWN_FAILURES)):
+            from benchmarks.routes import routes
+            self.assertEqual(routes(), [])
+
+
+class LoadTestReportTests(SimpleTestCase):
+    def test_summary_counts_unexpected_statuses_as_errors(self):
+        from benchmarks.loadtest import summarize
+        samples = [(float(ms), 200) for ms in range(1, 100)] + [(500.0, 500)]
+        summary = summarize(samples, elapsed=10)
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['p50_ms'], 50.0)
+        self.assertEqual(summary['p99_ms'], 99.0)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summarize([(1.0, 'TimeoutError')], elapsed=1)['errors'], 1)
+
+    def test_rate_limited_requests_are_reported_apart(self):
+        from benchmarks.loadtest import summarize
+        summary = summarize([(0.5, 429), (0.5, 429), (20.0, 200)], elapsed=1)
+        self.assertEqual((summary['requests'], summary['rate_limited'], summary['errors']), (3, 2, 0))
+        self.assertEqual(summary['p50_ms'], 20.0)
+
+    def test_in_process_clients_get_their_own_addresses(self):
+        from benchmarks.loadtest import per_client_addresses
+        seen = []
+        app = per_client_addresses(lambda environ, start_response: seen.append(environ['REMOTE_ADDR']))
+        for number in ['1', '300', 'x']:
+            app({'REMOTE_ADDR': '127.0.0.1', 'HTTP_X_LOADTEST_CLIENT': number}, None)
+        self.assertEqual(seen, ['10.0.0.1', '10.0.1.44', '127.0.0.1'])
+
+    def test_mix_parsing(self):
+        from .management.commands.loadtest import parse_mix
+        self.assertEqual(parse_mix('home=3,post_detail'), {'home': 3.0, 'post_detail': 1.0})
+        with self.assertRaises(CommandError):
+            parse_mix('admin=1')
+
+
+class SeedTests(TestCase):
+    def test_seed_is_consistent_and_leaves_sequences_ahead(self):
+        out = StringIO()
+        call_command('seed', no_media=True, stdout=out)
+        self.assertIn('Seeded', out.getvalue())
+        self.assertEqual(Certificate.objects.count(), seeding.PER_SCALE['certificates'])
+        for log in CertificateVerificationLog.objects.filter(successful=True).select_related('certificate')[:50]:
+            self.assertEqual(log.certificate.certificate_number, log.certificate_number)
+        self.assertEqual(InboxItem.objects.count(), sum(
+            seeding.PER_SCALE[key] for key in seeding.PER_SCALE if key.endswith(('inquiries', 'messages'))
+        ))
+
+        certificate = Certificate.objects.create(
+            full_name='New Graduate', course_name='Tracking', completion_date=date(2026, 1, 15), duration='4 weeks',
+            verification_token='fresh-token',
+        )
+        self.assertTrue(certificate.certificate_number.endswith(f"{seeding.PER_SCALE['certificates'] + 1:04d}"))
+
+        with self.assertRaises(CommandError):
+            call_command('seed', stdout=StringIO())
+
+    def test_existing_users_are_left_alone(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        with self.assertRaisesMessage(CommandError, 'main.User'):
+            call_command('seed', no_media=True, stdout=StringIO())
+
+        call_command('seed', no_media=True, force=True, stdout=StringIO())
+        self.assertFalse(ApplicantProfile.objects.filter(user__is_staff=True).exists())
+        self.assertEqual(ApplicantProfile.objects.count(), seeding.PER_SCALE['applicants'])
+        self.assertFalse(ApplicantProfile.objects.exclude(user__username__startswith='applicant').exists())
+
+    def test_same_seed_gives_identical_users(self):
+        runs = []
+        for _ in range(2):
+            with transaction.atomic():
+                seeding.seed(seed=7, today=date(2030, 6, 1), media=False)
+                runs.append(list(User.objects.order_by('username').values_list('username', 'password', 'date_joined')))
+                transaction.set_rollback(True)
+        self.assertEqual(runs[0], runs[1])
+
+
+class SitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title='Basic Ranger', course_type='BASIC', duration='6 weeks', description='...')
+
+    def test_sections_are_cached_with_strong_etags(self):
+        url = reverse('main:sitemap_section', args=['courses'])
+        response = self.client.get(url)
+        self.assertContains(response, reverse('main:course_detail', args=[self.course.pk]))
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_only_affected_sections_are_regenerated(self):
+        self.client.get(reverse('main:sitemap_index'))
+        faq_etag = sitemaps.document('section:faq')['etag']
+        faq_built = sitemaps.document('section:faq')['built_at']
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(title='Tracking', course_type='TRACKING', duration='4 weeks', description='...')
+        with self.assertNumQueries(0):
+            self.assertEqual(sitemaps.document('section:faq')['built_at'], faq_built)
+        self.assertEqual(sitemaps.document('section:faq')['etag'], faq_etag)
+        self.assertContains(self.client.get(reverse('main:sitemap_section', args=['courses'])), 'course/', count=2)
+        self.assertEqual(self.client.get(reverse('blog:post_feed')).status_code, 200)
+
+
+    @override_settings(SITEMAP_PAGE_SIZE=2)
+    def test_long_sections_are_split_into_pages(self):
+        category = Category.objects.create(name='Notes')
+        for title in ['First', 'Second', 'Third']:
+            Post.objects.create(title=title, category=category, content='...', status='published')
+        index = self.client.get(reverse('main:sitemap_index'))
+        url = reverse('main:sitemap_section', args=['posts'])
+        self.assertContains(index, f'{url}</loc>')
+        self.assertContains(index, f'{url}?p=2</loc>')
+        self.assertNotContains(index, f'{url}?p=3')
+        self.assertContains(self.client.get(url), '<url>', count=2)
+        self.assertContains(self.client.get(url, {'p': 2}), '<url>', count=2)
+        self.assertEqual(self.client.get(url, {'p': 3}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'p': '0'}).status_code, 404)
+
+
+class SiteSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        search.site_search._index = None
+        Course.objects.create(
+            title='Tracking Course', course_type='TRACKING', duration='4 weeks',
+            description='Spoor identification and tracking rhino in the field.',
+        )
+        Course.objects.create(
+            title='Basic Ranger Course', course_type='BASIC', duration='6 weeks',
+            description='Patrol skills, navigation and first aid for new rangers.',
+        )
+
+    def test_stemmed_bm25_ranking(self):
+        titles = [result['title'] for result in search.site_search.search('trackers')]
+        self.assertEqual(titles, ['Tracking Course'])
+        titles = [result['title'] for result in search.site_search.search('ranger patrols')]
+        self.assertEqual(titles[0], 'Basic Ranger Course')
+
+    def test_index_is_updated_incrementally_and_shared_through_snapshot(self):
+        index = search.site_search.get()
+        course = Course.objects.get(title='Tracking Course')
+        course.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            course.save()
+        self.assertIs(search.site_search.get(), index)  # patched in place
+        self.assertEqual(search.site_search.search('tracking'), [])
+
+        search.site_search._index = None  # a fresh worker loads the published snapshot
+        with self.assertNumQueries(0):
+            self.assertEqual(len(search.site_search.get()), 1)
+
+    def test_concurrent_changes_reload_instead_of_publishing(self):
+        index = search.site_search.get()
+        course = Course.objects.get(title='Tracking Course')
+        course.is_active = False
+        with self.captureOnCommitCallbacks() as callbacks:
+            course.save()
+        # Another worker's change commits first
+        FAQ.objects.bulk_create([FAQ(question='Who trains trackers?', answer='GRTTS instructors.')])
+        content_versions.bump(FAQ)
+        for callback in callbacks:
+            callback()
+        self.assertIsNot(search.site_search.get(), index)
+        self.assertEqual([result['kind'] for result in search.site_search.search('tracking')], ['faq'])
+
+    def test_list_searches_keep_substring_matches(self):
+        response = self.client.get(reverse('main:courses'), {'q': 'angr'})
+        self.assertContains(response, 'Basic Ranger Course')
+
+    def test_search_view(self):
+        response = self.client.get(reverse('main:search'), {'q': 'navigation', 'format': 'json'})
+        self.assertEqual([result['kind'] for result in response.json()['results']], ['course'])
+        response = self.client.get(reverse('main:search'), {'q': 'spoor'})
+        self.assertContains(response, 'Tracking Course')
+        self.assertContains(response, '<title>spoor - Search - GRTTS</title>', html=False)
+        self.assertContains(response, 'Search-as-you-type suggestions', count=1)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Course.objects.create(title='Basic Ranger Course', course_type='BASIC', duration='6 weeks', description='...')
+        DeploymentLocation.objects.create(name='Hwange National Park')
+
+    def test_prefix_matches_any_word_and_first_words_rank_first(self):
+        Course.objects.create(title='Ranger Leadership', course_type='ADVANCED', duration='2 weeks', description='...')
+        names = [entry['name'] for entry in autocomplete.suggestions.lookup('rang')]
+        self.assertEqual(names, ['Ranger Leadership', 'Basic Ranger Course'])
+        self.assertEqual(autocomplete.suggestions.lookup('national p')[0]['kind'], 'location')
+
+    def test_endpoint_is_cacheable_and_rebuilt_on_change(self):
+        url = reverse('main:autocomplete')
+        response = self.client.get(url, {'q': 'hwa'})
+        self.assertEqual(response.json()['results'][0]['name'], 'Hwange National Park')
+        self.assertIn('public', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, {'q': 'hwa'}, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DeploymentLocation.objects.create(name='Hwange Main Camp')
+        response = self.client.get(url, {'q': 'hwa'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class RequestTimingTests(TestCase):
+    def test_staff_get_server_timing(self):
+        staff = User.objects.create(username='staff', email='staff@example.com', is_staff=True)
+        self.client.force_login(staff)
+        with self.assertNoLogs('main.timing'):
+            response = self.client.get(reverse('main:home'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    def test_anonymous_requests_are_untimed(self):
+        response = self.client.get(reverse('main:home'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_logged(self):
+        with self.assertLogs('main.timing', 'INFO') as logs:
+            self.client.get(reverse('main:home'))
+        record = logs.records[0]
+        self.assertEqual(record.timing['view'], 'main:home')
+        self.assertGreater(record.timing['template_ms'], 0)
+
+
+def counter_value(counter, *labels):
+    return metrics.local_values().get((counter.name, labels, None), 0)
+
+
+class MetricsTests(TestCase):
+    def test_requests_are_exported_to_staff_and_token_holders(self):
+        self.client.get(reverse('main:home'))
+        self.assertEqual(self.client.get(reverse('main:metrics')).status_code, 403)
+        with override_settings(METRICS_TOKEN='scrape-me'):
+            response = self.client.get(reverse('main:metrics'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        body = response.content.decode()
+        self.assertIn('grtts_http_requests_total{view="main:home",status="200"}', body)
+        self.assertIn('grtts_db_queries_per_request_bucket{view="main:home",le="+Inf"}', body)
+        self.assertIn('grtts_payment_webhooks_pending 0', body)
+
+        staff = User.objects.create(username='staff', email='staff@example.com', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('main:metrics')).status_code, 200)
+
+    @override_settings(EMAIL_BACKEND='main.email_backends.MetricsEmailBackend',
+                       EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_email_and_inquiry_counts(self):
+        sent = counter_value(metrics.emails_sent, 'newsletter')
+        with metrics.email_source('newsletter'):
+            send_mail('Subject', 'Body', 'from@example.com', ['to@example.com'])
+        self.assertEqual(counter_value(metrics.emails_sent, 'newsletter'), sent + 1)
+
+        received = counter_value(metrics.inquiries_received, 'contact')
+        ContactMessage.objects.create(name='Sender', email='sender@example.com', message='Hello')
+        self.assertEqual(counter_value(metrics.inquiries_received, 'contact'), received + 1)
+
+    def test_worker_files_are_added_up(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with override_settings(METRICS_DIR=directory):
+            metrics.cache_requests.inc('hit')
+            metrics.flush()
+            own = metrics.collect()[('grtts_cache_requests_total', ('hit',), None)]
+            with open(os.path.join(directory, 'other-worker.json'), 'w') as f:
+                f.write('[["grtts_cache_requests_total", ["hit"], null, 5]]')
+            self.assertEqual(metrics.collect()[('grtts_cache_requests_total', ('hit',), None)], own + 5)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+
+class QueryInspectionTests(querylog.QueryPatternAssertions, TestCase):
+    def test_fingerprints_ignore_literals(self):
+        self.assertEqual(
+            querylog.fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'O''Neil' AND x IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)',
+        )
+
+    @override_settings(QUERY_INSPECTION=False)
+    def test_repeated_queries_fail_with_the_template_line(self):
+        for i in range(5):
+            DeploymentLocation.objects.create(name=f'Camp {i}')
+        with self.assertRaises(AssertionError) as raised:
+            with self.assertNoRepeatedQueries():
+                self.client.get(reverse('main:locations'))
+        self.assertIn('main_locationimage', str(raised.exception))
+        self.assertIn('main/views.py', str(raised.exception))
+        self.assertIn('template main/locations.html, line', str(raised.exception))
+
+        with self.assertNoRepeatedQueries():
+            self.client.get(reverse('main:faq'))
+
+    @override_settings(QUERY_INSPECTION=True, SLOW_QUERY_MS=0)
+    def test_middleware_logs_slow_and_repeated_queries(self):
+        for i in range(5):
+            DeploymentLocation.objects.create(name=f'Camp {i}')
+        with self.assertLogs('main.queries', 'WARNING') as logs:
+            self.client.get(reverse('main:locations'))
+        output = '\n'.join(logs.output)
+        self.assertIn('Slow query', output)
+        self.assertIn('Possible N+1 during GET /locations/', output)
+
+
+def busy_loop(seconds):
+    import time
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.settings_override = override_settings(
+            PROFILING_ENABLED=True, PROFILING_DIR=self.directory, PROFILING_INTERVAL_MS=1,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_sampler_collapses_the_running_stack(self):
+        sampler = profiling.StackSampler().start()
+        busy_loop(0.05)
+        stacks = sampler.stop()
+        self.assertTrue(any(stack.endswith('main.tests.busy_loop') for stack in stacks))
+
+    def test_staff_header_saves_a_profile_per_view(self):
+        self.client.get(reverse('main:home'), HTTP_X_PROFILE='1')
+        self.assertEqual(profiling.stored_profiles(), {})
+
+        staff = User.objects.create(username='staff', email='staff@example.com', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('main:home'), HTTP_X_PROFILE='1')
+        self.assertTrue(response['X-Profile-Saved'].startswith('profiles/main.views.home/'))
+        self.assertEqual(list(profiling.stored_profiles()), ['main.views.home'])
+
+    def test_command_merges_profiles_by_view(self):
+        profiling.save('main.views.home', Counter({'a;main.views.home;render': 3, 'a;main.views.home': 1}))
+        profiling.save('main.views.home', Counter({'a;main.views.home;render': 4}))
+        profiling.save('blog.views.post_list', Counter({'a;blog.views.post_list': 2}))
+        out = StringIO()
+        merged = os.path.join(self.directory, 'merged.folded')
+        call_command('profiles', 'main.views.*', '--output', merged, stdout=out)
+        self.assertIn('main.views.home: 2 profiles, 8 samples', out.getvalue())
+        self.assertIn('12.5% 100.0%  main.views.home', out.getvalue())
+        self.assertNotIn('blog.views', out.getvalue())
+        with open(merged) as f:
+            self.assertEqual(f.readline(), 'a;main.views.home;render 7\n')
+        with self.assertRaises(CommandError):
+            call_command('profiles', 'careers.*', stdout=StringIO())
+
+
+class TemplatePreloadTests(TestCase):
+    def test_project_templates_are_found_once(self):
+        names = list(templating.project_template_names(engines.all()[0].engine))
+        self.assertEqual(len(names), len(set(names)))
+        self.assertIn('main/home.html', names)
+        self.assertIn('emails/newsletter_template.html', names)
+        self.assertIn('blog/post_list.html', names)
+        self.assertFalse(any(name.startswith('admin/') for name in names))
+
+    def test_preload_fills_the_cached_loader(self):
+        engine = engines.all()[0].engine
+        loader = engine.template_loaders[0]
+        loader.reset()
+        self.assertEqual(templating.preload_templates(), len(list(templating.project_template_names(engine))))
+        self.assertIn('main/home.html', loader.get_template_cache)
+
+    def test_render_time_is_recorded_per_template(self):
+        key = ('grtts_template_render_seconds', ('main/faq.html',), 'sum')
+        before = metrics.local_values().get(key, 0)
+        self.client.get(reverse('main:faq'))
+        self.assertGreater(metrics.local_values()[key], before)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        FAQ.objects.create(question='How long is the basic course?', answer='Six weeks.')
+
+    def test_faq_sidebar_renders_once_per_change(self):
+        url = reverse('main:contact')
+        first = self.client.get(url).content.decode()
+        self.assertIn('How long is the basic course?', first)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url).content.decode()
+        self.assertFalse(any('main_faq' in query['sql'] for query in queries.captured_queries))
+        self.assertIn('How long is the basic course?', second)
+        # The CSRF tokens stay per request: the contact form's and the footer newsletter form's
+        self.assertEqual(second.count('name="csrfmiddlewaretoken"'), first.count('name="csrfmiddlewaretoken"'))
+        self.assertEqual(second.count('name="csrfmiddlewaretoken"'), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQ.objects.create(question='Where are the camps?', answer='Across Zimbabwe.')
+        self.assertIn('Where are the camps?', self.client.get(url).content.decode())
+
+    def test_fragments_must_be_registered(self):
+        with self.assertRaises(TemplateSyntaxError):
+            engines.all()[0].from_string("{% load fragments %}{% fragment 'sidebar' %}x{% endfragment %}")
+
+
+class ContentVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_saves_deletes_and_relations_move_versions(self):
+        before = content_versions.versions()
+        with self.captureOnCommitCallbacks() as callbacks:
+            faq = FAQ.objects.create(question='Q', answer='A')
+        # Nothing moves until the transaction commits
+        self.assertEqual(content_versions.versions(), before)
+        for callback in callbacks:
+            callback()
+        after_save = content_versions.versions()
+        self.assertGreater(after_save[FAQ], before[FAQ])
+        self.assertEqual(after_save[Course], before[Course])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faq.delete()
+        self.assertGreater(content_versions.versions([FAQ])[FAQ], after_save[FAQ])
+
+        post = Post.objects.create(title='Tracking', category=Category.objects.create(name='Notes'), content='...')
+        tag = Tag.objects.create(name='rhino')
+        token = content_versions.token(Post, Tag)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.add(tag)
+        self.assertNotEqual(content_versions.token(Post, Tag), token)
+
+    def test_bumped_versions_do_not_expire(self):
+        content_versions.versions([FAQ])
+        content_versions.bump(FAQ)
+        shared = caches['shared']
+        with open(shared._key_to_file(content_versions._key(FAQ)), 'rb') as f:
+            self.assertIsNone(pickle.load(f))  # the file cache's expiry time
+
+    def test_evicted_versions_restart_higher(self):
+        version = content_versions.versions([Course])[Course]
+        cache.clear()
+        self.assertGreater(content_versions.versions([Course])[Course], version)
+
+    def test_untracked_models_are_rejected(self):
+        with self.assertRaises(ValueError):
+            content_versions.bump(Certificate)
+
+
+class TestCacheIsolationTests(SimpleTestCase):
+    def test_suite_uses_its_own_shared_tier(self):
+        self.assertIn('grtts-test-cache-', caches['shared']._dir)
+        cache.set('sitemaps:isolation', 1)
+        self.assertTrue(os.listdir(caches['shared']._dir))
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.settings_override = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory},
+            'tiered': {
+                'BACKEND': 'main.cache_backends.TieredCache',
+                'OPTIONS': {'SHARED': 'shared', 'LOCAL_KEY_PREFIXES': ['fragments:'], 'LOCAL_MAX_ENTRIES': 2},
+            },
+        })
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.tiered, self.shared = caches['tiered'], caches['shared']
+
+    def stats_since(self, before):
+        return Counter(self.tiered.stats()) - Counter(before)
+
+    def test_local_tier_serves_versioned_keys_only(self):
+        before = self.tiered.stats()
+        self.tiered.set('fragments:nav', '<nav>')
+        self.tiered.set('inbox:unread_counts', {'new': 1})
+        self.shared.clear()
+        self.assertEqual(self.tiered.get('fragments:nav'), '<nav>')
+        self.assertIsNone(self.tiered.get('inbox:unread_counts'))
+        self.assertEqual(self.stats_since(before), {'local_hit': 1, 'shared_miss': 1})
+
+        # Bounded: the least recently used key goes first
+        self.tiered.set('fragments:footer', '<footer>')
+        self.tiered.set('fragments:faq', '<dl>')
+        self.assertIsNone(self.tiered.get('fragments:nav'))
+
+    def test_misses_are_remembered(self):
+        before = self.tiered.stats()
+        self.assertIsNone(self.tiered.get('fragments:nav'))
+        self.assertIsNone(self.tiered.get('fragments:nav'))
+        self.assertEqual(self.stats_since(before), {'local_miss': 1, 'shared_miss': 1, 'local_negative': 1})
+
+        calls = []
+        for _ in range(2):
+            self.assertIsNone(self.tiered.get_or_set('sitemaps:missing', lambda: calls.append(1)))
+        self.assertEqual(len(calls), 1)
+
+    def test_get_or_set_computes_once_across_threads(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return '<footer>'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.tiered.get_or_set('fragments:footer', compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['<footer>'] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_get_or_set_waits_for_another_process(self):
+        self.shared.add('sitemaps:index:filling', 1, 10)
+        timer = threading.Timer(0.1, self.shared.set, ['sitemaps:index', b'<urlset/>'])
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(self.tiered.get_or_set('sitemaps:index', lambda: self.fail('recomputed')), b'<urlset/>')
+
+    def test_incr_reaches_the_shared_tier(self):
+        self.tiered.add('content_version:main.faq', 10, None)
+        self.assertEqual(self.tiered.incr('content_version:main.faq'), 11)
+        self.assertEqual(self.shared.get('content_version:main.faq'), 11)
+        with self.assertRaises(ValueError):
+            self.tiered.incr('content_version:main.course')
@@ -0,0 +1,108 @@
+"""
+Per-request timing: wall time, database queries, template rendering and
+cache lookups.
+
+RequestTimingMiddleware opens a RequestTiming for sampled requests and
+staff; the database wrapper, the template backend (main.templating) and
+the cache backend (main.cache_backends) add to whichever one is current.
+When no request is being timed each hook is a single context variable
+lookup.
+"""
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+import time
+
+from django.db import connections
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.db_count = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total_ms, 2),
+            'db_count': self.db_count,
+            'db_ms': round(self.db_ms, 2),
+            'template_ms': round(self.template_ms, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+    def server_timing(self):
+        """Value for the Server-Timing response header"""
+        app_ms = max(self.total_ms - self.db_ms - self.template_ms, 0)
+        return ', '.join([
+            f'total;dur={self.total_ms:.1f}',
+            f'app;dur={app_ms:.1f}',
+            f'db;dur={self.db_ms:.1f};desc="{self.db_count} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+        ])
+
+
+def current():
+    """The RequestTiming for the request being timed, or None"""
+    return _current.get()
+
+
+def _time_query(execute, sql, params, many, context):
+    timing = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timing is not None:
+            timing.db_count += 1
+            timing.db_ms += (time.perf_counter() - started) * 1000
+
+
+@contextmanager
+def timed_request():
+    """Time everything inside the block; yields the RequestTiming"""
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_time_query))
+            yield timing
+    finally:
+        timing.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def template_render():
+    """Wrap a template render; nested renders are counted once"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    timing.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.template_depth -= 1
+        if not timing.template_depth:
+            timing.template_ms += (time.perf_counter() - started) * 1000
+
+
+def record_cache(hits, misses):
+    timing = _current.get()
+    if timing is not None:
+        timing.cache_hits += hits
+        timing.cache_misses += misses
@@ -24,6 +24,7 @@ urlpatterns = [
     path('inquiry/landowner/', views.inquiry_landowner, name='inquiry_landowner'),
     path('inquiry/enthusiast/', views.inquiry_enthusiast, name='inquiry_enthusiast'),
     path('inquiry/other/', views.inquiry_other, name='inquiry_other'),
+    path('staff/inbox/', views.staff_inbox, name='staff_inbox'),
     
     # Newsletter URLs
     path('newsletter/signup/', views.newsletter_signup, name='newsletter_signup'),
@@ -40,6 +41,19 @@ path('careers/', views.careers, name='careers'),
     # Certificate URLs
     path('verify-certificate/', views.verify_certificate, name='verify_certificate'),
     path('certificate/<str:cert_number>/', views.certificate_detail, name='certificate_detail'),
+    path('certificate/verify/<str:token>/', views.verify_certificate_token, name='verify_certificate_token'),
+    
+    # Site search
+    path('search/', views.search, name='search'),
+    path('api/autocomplete/', views.autocomplete, name='autocomplete'),
+    
+    # Monitoring
+    path('metrics', views.metrics_export, name='metrics'),
+    
+    # Sitemap and feeds
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    path('sitemap-<slug:section>.xml', views.sitemap_section, name='sitemap_section'),
+    path('careers/feed/', views.job_feed, name='job_feed'),
     
     # Registration
     path('register/', views.register, name='register'),
@@ -11,6 +11,8 @@ from django.utils import timezone
 import logging
 import traceback
 
+from . import metrics
+
 def send_contact_notification(contact_message):
     """Send email notification for new contact form submission"""
     subject = f"New Contact Form Message: {contact_message.subject}"
@@ -112,6 +114,7 @@ def send_confirmation_email(subscriber):
 # Set up logging
 logger = logging.getLogger(__name__)
 
+@metrics.email_source('newsletter')
 def send_newsletter_campaign(campaign_id):
     """Send newsletter campaign to all active subscribers with debugging"""
     from .models import NewsletterCampaign, NewsletterSubscriber
@@ -0,0 +1,294 @@
+"""
+Certificate verification frontend and event pipeline.
+
+Submitted numbers first go through a per-IP attempt counter and an in-memory
+Bloom filter of valid certificate numbers, so brute-force guesses are
+rejected without a query. Signed-token checks (main.certificate_tokens) use
+a cached map of certificate numbers to their validity and a fingerprint of
+their current details, and only query for numbers it doesn't know. Both are rebuilt in each process when a
+Certificate is saved or deleted (see main.signals), and at least every
+VERIFICATION_SNAPSHOT_MAX_AGE seconds: the change stamp only reaches the
+processes that share the cache, which on a per-host cache tier isn't all
+of them.
+
+Lookups queue their log entries in process memory instead of inserting a
+CertificateVerificationLog row per request. The queue is flushed with one
+bulk_create plus one aggregated ``view_count = view_count + n`` UPDATE per
+distinct increment: inline once it reaches VERIFICATION_LOG_BATCH_SIZE
+entries or VERIFICATION_LOG_FLUSH_INTERVAL seconds have passed since the
+last flush, and otherwise from a background timer that interval after the
+first queued event, so a worker that goes quiet still writes its events.
+Anything left is flushed at interpreter exit. A batch that
+fails to write goes back on the queue (up to ten batches' worth; older
+events beyond that are written to the error log instead).
+"""
+import atexit
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from .certificate_tokens import fingerprint
+from .models import Certificate, CertificateVerificationLog
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION_KEY = 'certificates:snapshot_version'
+
+_lock = threading.Lock()
+_pending = []
+_last_flush = time.monotonic()
+_timer = None
+
+
+# =============================================================================
+# NEGATIVE-LOOKUP FILTER
+# =============================================================================
+
+def normalize_number(certificate_number):
+    return (certificate_number or '').strip().upper()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing of one blake2b digest"""
+
+    def __init__(self, expected_items, false_positive_rate=0.01):
+        expected_items = max(expected_items, 1)
+        self.size = max(64, int(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class CertificateSnapshot:
+    """
+    Process-local structure derived from the certificates table.
+
+    A version stamp in the shared cache tells every worker when to rebuild,
+    so a certificate issued or revoked in one process is seen by the others
+    on their next lookup. A snapshot older than VERIFICATION_SNAPSHOT_MAX_AGE
+    is rebuilt anyway, for processes that don't share that cache.
+    Subclasses implement ``build()``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._version = None
+        self._built = 0.0
+
+    def build(self):
+        raise NotImplementedError
+
+    def get(self):
+        version = cache.get(SNAPSHOT_VERSION_KEY)
+        if version is None:
+            cache.add(SNAPSHOT_VERSION_KEY, time.time(), None)
+            version = cache.get(SNAPSHOT_VERSION_KEY)
+
+        max_age = getattr(settings, 'VERIFICATION_SNAPSHOT_MAX_AGE', 60)
+        with self._lock:
+            if self._data is None or self._version != version or time.monotonic() - self._built >= max_age:
+                self._data = self.build()
+                self._version = version
+                self._built = time.monotonic()
+            return self._data
+
+
+class CertificateNumberFilter(CertificateSnapshot):
+    """Bloom filter of valid certificate numbers"""
+
+    def build(self):
+        numbers = list(
+            Certificate.objects.filter(is_valid=True)
+            .values_list('certificate_number', flat=True)
+            .iterator()
+        )
+        bloom = BloomFilter(len(numbers) * 2)
+        for number in numbers:
+            bloom.add(normalize_number(number))
+        return bloom
+
+    def might_contain(self, certificate_number):
+        return normalize_number(certificate_number) in self.get()
+
+
+class CertificateStatuses(CertificateSnapshot):
+    """Validity and details fingerprint of every certificate number, for signed-token checks"""
+
+    FIELDS = ('certificate_number', 'full_name', 'course_name', 'completion_date')
+
+    def build(self):
+        return {
+            normalize_number(number): (is_valid, fingerprint(number, *details))
+            for number, is_valid, *details in Certificate.objects.values_list(
+                'certificate_number', 'is_valid', *self.FIELDS[1:]
+            ).iterator()
+        }
+
+    def is_current(self, details):
+        """
+        Whether a token's ``details`` (see certificate_tokens.read_token) still
+        describe a valid certificate. False for revoked and deleted
+        certificates, and for tokens issued before the details were corrected.
+        """
+        status = self.get().get(normalize_number(details['certificate_number']))
+        if status is None:
+            # Deleted, or issued since this snapshot was built
+            return Certificate.objects.filter(is_valid=True, **{field: details[field] for field in self.FIELDS}).exists()
+        is_valid, current = status
+        return is_valid and current == fingerprint(*(details[field] for field in self.FIELDS))
+
+
+certificate_filter = CertificateNumberFilter()
+certificate_statuses = CertificateStatuses()
+
+
+def invalidate_certificate_snapshots():
+    """Make every process rebuild its filter and status map on the next lookup"""
+    cache.set(SNAPSHOT_VERSION_KEY, time.time(), None)
+
+
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+def allow_verification(ip_address):
+    """
+    Per-IP attempt counter kept in the shared cache. Allows
+    VERIFICATION_RATE_BURST attempts per window, the time
+    VERIFICATION_RATE_PER_MINUTE takes to allow that many, and returns False
+    for the rest. add() and incr() are atomic on Redis, so concurrent requests
+    from one client can't all read the same count.
+    """
+    burst = getattr(settings, 'VERIFICATION_RATE_BURST', 10)
+    per_second = getattr(settings, 'VERIFICATION_RATE_PER_MINUTE', 30) / 60.0
+    window = max(1, round(burst / per_second))
+    key = f"certificates:attempts:{ip_address}:{int(time.time() // window)}"
+
+    cache.add(key, 0, window + 1)
+    try:
+        attempts = cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.add(key, 1, window + 1)
+        attempts = 1
+    return attempts <= burst
+
+
+# =============================================================================
+# EVENT PIPELINE
+# =============================================================================
+
+def record_verification(certificate_id, ip_address, user_agent, successful=True, certificate_number=''):
+    """Queue a verification event; flushes inline once the batch is due"""
+    global _timer
+
+    with _lock:
+        _pending.append(CertificateVerificationLog(
+            certificate_id=certificate_id,
+            certificate_number=(certificate_number or '')[:50],
+            ip_address=ip_address,
+            user_agent=user_agent or '',
+            successful=successful,
+        ))
+        batch_size = getattr(settings, 'VERIFICATION_LOG_BATCH_SIZE', 100)
+        interval = getattr(settings, 'VERIFICATION_LOG_FLUSH_INTERVAL', 5)
+        due = (
+            len(_pending) >= batch_size
+            or time.monotonic() - _last_flush >= interval
+        )
+        if not due and _timer is None:
+            _timer = threading.Timer(interval, _flush_from_timer)
+            _timer.daemon = True
+            _timer.start()
+
+    if due:
+        flush()
+
+
+def _flush_from_timer():
+    global _timer
+
+    with _lock:
+        _timer = None
+    try:
+        flush()
+    finally:
+        # The timer thread's connection would otherwise stay open
+        connection.close()
+
+
+def flush():
+    """Write all queued verification events. Returns the number written."""
+    global _pending, _last_flush
+
+    with _lock:
+        batch, _pending = _pending, []
+        _last_flush = time.monotonic()
+
+    if not batch:
+        return 0
+
+    try:
+        # All or nothing, so a failed batch can be queued again without double counting
+        with transaction.atomic():
+            CertificateVerificationLog.objects.bulk_create(batch)
+
+            views = Counter(entry.certificate_id for entry in batch if entry.successful and entry.certificate_id)
+            by_increment = defaultdict(list)
+            for certificate_id, count in views.items():
+                by_increment[count].append(certificate_id)
+            for count, certificate_ids in by_increment.items():
+                Certificate.objects.filter(pk__in=certificate_ids).update(
+                    view_count=F('view_count') + count
+                )
+    except Exception as e:
+        logger.error(f"Failed to flush {len(batch)} certificate verification events: {e}")
+        _requeue(batch)
+        return 0
+
+    return len(batch)
+
+
+def _requeue(batch):
+    """Put a batch that failed to write back at the head of the queue, up to a limit"""
+    global _pending
+
+    limit = getattr(settings, 'VERIFICATION_LOG_BATCH_SIZE', 100) * 10
+    with _lock:
+        _pending = batch + _pending
+        dropped, _pending = _pending[:-limit], _pending[-limit:]
+    for entry in dropped:
+        # The oldest events go first; keep a record of them in the log instead
+        logger.error(
+            f"Dropped certificate verification event: certificate={entry.certificate_id} "
+            f"number={entry.certificate_number!r} ip={entry.ip_address} successful={entry.successful}"
+        )
+
+
+def pending_count():
+    with _lock:
+        return len(_pending)
+
+
+atexit.register(flush)
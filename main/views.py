@@ -1,14 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.urls import reverse
 from django.db.models import Q
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified, Http404
 from django.core.mail import send_mail
 from django.conf import settings
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_protect, csrf_exempt
 from django.views.decorators.http import require_POST
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+import hashlib
 import traceback
 import uuid
 from django.views.decorators.http import require_POST
@@ -21,12 +27,15 @@ import json
 from .models import (
     StudentInquiry, LandownerInquiry, EnthusiastInquiry, OtherInquiry,
     Course, Testimonial, DeploymentLocation, FAQ, ContactMessage,
-    NewsletterSubscriber, NewsletterTracking, Certificate, CertificateVerificationLog,
-    UserDocument, ApplicantProfile, CourseApplication, User,
-    JobPost, JobApplication  # ADD THESE TWO
+    NewsletterSubscriber, NewsletterTracking, Certificate,
+    CourseApplication, User,
+    JobPost, JobApplication,  # ADD THESE TWO
+    InboxItem,
 )
 
-# Utils and Forms
+# Utils and Forms. The search, autocomplete, inbox, registration, metrics,
+# sitemap and verification modules are imported by the views that use them,
+# so loading the URLconf at boot doesn't pay for them.
 from .utils import send_contact_notification
 from .forms import ApplicantRegistrationForm, NewsletterSignupForm
 
@@ -39,69 +48,27 @@ logger = logging.getLogger(__name__)
 
 def register(request):
     """Applicant registration view - creates User and ApplicantProfile"""
+    from .registration import register_applicant
+
     if request.method == 'POST':
         form = ApplicantRegistrationForm(request.POST, request.FILES)
         if form.is_valid():
             # Get cleaned data
             first_name = form.cleaned_data['first_name']
-            last_name = form.cleaned_data['last_name']
             email = form.cleaned_data['email']
-            phone = form.cleaned_data['phone']
-            
-            # Create username from email
-            username = email.split('@')[0]
             
             # Check if user already exists
             if User.objects.filter(email=email).exists():
                 messages.error(request, 'A user with this email already exists.')
                 return render(request, 'main/register.html', {'form': form})
             
-            # Create the User (using custom User model)
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=None,
-                first_name=first_name,
-                last_name=last_name
-            )
-            user.set_unusable_password()
-            user.phone = phone  # Save phone to User model
-            user.user_type = 'applicant'  # Set user type
-            user.save()
-            
-            # Create the ApplicantProfile
-            applicant = ApplicantProfile.objects.create(
-                user=user,
-                date_of_birth=form.cleaned_data.get('date_of_birth'),
-                gender=form.cleaned_data.get('gender'),
-                nationality=form.cleaned_data.get('nationality', ''),
-                address=form.cleaned_data.get('address', ''),
-                city=form.cleaned_data.get('city', ''),
-                province=form.cleaned_data.get('province', ''),
-                emergency_name=form.cleaned_data.get('emergency_name', ''),
-                emergency_phone=form.cleaned_data.get('emergency_phone', ''),
-                emergency_relationship=form.cleaned_data.get('emergency_relationship', ''),
-                medical_conditions=form.cleaned_data.get('medical_conditions', ''),
-                dietary_requirements=form.cleaned_data.get('dietary_requirements', '')
-            )
-            
-            # Save uploaded files as UserDocument objects
-            file_mappings = [
-                ('profile_photo', 'photo', 'Profile photo'),
-                ('id_document', 'id', 'ID document'),
-                ('cv', 'cv', 'CV/Resume'),
-                ('certificates', 'certificate', 'Certificate'),
-            ]
-            
-            for field_name, doc_type, description in file_mappings:
-                file = form.cleaned_data.get(field_name)
-                if file:
-                    UserDocument.objects.create(
-                        user=user,
-                        document_type=doc_type,
-                        file=file,
-                        description=f"{description} uploaded during registration for {email}"
-                    )
+            # User, profile and documents are written in one transaction;
+            # uploads run concurrently before it opens
+            try:
+                register_applicant(form.cleaned_data)
+            except IntegrityError:
+                messages.error(request, 'An account with this email address or username already exists.')
+                return render(request, 'main/register.html', {'form': form})
             
             messages.success(
                 request, 
@@ -248,6 +215,128 @@ def inquiry_other(request):
             'message': 'Error submitting form. Please try again.'
         }, status=400)
 
+@staff_member_required
+def staff_inbox(request):
+    """Unified triage view over all inquiries and contact messages"""
+    from . import inbox
+
+    if request.method == 'POST':
+        # Checkbox values are inbox item ids; ignore anything else that's posted
+        item_ids = [int(value) for value in request.POST.getlist('items') if value.isdecimal()]
+        if item_ids:
+            inbox.mark_items_read(item_ids, is_read=request.POST.get('action') != 'unread')
+        return redirect(request.get_full_path())
+    
+    kind = request.GET.get('kind')
+    if kind not in inbox.SOURCES:
+        kind = None
+    unread_only = request.GET.get('unread') == '1'
+    items, next_cursor = inbox.page(
+        cursor=request.GET.get('cursor'),
+        kind=kind,
+        unread_only=unread_only,
+    )
+    for item in items:
+        model = inbox.SOURCES[item.kind][0]
+        item.admin_url = reverse(f'admin:main_{model._meta.model_name}_change', args=[item.object_id])
+    
+    unread_counts = inbox.unread_counts()
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Inbox',
+        'items': items,
+        'next_cursor': next_cursor,
+        'kind': kind,
+        'unread_only': unread_only,
+        'kinds': [(value, label, unread_counts[value]) for value, label in InboxItem.KIND_CHOICES],
+        'unread_total': unread_counts['total'],
+    }
+    return render(request, 'main/staff_inbox.html', context)
+
+# =============================================================================
+# SITE SEARCH
+# =============================================================================
+
+def search(request):
+    """Ranked search across courses, articles, FAQs, jobs and locations"""
+    from .search import SOURCES as SEARCH_SOURCES, site_search
+
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type')
+    if kind not in SEARCH_SOURCES:
+        kind = None
+    results = site_search.search(query, limit=50, kind=kind) if query else []
+    
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'query': query, 'results': results})
+    
+    context = {
+        'query': query,
+        'kind': kind,
+        'kinds': [(value, source[0]) for value, source in SEARCH_SOURCES.items()],
+        'results': results,
+    }
+    return render(request, 'main/search.html', context)
+
+
+def autocomplete(request):
+    """Typeahead suggestions for course, job, location, tag and category names"""
+    from .autocomplete import normalize as normalize_prefix, suggestions
+
+    index, version = suggestions.get()
+    prefix = normalize_prefix(request.GET.get('q', ''))
+    etag = '"%s"' % hashlib.md5(f'{version}:{prefix}'.encode()).hexdigest()
+    
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({'query': prefix, 'results': index.lookup(prefix)})
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.AUTOCOMPLETE_MAX_AGE}'
+    return response
+
+
+# =============================================================================
+# MONITORING
+# =============================================================================
+
+def metrics_export(request):
+    """Prometheus scrape endpoint, for staff or a METRICS_TOKEN bearer"""
+    from . import metrics
+
+    token = settings.METRICS_TOKEN
+    bearer = request.headers.get('Authorization', '')
+    if not request.user.is_staff and not (token and constant_time_compare(bearer, f'Bearer {token}')):
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# =============================================================================
+# SITEMAP AND FEEDS
+# =============================================================================
+
+def sitemap_index(request):
+    from . import sitemaps
+    return sitemaps.document_response(request, 'index', 'application/xml')
+
+
+def sitemap_section(request, section):
+    from . import sitemaps
+
+    page = request.GET.get('p', '1')
+    if section not in sitemaps.SECTIONS or not page.isdecimal() or int(page) < 1:
+        raise Http404("No such sitemap section")
+    page = int(page)
+    if page > 1 and not sitemaps.document(f'section:{section}', page - 1)['more']:
+        raise Http404("No such sitemap page")
+    return sitemaps.document_response(request, f'section:{section}', 'application/xml', page)
+
+
+def job_feed(request):
+    from . import sitemaps
+    return sitemaps.document_response(request, 'feed:jobs:rss', 'application/rss+xml; charset=utf-8')
+
+
 # =============================================================================
 # EMAIL NOTIFICATION HELPER FUNCTIONS
 # =============================================================================
@@ -729,49 +818,91 @@ def newsletter_test_page(request):
 # =============================================================================
 
 def verify_certificate(request):
+    from .verification import allow_verification, certificate_filter, record_verification
+
     certificate = None
     verified = False
+    status = 200
     
     if request.method == 'POST':
-        cert_number = request.POST.get('certificate_number')
-        try:
-            certificate = Certificate.objects.get(
-                certificate_number=cert_number,
-                is_valid=True
-            )
-            certificate.view_count += 1
-            certificate.save()
+        cert_number = request.POST.get('certificate_number', '').strip()
+        ip_address = request.META.get('REMOTE_ADDR')
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        
+        if not allow_verification(ip_address):
+            messages.error(request, 'Too many verification attempts. Please wait a minute and try again.')
+            status = 429
+        else:
+            # The Bloom filter rejects numbers that were never issued without a query
+            if cert_number and certificate_filter.might_contain(cert_number):
+                certificate = Certificate.objects.filter(
+                    certificate_number=cert_number,
+                    is_valid=True
+                ).first()
             
-            CertificateVerificationLog.objects.create(
-                certificate=certificate,
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                successful=True
+            # Logged and counted in batches by the verification pipeline
+            record_verification(
+                certificate.pk if certificate else None,
+                ip_address,
+                user_agent,
+                successful=certificate is not None,
+                certificate_number=cert_number,
             )
-            verified = True
-        except Certificate.DoesNotExist:
-            messages.error(request, 'Invalid certificate number or certificate not found')
+            if certificate:
+                verified = True
+            else:
+                messages.error(request, 'Invalid certificate number or certificate not found')
     
     context = {
         'certificate': certificate,
         'verified': verified,
     }
-    return render(request, 'main/verify_certificate.html', context)
+    return render(request, 'main/verify_certificate.html', context, status=status)
 
 
 def certificate_detail(request, cert_number):
+    from .verification import record_verification
+
     certificate = get_object_or_404(Certificate, certificate_number=cert_number, is_valid=True)
     
-    CertificateVerificationLog.objects.create(
-        certificate=certificate,
-        ip_address=request.META.get('REMOTE_ADDR'),
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        successful=True
+    record_verification(
+        certificate.pk,
+        request.META.get('REMOTE_ADDR'),
+        request.META.get('HTTP_USER_AGENT', ''),
+        certificate_number=cert_number,
     )
     
     return render(request, 'main/certificate_detail.html', {'certificate': certificate})
 
 
+def verify_certificate_token(request, token):
+    """Verify a signed certificate token (from the QR code), usually without a database lookup"""
+    from .certificate_tokens import InvalidToken, read_token
+    from .verification import certificate_statuses
+
+    try:
+        details = read_token(token)
+    except InvalidToken:
+        details = None
+    
+    # Revoked, deleted and since-corrected certificates all show as no longer valid
+    revoked = bool(details) and not certificate_statuses.is_current(details)
+    verified = bool(details) and not revoked
+    
+    if request.GET.get('format') == 'json':
+        data = {'verified': verified, 'revoked': revoked}
+        if details:
+            data.update(details, completion_date=details['completion_date'].isoformat())
+        return JsonResponse(data, status=200 if details else 400)
+    
+    context = {
+        'certificate': details,
+        'verified': verified,
+        'revoked': revoked,
+    }
+    return render(request, 'main/certificate_token.html', context, status=200 if details else 400)
+
+
 # =============================================================================
 # EMAIL TEST VIEW
 # =============================================================================